@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+"""
+Cross-Store / Near-Duplicate App Matching
+=========================================
+1. Normalise 'App Name' / 'Developer' so the same product matches across
+   the App Store and Google Play exports.
+2. Build MinHash signatures over 'Description' shingles and use LSH banding
+   to find clone apps without comparing every pair.
+3. Merge both kinds of match into clusters and emit one canonical id per
+   cluster (app_clusters.csv) that the exports can use to collapse duplicates.
+"""
+
+import csv
+import hashlib
+import os
+import random
+import re
+import unicodedata
+from collections import defaultdict
+
+from app_record import app_id_from_link
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # CSV files to match against each other (label -> file name)
+    'INPUT_CSVS': {
+        'app_store': 'app_store_apps.csv',
+        'google_play': 'google_play_apps.csv',
+        'google_play_similar': 'google_play_similar_apps.csv',
+    },
+
+    # Output file with one canonical id per app
+    'OUTPUT_CSV': 'app_clusters.csv',
+
+    # MinHash settings: NUM_PERM = BANDS * ROWS_PER_BAND
+    # 16 bands x 8 rows puts the LSH threshold at roughly 0.7 Jaccard similarity
+    'NUM_PERM': 128,
+    'BANDS': 16,
+    'ROWS_PER_BAND': 8,
+
+    # Estimated Jaccard similarity required to treat two descriptions as clones
+    'SIMILARITY_THRESHOLD': 0.7,
+
+    # Words per description shingle, and the minimum number of shingles
+    # a description needs before it takes part in matching
+    'SHINGLE_SIZE': 3,
+    'MIN_SHINGLES': 10,
+}
+
+# Legal-entity suffixes stripped from developer names before matching
+_DEVELOPER_SUFFIXES = {
+    'inc', 'llc', 'ltd', 'limited', 'gmbh', 'corp', 'corporation', 'co', 'company',
+    'sa', 'sas', 'sl', 'srl', 'bv', 'ab', 'as', 'oy', 'pty', 'plc', 'ag', 'kg',
+    'sirketi', 'anonim', 'yazilim', 'studio', 'studios', 'apps', 'games',
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+
+
+# ===========================
+# Normalisation helpers
+# ===========================
+def _fold(text):
+    """Lowercase, strip accents and collapse everything but letters/digits to single spaces"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r'[^a-z0-9]+', ' ', text.lower())
+    return text.strip()
+
+
+def normalize_app_name(name):
+    """Normalise an app name, dropping store subtitles ('Name: tagline' / 'Name - tagline')"""
+    if not name or name == "N/A":
+        return ""
+    head = re.split(r'\s[-–—|]\s|:', name, maxsplit=1)[0]
+    return _fold(head)
+
+
+def normalize_developer(developer):
+    """Normalise a developer name, dropping legal-entity suffixes"""
+    if not developer or developer == "N/A":
+        return ""
+    words = [w for w in _fold(developer).split() if w not in _DEVELOPER_SUFFIXES]
+    return ' '.join(words)
+
+
+def description_shingles(description, size=None):
+    """Return the set of hashed word shingles for a description"""
+    size = size or CONFIG['SHINGLE_SIZE']
+    if not description or description == "N/A":
+        return set()
+    text = re.sub(r'http\S+|www\S+', ' ', description)
+    words = _fold(text).split()
+    if len(words) < size:
+        return set()
+    shingles = set()
+    for i in range(len(words) - size + 1):
+        shingle = ' '.join(words[i:i + size]).encode('utf-8')
+        shingles.add(int.from_bytes(hashlib.blake2b(shingle, digest_size=4).digest(), 'little'))
+    return shingles
+
+
+# ===========================
+# MinHash / LSH
+# ===========================
+class MinHasher:
+    def __init__(self, num_perm=None, seed=1):
+        """
+        Build the universal hash family used for every signature
+
+        :param num_perm: Number of hash permutations (signature length)
+        :param seed: Seed so signatures are comparable across runs
+        """
+        self.num_perm = num_perm or CONFIG['NUM_PERM']
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+            for _ in range(self.num_perm)
+        ]
+
+    def signature(self, shingles):
+        """Compute the MinHash signature of a set of hashed shingles"""
+        return tuple(
+            min(((a * s + b) % _MERSENNE_PRIME) & _MAX_HASH for s in shingles)
+            for a, b in self.permutations
+        )
+
+
+def estimated_similarity(sig_a, sig_b):
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    same = sum(1 for x, y in zip(sig_a, sig_b) if x == y)
+    return same / len(sig_a)
+
+
+class _UnionFind:
+    def __init__(self, size):
+        self.parent = list(range(size))
+
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            # Keep the lower index as root so clustering is deterministic
+            if root_b < root_a:
+                root_a, root_b = root_b, root_a
+            self.parent[root_b] = root_a
+
+
+# ===========================
+# Matching
+# ===========================
+def cluster_apps(rows):
+    """
+    Cluster duplicate apps
+
+    :param rows: List of dicts with 'App Name', 'Developer', 'Description' and 'App Link'
+    :return: List with the canonical id of each row (same order as rows)
+    """
+    uf = _UnionFind(len(rows))
+
+    # 1. Exact matches on normalised name + developer (same product in both stores)
+    by_identity = {}
+    for i, row in enumerate(rows):
+        name = normalize_app_name(row.get('App Name'))
+        developer = normalize_developer(row.get('Developer'))
+        if not name or not developer:
+            continue
+        key = (name, developer)
+        if key in by_identity:
+            uf.union(by_identity[key], i)
+        else:
+            by_identity[key] = i
+
+    # 2. Near-duplicate descriptions via MinHash + LSH banding
+    hasher = MinHasher()
+    bands, rows_per_band = CONFIG['BANDS'], CONFIG['ROWS_PER_BAND']
+    if bands * rows_per_band != hasher.num_perm:
+        raise ValueError("BANDS * ROWS_PER_BAND must equal NUM_PERM")
+
+    signatures = {}
+    buckets = defaultdict(list)
+    for i, row in enumerate(rows):
+        shingles = description_shingles(row.get('Description'))
+        if len(shingles) < CONFIG['MIN_SHINGLES']:
+            continue
+        sig = hasher.signature(shingles)
+        signatures[i] = sig
+        for band in range(bands):
+            start = band * rows_per_band
+            buckets[(band, sig[start:start + rows_per_band])].append(i)
+
+    for members in buckets.values():
+        if len(members) < 2:
+            continue
+        # Verify each member against one representative per cluster already in the bucket
+        # (a bucket of clones has one representative, so this stays far below all pairs)
+        representatives = [members[0]]
+        for other in members[1:]:
+            matched = False
+            for rep in representatives:
+                if uf.find(rep) == uf.find(other):
+                    matched = True
+                    break
+                if estimated_similarity(signatures[rep], signatures[other]) >= CONFIG['SIMILARITY_THRESHOLD']:
+                    uf.union(rep, other)
+                    matched = True
+            if not matched:
+                representatives.append(other)
+
+    # 3. Canonical id = smallest app id in the cluster
+    cluster_ids = defaultdict(list)
+    for i, row in enumerate(rows):
+        app_id = app_id_from_link(row.get('App Link')) or f"row:{i}"
+        cluster_ids[uf.find(i)].append(app_id)
+    canonical = {root: min(ids) for root, ids in cluster_ids.items()}
+
+    return [canonical[uf.find(i)] for i in range(len(rows))]
+
+
+def collapse_duplicates(rows, canonical_ids):
+    """Keep only the first row of each cluster (rows and canonical_ids in the same order)"""
+    seen = set()
+    unique = []
+    for row, canonical_id in zip(rows, canonical_ids):
+        if canonical_id in seen:
+            continue
+        seen.add(canonical_id)
+        unique.append(row)
+    return unique
+
+
+def load_canonical_ids(filename=None):
+    """
+    Read the app id -> canonical id mapping written by save_clusters
+
+    :param filename: Cluster CSV (uses CONFIG if None)
+    :return: Dict of app id -> canonical id (empty if the file does not exist)
+    """
+    filename = filename or CONFIG['OUTPUT_CSV']
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    if not os.path.exists(path):
+        print(f"⚠ Warning: {filename} not found, run app_matching.py first")
+        return {}
+    with open(path, newline='', encoding='utf-8') as f:
+        return {row['App ID']: row['Canonical ID'] for row in csv.DictReader(f) if row['App ID']}
+
+
+def load_rows(input_csvs=None):
+    """Load rows from every input CSV, tagging each with its source label"""
+    input_csvs = input_csvs or CONFIG['INPUT_CSVS']
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    rows = []
+    for source, filename in input_csvs.items():
+        path = os.path.join(base_dir, filename)
+        if not os.path.exists(path):
+            print(f"⚠ Warning: {filename} not found, skipping...")
+            continue
+        with open(path, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                row['Source'] = source
+                rows.append(row)
+        print(f"Loaded {filename}")
+    return rows
+
+
+def save_clusters(rows, canonical_ids, filename=None):
+    """Write the app -> canonical id mapping"""
+    filename = filename or CONFIG['OUTPUT_CSV']
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+
+    sizes = defaultdict(int)
+    for canonical_id in canonical_ids:
+        sizes[canonical_id] += 1
+
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Source', 'App Link', 'App ID', 'Canonical ID', 'Cluster Size'])
+        for row, canonical_id in zip(rows, canonical_ids):
+            writer.writerow([
+                row['Source'],
+                row.get('App Link', ''),
+                app_id_from_link(row.get('App Link')) or '',
+                canonical_id,
+                sizes[canonical_id],
+            ])
+    print(f"✓ Saved cluster mapping to {path}")
+
+
+def main():
+    print("="*60)
+    print("Cross-Store / Near-Duplicate App Matching")
+    print("="*60)
+
+    rows = load_rows()
+    if not rows:
+        print("No apps to match.")
+        return
+
+    canonical_ids = cluster_apps(rows)
+    save_clusters(rows, canonical_ids)
+
+    clusters = len(set(canonical_ids))
+    print(f"\n{'='*60}")
+    print(f"Apps: {len(rows)}")
+    print(f"Clusters: {clusters}")
+    print(f"Duplicates collapsible: {len(rows) - clusters}")
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+"""
+Shared App Record
+=================
+One compact record type used by the App Store, Play category and Play
+similar-apps pipelines. Display strings are kept exactly as scraped so the
+CSV columns are unchanged, and the numeric values (installs, rating, review
+count, release date) are parsed once when the record is built.
+"""
+
+import re
+from datetime import datetime
+
+# CSV columns shared by every export, in order
+CSV_COLUMNS = [
+    'Niche', 'App Name', 'Logo URL', 'Install Count', 'Release Date', 'Rating', 'Review Count',
+    'App Link', 'Developer', 'Description', 'Keywords',
+    'Screenshot 1', 'Screenshot 2', 'Screenshot 3', 'Screenshot 4',
+]
+
+# Release date formats used by the exports: Play ('Feb 11, 2025') and App Store ('February 11, 2025')
+_DATE_FORMATS = ("%b %d, %Y", "%B %d, %Y")
+
+_SUFFIX_MULTIPLIERS = {'K': 1_000, 'M': 1_000_000, 'B': 1_000_000_000}
+
+
+# ===========================
+# Parsing helpers
+# ===========================
+def _parse_count(text):
+    """Parse '1.2K', '5M+', '1,000+', '81.8K reviews' or '840' into an integer (None if not a count)"""
+    if not text or text == "N/A":
+        return None
+    match = re.search(r'(\d[\d,]*(?:\.\d+)?)\s*([KMB])?', str(text).upper())
+    if not match:
+        return None
+    value = float(match.group(1).replace(',', ''))
+    return int(value * _SUFFIX_MULTIPLIERS.get(match.group(2), 1))
+
+
+def parse_install_count(install_str):
+    """Parse an install count string ('5M+', '10K+', '1.2K') to an integer (0 if unknown)"""
+    return _parse_count(install_str) or 0
+
+
+def parse_review_count(review_str):
+    """Parse a review count string ('81.8K reviews', '122k', '421') to an integer (0 if unknown)"""
+    return _parse_count(review_str) or 0
+
+
+def parse_rating(rating_str):
+    """Parse a rating string ('4.6', '4.6star') to a float (None if unknown)"""
+    match = re.match(r'\s*(\d+(?:\.\d+)?)', str(rating_str or ''))
+    return float(match.group(1)) if match else None
+
+
+def parse_release_date(date_str):
+    """Parse a release date string ('Feb 11, 2025' / 'February 11, 2025') to a date (None if unknown)"""
+    if not date_str or date_str == "N/A":
+        return None
+    for fmt in _DATE_FORMATS:
+        try:
+            return datetime.strptime(date_str, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def app_id_from_link(app_link):
+    """Extract a store-prefixed app id ('play:com.x' / 'appstore:123') from an app link"""
+    if not app_link:
+        return None
+    match = re.search(r'[?&]id=([a-zA-Z0-9._]+)', app_link)
+    if match:
+        return f"play:{match.group(1)}"
+    match = re.search(r'/id(\d+)', app_link)
+    if match:
+        return f"appstore:{match.group(1)}"
+    return None
+
+
+# ===========================
+# Record type
+# ===========================
+class AppRecord:
+    __slots__ = (
+        # Display values, written to the CSV as-is
+        'niche', 'app_name', 'logo_url', 'install_count', 'release_date', 'rating', 'review_count',
+        'app_link', 'developer', 'description', 'keywords', 'screenshots',
+        # Typed values, parsed once
+        'installs', 'rating_value', 'reviews', 'released',
+    )
+
+    def __init__(self, niche='', app_name='N/A', logo_url='N/A', install_count='N/A', release_date='N/A',
+                 rating='N/A', review_count='N/A', app_link='', developer='N/A', description='N/A',
+                 keywords='N/A', screenshots=(), installs=None, rating_value=None, reviews=None, released=None):
+        """
+        Build a record from display values; typed values are parsed from them unless given
+
+        :param screenshots: Up to 4 screenshot URLs (padded with 'N/A')
+        :param installs: Install count as an integer
+        :param rating_value: Rating as a float
+        :param reviews: Review count as an integer
+        :param released: Release date as a date
+        """
+        self.niche = niche
+        self.app_name = app_name
+        self.logo_url = logo_url
+        self.install_count = str(install_count)
+        self.release_date = release_date
+        self.rating = str(rating)
+        self.review_count = str(review_count)
+        self.app_link = app_link
+        self.developer = developer
+        self.description = description
+        self.keywords = keywords
+        screenshots = tuple(screenshots[:4])
+        self.screenshots = screenshots + ('N/A',) * (4 - len(screenshots))
+
+        self.installs = installs if installs is not None else parse_install_count(self.install_count)
+        self.rating_value = rating_value if rating_value is not None else parse_rating(self.rating)
+        self.reviews = reviews if reviews is not None else parse_review_count(self.review_count)
+        self.released = released if released is not None else parse_release_date(release_date)
+
+    @classmethod
+    def from_row(cls, row):
+        """Build a record from a CSV row dict (CSV_COLUMNS keys)"""
+        return cls(
+            niche=row.get('Niche', ''),
+            app_name=row.get('App Name', 'N/A'),
+            logo_url=row.get('Logo URL', 'N/A'),
+            install_count=row.get('Install Count', 'N/A'),
+            release_date=row.get('Release Date', 'N/A'),
+            rating=row.get('Rating', 'N/A'),
+            review_count=row.get('Review Count', 'N/A'),
+            app_link=row.get('App Link', ''),
+            developer=row.get('Developer', 'N/A'),
+            description=row.get('Description', 'N/A'),
+            keywords=row.get('Keywords', 'N/A'),
+            screenshots=[row.get(f'Screenshot {i}', 'N/A') for i in range(1, 5)],
+        )
+
+    def to_row(self):
+        """Serialise to a CSV row dict with the CSV_COLUMNS keys"""
+        return {
+            'Niche': self.niche,
+            'App Name': self.app_name,
+            'Logo URL': self.logo_url,
+            'Install Count': self.install_count,
+            'Release Date': self.release_date,
+            'Rating': self.rating,
+            'Review Count': self.review_count,
+            'App Link': self.app_link,
+            'Developer': self.developer,
+            'Description': self.description,
+            'Keywords': self.keywords,
+            'Screenshot 1': self.screenshots[0],
+            'Screenshot 2': self.screenshots[1],
+            'Screenshot 3': self.screenshots[2],
+            'Screenshot 4': self.screenshots[3],
+        }
+
+    @property
+    def app_id(self):
+        """Store-prefixed app id taken from the app link"""
+        return app_id_from_link(self.app_link)
+
+    def __repr__(self):
+        return f"AppRecord({self.app_id or self.app_link!r}, {self.app_name!r})"
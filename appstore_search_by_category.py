@@ -1,13 +1,26 @@
+import argparse
 import requests
 import csv
+import heapq
+import io
+import os
+import tempfile
 import time
 import random
 import json
 from datetime import datetime, timedelta
-from collections import Counter
+from collections import Counter, defaultdict
 import re
 from bs4 import BeautifulSoup
 
+from app_record import AppRecord, CSV_COLUMNS, app_id_from_link
+from rate_controller import AdaptiveRateController
+from raw_archive import RawArchive
+from profiling import RunProfiler
+from retry_queue import RetryQueue, is_transient
+from run_scheduler import DeadlineScheduler
+from work_queue import SQLiteWorkQueue, worker_file
+
 # ===========================
 # CONFIGURATION - EDIT HERE
 # ===========================
@@ -18,6 +31,35 @@ CONFIG = {
     # How many days back too include (only used if FILTER_BY_RELEASE_DATE = True)
     # Example: 90 = last 90 days, 180 = last 6 months, 365 = last year
     'DAYS_THRESHOLD': 365,
+
+    # Rows per in-memory run when sorting the output by app name; longer outputs
+    # are spilled to temp files and merged, so memory stays flat
+    'SORT_RUN_SIZE': 5000,
+
+    # Keep every raw lookup response in the compressed archive, so the CSV can be
+    # rebuilt offline with `python raw_archive.py reparse app_store`
+    'ARCHIVE_RAW_RESPONSES': False,
+
+    # Apps per iTunes lookup request (comma-separated ids, one storefront per request)
+    'LOOKUP_BATCH_SIZE': 100,
+
+    # Save the resume checkpoint (<output>.checkpoint.json) after this many processed apps
+    'CHECKPOINT_EVERY': 25,
+
+    # Developer fan-out: after the feeds' apps, look up the whole catalogue of the developers
+    # of accepted apps (entity=software) and add their unseen apps (False = feeds only)
+    'DEVELOPER_FANOUT': True,
+    # Developers per fan-out request
+    'ARTIST_BATCH_SIZE': 20,
+    # Requests per developer before a failing fan-out gives up on it for this run
+    'FANOUT_ATTEMPTS': 3,
+
+    # Adaptive request rate per host (requests per second), replaces fixed sleeps
+    'RATE_LIMIT': {
+        'INITIAL_RATE': 2.0,
+        'MIN_RATE': 0.25,
+        'MAX_RATE': 5.0,
+    },
 }
 
 # App Store category IDs for RSS feeds
@@ -89,6 +131,15 @@ _ITUNES_DATE_FORMATS = (
 )
 
 
+# Columns of the output CSV, in order
+FIELDNAMES = CSV_COLUMNS
+
+# Extra columns of a shard's partial output, used to merge shards deterministically.
+# Developer apps (fan-out) are ordered as (feed count + Feed Index, Feed Rank) of the
+# accepted app that led to them, so they rank after every feed app on every shard.
+SHARD_FIELDNAMES = ['Feed Index', 'Feed Rank', 'App ID']
+
+
 def _parse_itunes_date(date_str: str):
     """Parse an iTunes API date string, handling all known Apple date formats."""
     if not date_str:
@@ -103,6 +154,157 @@ def _parse_itunes_date(date_str: str):
     return None
 
 
+def iter_csv_records(filename):
+    """
+    Yield (offset, length, row) for every complete data row of a CSV file, where
+    offset/length give the row's raw bytes. Rows may span several lines (quoted
+    newlines in descriptions); a truncated last row is skipped.
+    """
+    with open(filename, 'rb') as f:
+        header_line = f.readline()
+        fieldnames = next(csv.reader([header_line.decode('utf-8-sig')]))
+        offset = f.tell()
+        start, chunk = offset, b''
+        for line in iter(f.readline, b''):
+            if not chunk:
+                start = offset
+            chunk += line
+            offset += len(line)
+            # A row is complete once its quotes are balanced
+            if chunk.count(b'"') % 2 == 0:
+                row = next(csv.DictReader(io.StringIO(chunk.decode('utf-8'), newline=''), fieldnames=fieldnames))
+                yield start, len(chunk), row
+                chunk = b''
+
+
+class ExternalSortIndex:
+    def __init__(self, spool_file, run_size=None):
+        """
+        Compact (sort key, file offset) index over rows streamed to a CSV file.
+        At most run_size entries are held in memory; full runs are sorted and
+        spilled to temp files, and write_sorted() k-way merges them.
+        
+        :param spool_file: CSV file the indexed rows were appended to
+        :param run_size: Entries per in-memory run (uses CONFIG if None)
+        """
+        self.spool_file = spool_file
+        self.run_size = run_size or CONFIG['SORT_RUN_SIZE']
+        self.entries = []
+        self.run_files = []
+        self.count = 0
+    
+    def add(self, sort_key, offset, length):
+        """Index one row; ties on sort_key keep insertion order (stable sort)"""
+        self.entries.append((sort_key, self.count, offset, length))
+        self.count += 1
+        if len(self.entries) >= self.run_size:
+            self._spill()
+    
+    def _spill(self):
+        self.entries.sort()
+        fd, path = tempfile.mkstemp(prefix='appstore_sort_run_', suffix='.jsonl')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for entry in self.entries:
+                f.write(json.dumps(entry) + '\n')
+        self.run_files.append(path)
+        self.entries = []
+    
+    @staticmethod
+    def _read_run(path):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                yield tuple(json.loads(line))
+    
+    def write_sorted(self, filename, header):
+        """
+        Write header plus every indexed row, sorted, to filename
+        (filename may be the spool file itself; it is replaced atomically)
+        """
+        self.entries.sort()
+        runs = [self._read_run(path) for path in self.run_files] + [iter(self.entries)]
+        tmp_file = filename + '.sorting'
+        try:
+            with open(self.spool_file, 'rb') as spool, open(tmp_file, 'wb') as out:
+                out.write(header)
+                for _, _, offset, length in heapq.merge(*runs):
+                    spool.seek(offset)
+                    out.write(spool.read(length))
+            os.replace(tmp_file, filename)
+        finally:
+            for path in self.run_files:
+                os.remove(path)
+            self.run_files = []
+            self.entries = []
+
+
+class RunCheckpoint:
+    def __init__(self, output_file, params):
+        """
+        Progress of one search_all_categories run, saved next to its output file
+        
+        :param output_file: Output CSV of the run
+        :param params: JSON-serialisable run parameters; a checkpoint only resumes the same run
+        """
+        self.path = output_file + '.checkpoint.json'
+        self.params = params
+        self.apps = []          # [app_id, niche, feed index, rank, storefronts] in discovery order
+        self.processed = set()  # App IDs looked up (saved or not)
+        self.artists = {}       # Developers of accepted apps: artist id -> (feed index, rank, niche, storefront)
+        self.fanned_out = set() # Developers whose catalogue was looked up
+        self.unsaved = 0
+    
+    def load(self):
+        """Load the checkpoint; False if there is none or it belongs to a run with other parameters"""
+        if not os.path.exists(self.path):
+            print(f"⚠ No checkpoint at {self.path}, starting a fresh run")
+            return False
+        with open(self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data['params'] != json.loads(json.dumps(self.params)):
+            print(f"⚠ {self.path} is from a run with other parameters, starting a fresh run")
+            return False
+        self.apps = data['apps']
+        self.processed = set(data['processed'])
+        self.artists = {artist_id: tuple(found) for artist_id, *found in data.get('artists', [])}
+        self.fanned_out = set(data.get('fanned_out', []))
+        return True
+    
+    def discovered(self):
+        """(app_id -> niche, app_id -> (feed index, rank), app_id -> storefronts), as in discovery"""
+        app_id_to_category, app_id_to_order, storefronts = {}, {}, {}
+        for app_id, niche, feed_index, rank, countries in self.apps:
+            app_id_to_category[app_id] = niche
+            app_id_to_order[app_id] = (feed_index, rank)
+            storefronts[app_id] = countries
+        return app_id_to_category, app_id_to_order, storefronts
+    
+    def set_discovered(self, app_id_to_category, app_id_to_order, storefronts):
+        self.apps = [[app_id, niche, *app_id_to_order[app_id], storefronts.get(app_id, [])]
+                     for app_id, niche in app_id_to_category.items()]
+        self.processed = set()
+    
+    def mark(self, app_id):
+        """Record a processed app; the checkpoint is saved every CHECKPOINT_EVERY apps"""
+        self.processed.add(app_id)
+        self.unsaved += 1
+        if self.unsaved >= CONFIG['CHECKPOINT_EVERY']:
+            self.save()
+    
+    def save(self):
+        with open(self.path + '.part', 'w', encoding='utf-8') as f:
+            json.dump({'params': self.params, 'apps': self.apps, 'processed': sorted(self.processed),
+                       'artists': [[artist_id, *found] for artist_id, found in self.artists.items()],
+                       'fanned_out': sorted(self.fanned_out)},
+                      f, separators=(',', ':'))
+        os.replace(self.path + '.part', self.path)
+        self.unsaved = 0
+    
+    def remove(self):
+        """Drop the checkpoint of a finished run"""
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
 class AppStoreSearcher:
     def __init__(self, days_threshold=None):
         """
@@ -119,13 +321,36 @@ class AppStoreSearcher:
         self.filter_by_date = CONFIG['FILTER_BY_RELEASE_DATE']
         self.days_threshold = days_threshold if days_threshold is not None else CONFIG['DAYS_THRESHOLD']
         self.cutoff_date = datetime.now() - timedelta(days=self.days_threshold)
-        self.all_apps = {}  # Use dict to avoid duplicates (key: app_id)
+        self.apps_found = 0
+        self.sort_index = None  # ExternalSortIndex over the rows streamed to disk
+        self.rate_controller = AdaptiveRateController(CONFIG['RATE_LIMIT'])
+        self.archive = RawArchive('app_store') if CONFIG['ARCHIVE_RAW_RESPONSES'] else None
+        self.retry_queue = None  # RetryQueue of the current search_all_categories run
+        self.accepted_artists = {}  # Developers of accepted apps: artist id -> (feed index, rank, niche, storefront)
+        self.app_order = {}         # app id -> (feed index, rank) of the run's apps, see _record_from_lookup
+        self.fanned_out = set()     # Developers whose catalogue was looked up
+        self.profiler = RunProfiler('app_store')  # Off unless SCRAPER_PROFILE is set
     
-    def estimate_install_count(self, review_count):
+    def _get(self, url, **kwargs):
+        """GET a URL, paced and tuned by the adaptive rate controller"""
+        self.rate_controller.wait(url)
+        start = time.monotonic()
+        try:
+            response = requests.get(url, headers=self.headers, **kwargs)
+        except requests.RequestException:
+            self.rate_controller.record(url, latency=time.monotonic() - start, failed=True)
+            raise
+        self.rate_controller.record(url, response.status_code, time.monotonic() - start)
+        return response
+    
+    def estimate_install_count(self, review_count, app_id=None):
         """
         Estimate install count based on review count.
-        Returns a single random number within the estimated range.
+        Returns a single random number within the estimated range, seeded by
+        (app_id, review_count) so an unchanged app gets the same estimate every run.
         """
+        rng = random.Random(f"{app_id}:{review_count}")
+
         def fmt(n):
             if n >= 1_000_000:
                 return f"{n/1_000_000:.1f}M".replace('.0M', 'M')
@@ -134,21 +359,21 @@ class AppStoreSearcher:
             return str(n)
 
         if review_count <= 10:
-            return fmt(random.randint(500, 1_200))
+            return fmt(rng.randint(500, 1_200))
         elif review_count <= 50:
-            return fmt(random.randint(1_200, 6_000))
+            return fmt(rng.randint(1_200, 6_000))
         elif review_count <= 200:
-            return fmt(random.randint(6_000, 24_000))
+            return fmt(rng.randint(6_000, 24_000))
         elif review_count <= 1000:
-            return fmt(random.randint(24_000, 120_000))
+            return fmt(rng.randint(24_000, 120_000))
         elif review_count <= 5000:
-            return fmt(random.randint(120_000, 600_000))
+            return fmt(rng.randint(120_000, 600_000))
         elif review_count <= 20000:
-            return fmt(random.randint(600_000, 2_400_000))
+            return fmt(rng.randint(600_000, 2_400_000))
         elif review_count <= 100000:
-            return fmt(random.randint(2_400_000, 12_000_000))
+            return fmt(rng.randint(2_400_000, 12_000_000))
         else:
-            return fmt(random.randint(12_000_000, 50_000_000))
+            return fmt(rng.randint(12_000_000, 50_000_000))
         
     def search_by_category(self, category_id, country='us', limit=200):
         """
@@ -164,7 +389,7 @@ class AppStoreSearcher:
         url = url.replace('limit=200', f'limit={limit}')
         
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self._get(url)
             response.raise_for_status()
             
             data = response.json()
@@ -186,18 +411,29 @@ class AppStoreSearcher:
             print(f"Error parsing response for category {category_id} in {country}: {e}")
             return []
 
-    def _get_screenshots_from_page(self, app_id):
+    def _fetch_app_page(self, app_id, country='us'):
+        """Fetch the App Store web page of an app (archived when raw capture is on)"""
+        try:
+            url = f'https://apps.apple.com/{country}/app/id{app_id}'
+            page_resp = self._get(url, timeout=15)
+            if page_resp.status_code != 200:
+                return None
+        except requests.RequestException:
+            return None
+        if self.archive is not None:
+            self.archive.save(app_id, 'page', page_resp.text, url=url)
+        return page_resp.text
+
+    def _get_screenshots_from_page(self, page_html):
         """
-        Fallback: fetch the App Store web page and extract screenshot URLs
-        from the embedded serialized-server-data JSON when the iTunes API
-        returns an empty screenshotUrls list.
+        Fallback: extract screenshot URLs from the App Store web page's
+        embedded serialized-server-data JSON when the iTunes API returns
+        an empty screenshotUrls list.
         """
+        if not page_html:
+            return []
         try:
-            url = f'https://apps.apple.com/us/app/id{app_id}'
-            page_resp = requests.get(url, headers=self.headers, timeout=15)
-            if page_resp.status_code != 200:
-                return []
-            soup_page = BeautifulSoup(page_resp.text, 'html.parser')
+            soup_page = BeautifulSoup(page_html, 'html.parser')
             tag = soup_page.find('script', id='serialized-server-data')
             if not tag or not tag.string:
                 return []
@@ -243,20 +479,229 @@ class AppStoreSearcher:
         except Exception:
             return []
 
-    def get_app_metadata(self, app_id):
+    def get_app_metadata(self, app_id, niche=None, countries=None):
         """
         Retrieve detailed metadata for a specific app
         
+        Transient failures (timeouts, 429/5xx) are parked in the retry queue.
+        
         :param app_id: App ID to fetch
-        :return: Dictionary with app metadata or None
+        :param niche: Category the app was found in (recorded in the raw archive and retry queue)
+        :param countries: Storefronts to look the app up in, in order (US if None)
+        :return: AppRecord or None
+        """
+        try:
+            return self.fetch_app_metadata(app_id, niche, countries)
+        except Exception as e:
+            print(f"Error fetching metadata for app {app_id}: {e}")
+            if self.retry_queue is not None and is_transient(e):
+                self.retry_queue.record(str(app_id), {'app_id': app_id, 'niche': niche, 'countries': countries}, e)
+            return None
+    
+    def fetch_app_metadata(self, app_id, niche=None, countries=None):
+        """Like get_app_metadata(), but request failures are raised"""
+        countries = countries or ['us']
+        for country in countries:
+            info = self.lookup_batch([app_id], country).get(int(app_id))
+            if info is not None:
+                return self._record_from_lookup(app_id, info, country, niche)
+        print(f"No app found with ID {app_id} in {', '.join(c.upper() for c in countries)}")
+        return None
+    
+    def lookup_batch(self, app_ids, country='us'):
+        """
+        Look several apps up in one storefront with a single request
+        
+        :param app_ids: App IDs (at most LOOKUP_BATCH_SIZE)
+        :param country: Storefront to look them up in
+        :return: app id -> lookup result; apps the storefront does not carry are missing
+        """
+        url = f"{self.lookup_url}?id={','.join(str(app_id) for app_id in app_ids)}&country={country}"
+        response = self._get(url, timeout=30)
+        response.raise_for_status()
+        return {info['trackId']: info for info in response.json().get('results', []) if 'trackId' in info}
+    
+    def _record_from_lookup(self, app_id, info, country, niche=None):
+        """Archive one app's lookup result and turn it into an AppRecord (None if filtered out)"""
+        app_data = {'resultCount': 1, 'results': [info]}
+        if self.archive is not None:
+            self.archive.save(app_id, 'lookup', json.dumps(app_data, ensure_ascii=False),
+                              url=f"{self.lookup_url}?id={app_id}&country={country}", niche=niche, country=country)
+        record = self.parse_app_metadata(app_data, app_id, lambda: self._fetch_app_page(app_id, country))
+        order = self.app_order.get(app_id)
+        if record is not None and info.get('artistId') and order is not None:
+            # A developer goes with its earliest accepted app in feed order, whichever was
+            # looked up first, so the fan-out does not depend on processing order or sharding
+            found = self.accepted_artists.get(info['artistId'])
+            if found is None or tuple(order) < found[:2]:
+                self.accepted_artists[info['artistId']] = (*order, niche, country)
+        return record
+    
+    def lookup_developer_apps(self, artist_ids, country='us'):
+        """
+        The apps of several developers with a single request
+        
+        :param artist_ids: Developer (artist) IDs (at most ARTIST_BATCH_SIZE)
+        :param country: Storefront to look them up in
+        :return: Lookup results of the developers' apps, as returned for app lookups
+        """
+        url = (f"{self.lookup_url}?id={','.join(str(artist_id) for artist_id in artist_ids)}"
+               f"&entity=software&limit=200&country={country}")
+        response = self._get(url, timeout=30)
+        response.raise_for_status()
+        return [info for info in response.json().get('results', [])
+                if info.get('wrapperType') == 'software' and 'trackId' in info]
+    
+    def fan_out_developers(self, known_ids, handle, feed_count, should_stop=None, on_request=None):
+        """
+        Developer fan-out: look up the catalogues of the developers of accepted apps,
+        ARTIST_BATCH_SIZE developers per request, and pass their unseen apps to the
+        metadata stage. The catalogue entries are full lookup results, so no further
+        request is needed per app. Developers are taken in the feed order of their
+        earliest accepted app, and a developer app takes that app's niche and is
+        ordered as (feed_count + its feed index, its rank) in app_order.
+        
+        A developer counts as fanned out only once its request succeeded; one that
+        keeps failing is given up after FANOUT_ATTEMPTS requests (a resumed or later
+        run tries it again).
+        
+        :param known_ids: App IDs already discovered (skipped); the new ones are added
+        :param handle: Called as handle(app_id, niche, record or None) once per new app
+        :param feed_count: Number of feeds of the run
+        :param should_stop: Optional callable; no new request is made once it returns True
+        :param on_request: Optional callable, called as on_request(apps) after each request
+        :return: Number of new apps
+        """
+        batch_size = CONFIG['ARTIST_BATCH_SIZE']
+        new_apps = requests_made = 0
+        attempts = defaultdict(int)
+        # Developers of apps accepted here are fanned out too, and failed requests are
+        # made again, until no developer is left to try
+        while True:
+            by_country = defaultdict(list)
+            for artist_id, (_, _, _, country) in sorted(self.accepted_artists.items(), key=lambda item: item[1][:2]):
+                if artist_id not in self.fanned_out and attempts[artist_id] < CONFIG['FANOUT_ATTEMPTS']:
+                    by_country[country].append(artist_id)
+            if not by_country:
+                break
+            for country, artist_ids in by_country.items():
+                for i in range(0, len(artist_ids), batch_size):
+                    if should_stop and should_stop():
+                        return new_apps
+                    batch = artist_ids[i:i + batch_size]
+                    print(f"Looking up the apps of {len(batch)} developers in {country.upper()}")
+                    requests_made += 1
+                    try:
+                        results = self.lookup_developer_apps(batch, country)
+                    except Exception as e:
+                        print(f"Error looking up developers in {country.upper()}: {e}")
+                        results = None
+                    if on_request is not None:
+                        on_request(1 if results is None else len(results))
+                    if results is None:
+                        for artist_id in batch:
+                            attempts[artist_id] += 1
+                        continue
+                    self.fanned_out.update(batch)
+                    for info in results:
+                        app_id = info['trackId']
+                        if app_id in known_ids:
+                            continue
+                        known_ids.add(app_id)
+                        new_apps += 1
+                        feed_index, rank, niche, _ = self.accepted_artists.get(info.get('artistId'),
+                                                                               self.accepted_artists[batch[0]])
+                        self.app_order[app_id] = (feed_count + feed_index, rank)
+                        handle(app_id, niche, self._record_from_lookup(app_id, info, country, niche))
+        given_up = sum(1 for artist_id in self.accepted_artists if artist_id not in self.fanned_out)
+        print(f"✓ Developer fan-out: {new_apps} new apps from {len(self.fanned_out)} developers "
+              f"in {requests_made} requests")
+        if given_up:
+            print(f"⚠ Gave up on {given_up} developers after {CONFIG['FANOUT_ATTEMPTS']} failed requests")
+        return new_apps
+    
+    def lookup_in_batches(self, items, storefronts, handle, should_stop=None, on_failure=None, on_request=None):
+        """
+        Look apps up in per-storefront batches; an app missing from its first storefront
+        is queued for the next one it was seen in, so no request is spent on a known miss
+        
+        Transient failures park the whole batch in the retry queue.
+        
+        :param items: (app_id, niche) pairs, in the order to look them up
+        :param storefronts: app id -> storefronts it was seen in, first choice first
+        :param handle: Called as handle(app_id, niche, record or None) once per finished app
+        :param should_stop: Optional callable; no new batch is requested once it returns True
+        :param on_failure: Optional callable, called as on_failure(app_id, niche, error) for
+                           transient failures instead of parking them in the retry queue
+        :param on_request: Optional callable, called as on_request(apps) after each lookup request
+        """
+        batch_size = CONFIG['LOOKUP_BATCH_SIZE']
+        pending = defaultdict(list)  # storefront -> [(app_id, niche, index in the app's storefronts)]
+        total = len(items)
+        finished = 0
+        
+        def flush(country):
+            nonlocal finished
+            batch = pending[country][:batch_size]
+            del pending[country][:batch_size]
+            if not pending[country]:
+                del pending[country]
+            print(f"[{finished}/{total}] Looking up {len(batch)} apps in {country.upper()}")
+            try:
+                results = self.lookup_batch([app_id for app_id, _, _ in batch], country)
+            except Exception as e:
+                if on_request is not None:
+                    on_request(len(batch))
+                print(f"Error looking up {len(batch)} apps in {country.upper()}: {e}")
+                for app_id, niche, _ in batch:
+                    if on_failure is not None and is_transient(e):
+                        on_failure(app_id, niche, e)
+                    elif self.retry_queue is not None and is_transient(e):
+                        self.retry_queue.record(str(app_id), {'app_id': app_id, 'niche': niche,
+                                                              'countries': storefronts.get(app_id)}, e)
+                    finished += 1
+                    handle(app_id, niche, None)
+                return
+            if on_request is not None:
+                on_request(len(batch))
+            for app_id, niche, position in batch:
+                info = results.get(int(app_id))
+                countries = storefronts.get(app_id) or ['us']
+                if info is None and position + 1 < len(countries):
+                    pending[countries[position + 1]].append((app_id, niche, position + 1))
+                    continue
+                if info is None:
+                    print(f"No app found with ID {app_id} in {', '.join(c.upper() for c in countries)}")
+                    record = None
+                else:
+                    record = self._record_from_lookup(app_id, info, country, niche)
+                finished += 1
+                handle(app_id, niche, record)
+        
+        for app_id, niche in items:
+            country = (storefronts.get(app_id) or ['us'])[0]
+            pending[country].append((app_id, niche, 0))
+            if len(pending[country]) >= batch_size:
+                if should_stop and should_stop():
+                    return
+                flush(country)
+        # Partial batches, then the fallbacks they queue
+        while pending:
+            if should_stop and should_stop():
+                return
+            flush(max(pending, key=lambda country: len(pending[country])))
+    
+    def parse_app_metadata(self, app_data, app_id, fetch_page):
+        """
+        Turn an iTunes lookup response into an AppRecord
+        
+        :param app_data: Parsed lookup JSON
+        :param app_id: App ID the lookup was for
+        :param fetch_page: Callable returning the app's web page HTML (or None), only
+                           called when the lookup has no screenshots
+        :return: AppRecord or None
         """
         try:
-            url = f'{self.lookup_url}?id={app_id}'
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            app_data = response.json()
-            
             if app_data['resultCount'] == 0:
                 print(f"No app found with ID {app_id}")
                 return None
@@ -301,159 +746,526 @@ class AppStoreSearcher:
             else:
                 formatted_review_count = str(review_count)
             
-            # Prepare metadata dictionary (simplified fields only)
+            # Prepare the app record (simplified fields only)
             description = app_info.get('description', '')
             keywords = extract_keywords_from_description(description)
             
             # Extract up to 4 screenshots (prefer iPhone, fallback to iPad, then page scrape)
             screenshot_urls = app_info.get('screenshotUrls', []) or app_info.get('ipadScreenshotUrls', [])
             if not screenshot_urls:
-                screenshot_urls = self._get_screenshots_from_page(app_id)
-            screenshots = screenshot_urls[:4]
-            while len(screenshots) < 4:
-                screenshots.append('N/A')
+                screenshot_urls = self._get_screenshots_from_page(fetch_page())
             
-            metadata = {
-                'Niche': app_info.get('primaryGenreName', ''),
-                'App Name': app_info.get('trackName', ''),
-                'Logo URL': app_info.get('artworkUrl512', app_info.get('artworkUrl100', '')),
-                'Install Count': self.estimate_install_count(review_count),
-                'Release Date': release_date.strftime('%B %d, %Y'),
-                'Rating': formatted_rating,
-                'Review Count': formatted_review_count,
-                'App Link': app_info.get('trackViewUrl', ''),
-                'Developer': app_info.get('artistName', ''),
-                'Description': description,
-                'Keywords': keywords,
-                'Screenshot 1': screenshots[0],
-                'Screenshot 2': screenshots[1],
-                'Screenshot 3': screenshots[2],
-                'Screenshot 4': screenshots[3],
-            }
+            record = AppRecord(
+                niche=app_info.get('primaryGenreName', ''),
+                app_name=app_info.get('trackName', ''),
+                logo_url=app_info.get('artworkUrl512', app_info.get('artworkUrl100', '')),
+                install_count=self.estimate_install_count(review_count, app_id),
+                release_date=release_date.strftime('%B %d, %Y'),
+                rating=formatted_rating,
+                review_count=formatted_review_count,
+                app_link=app_info.get('trackViewUrl', ''),
+                developer=app_info.get('artistName', ''),
+                description=description,
+                keywords=keywords,
+                screenshots=screenshot_urls,
+                rating_value=float(formatted_rating),
+                reviews=review_count,
+                released=release_date.date(),
+            )
             
-            print(f"✓ App {app_id}: {metadata['App Name']} - Released {days_since_release} days ago")
-            return metadata
+            print(f"✓ App {app_id}: {record.app_name} - Released {days_since_release} days ago")
+            return record
         
         except Exception as e:
-            print(f"Error fetching metadata for app {app_id}: {e}")
+            print(f"Error parsing metadata for app {app_id}: {e}")
             return None
     
-    def search_all_categories(self, categories=None, countries=None, output_file='app_store_apps.csv'):
+    def search_all_categories(self, categories=None, countries=None, output_file='app_store_apps.csv',
+                              shard_index=0, shard_count=1, resume=False):
         """
         Search apps across multiple categories and countries and save immediately
         
+        Progress is checkpointed next to output_file, so an interrupted run can be resumed.
+        
         :param categories: List of category names (uses all if None)
         :param countries: List of country codes (uses default if None)
         :param output_file: Filename to save results to incrementally
+        :param shard_index: Index of this shard (0-based, only used if shard_count > 1)
+        :param shard_count: Number of shards the (category, country) feeds are split into.
+                            With more than one shard, output_file is a partial output that
+                            carries the feed order columns needed by merge_shards()
+        :param resume: Continue the interrupted run of the same parameters from its checkpoint:
+                       skip discovery and the apps already processed, append to output_file
         """
         if categories is None:
             categories = list(CATEGORIES.keys())
         if countries is None:
             countries = COUNTRIES
+        feeds = self._feed_list(categories, countries)
+        
+        sharded = shard_count > 1
+        if sharded:
+            # Contiguous slices keep most of a category's countries on one shard,
+            # so the same top apps are rarely looked up by several shards
+            start = len(feeds) * shard_index // shard_count
+            end = len(feeds) * (shard_index + 1) // shard_count
+        else:
+            start, end = 0, len(feeds)
+        
+        checkpoint = RunCheckpoint(output_file, {
+            'feeds': feeds[start:end],
+            'shard': [shard_index, shard_count],
+            'days_threshold': self.days_threshold,
+        })
+        resumed = resume and os.path.exists(output_file) and checkpoint.load()
         
         # Collect all unique app IDs first
         print(f"\n{'='*70}")
         print(f"PHASE 1: Searching for apps in {len(categories)} categories across {len(countries)} countries")
+        if sharded:
+            print(f"Shard {shard_index + 1}/{shard_count}: feeds {start + 1}-{end} of {len(feeds)}")
         print(f"{'='*70}\n")
         
-        # Map app_id -> category_name so we can stamp the correct niche later
-        app_id_to_category = {}
+        self.accepted_artists = checkpoint.artists
+        self.fanned_out = checkpoint.fanned_out
+        if resumed:
+            app_id_to_category, app_id_to_order, storefronts = checkpoint.discovered()
+            print(f"↻ Resuming from {checkpoint.path}: {len(app_id_to_category)} apps discovered, "
+                  f"{len(checkpoint.processed)} processed")
+        else:
+            with self.profiler.phase('discovery'):
+                app_id_to_category, app_id_to_order, storefronts = self._discover(feeds, start, end, countries)
+            checkpoint.set_discovered(app_id_to_category, app_id_to_order, storefronts)
+            checkpoint.save()
+        # Developer apps found by the fan-out are added to it
+        self.app_order = app_id_to_order
+        
+        print(f"\n{'='*70}")
+        print(f"PHASE 2: Fetching metadata for {len(app_id_to_category)} unique apps")
+        print(f"Filtering for apps released within the last {self.days_threshold} days")
+        print(f"Saving results immediately to {output_file}")
+        print(f"{'='*70}\n")
+        
+        # Define fields and write header (the shared AppRecord CSV columns)
+        fieldnames = list(FIELDNAMES)
+        if sharded:
+            fieldnames += SHARD_FIELDNAMES
+        
+        if resumed:
+            # Apps saved after the last checkpoint are in the output already
+            checkpoint.processed |= self._resume_output(output_file, sharded)
+            print(f"↻ {self.apps_found} apps already saved in {output_file}")
+        else:
+            # Initialize file with headers
+            with open(output_file, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
+                writer.writeheader()
+            
+            # Rows stay on disk; only a (name, offset) index is kept for the final sort.
+            # Partial shard outputs are merged and sorted by merge_shards() instead.
+            self.sort_index = None if sharded else ExternalSortIndex(output_file)
+            self.apps_found = 0
+        
+        pending = [(app_id, niche_name) for app_id, niche_name in app_id_to_category.items()
+                   if app_id not in checkpoint.processed]
+        
+        # Transient failures are parked and replayed after the main loop
+        pipeline = f"app_store.shard-{shard_index}-of-{shard_count}" if sharded else 'app_store'
+        self.retry_queue = RetryQueue(pipeline)
+        for app_id, _ in pending:
+            self.retry_queue.discard(str(app_id))  # Fetched again below anyway
+        
+        def save_record(app_id, niche_name, record):
+            # Use the category we searched, not primaryGenreName, so niche names match Play Store
+            record.niche = niche_name
+            row = record.to_row()
+            if sharded:
+                # Apps carried over from an earlier run rank after every feed and developer app of this one
+                feed_index, rank = app_id_to_order.get(app_id, (2 * len(feeds), 0))
+                row.update({'Feed Index': feed_index, 'Feed Rank': rank, 'App ID': app_id})
+            # Save immediately to CSV
+            try:
+                with self.profiler.phase('write'):
+                    self._append_row(output_file, row, fieldnames)
+                self.apps_found += 1
+            except Exception as e:
+                print(f"Error saving app {app_id} to CSV: {e}")
+        
+        # Unseen apps first, then the stalest; stop before the run's time budget runs out.
+        # Output order does not depend on this: rows are sorted (or merged) at the end.
+        scheduler = DeadlineScheduler(pipeline)
+        work = scheduler.order(pending, key=lambda item: str(item[0]), niche=lambda item: item[1])
+        
+        def handle(app_id, niche_name, record):
+            # Throughput is counted per lookup request (on_request), not per app
+            scheduler.done(str(app_id), niche_name, accepted=record is not None, tick=False)
+            if record:
+                save_record(app_id, niche_name, record)
+            checkpoint.mark(app_id)
         
+        def replay(payload):
+            record = self.fetch_app_metadata(payload['app_id'], payload['niche'], payload.get('countries'))
+            if record:
+                save_record(payload['app_id'], payload['niche'], record)
+        
+        complete = False
+        try:
+            # Fetch metadata for the unique app IDs, in batched lookups per storefront
+            with self.profiler.phase('metadata'):
+                self.lookup_in_batches(work, storefronts, handle, should_stop=scheduler.should_stop,
+                                       on_request=scheduler.tick)
+            
+            if CONFIG['DEVELOPER_FANOUT']:
+                print(f"\nDeveloper fan-out: catalogues of {len(self.accepted_artists)} developers of accepted apps")
+                with self.profiler.phase('metadata'):
+                    self.fan_out_developers(set(app_id_to_category) | checkpoint.processed, handle, len(feeds),
+                                            should_stop=scheduler.should_stop, on_request=scheduler.tick)
+            
+            if len(self.retry_queue):
+                print(f"\nRetrying {len(self.retry_queue)} apps that failed transiently...")
+                with self.profiler.phase('metadata'):
+                    self.retry_queue.replay(replay, deadline=scheduler.deadline)
+            # Transient failures count as processed: the retry queue carries them over
+            complete = not scheduler.stopped_early
+        finally:
+            if complete:
+                checkpoint.remove()
+            else:
+                # Interrupted or stopped at the deadline: keep what is needed to resume
+                checkpoint.save()
+                self.retry_queue.save()
+                print(f"↻ Progress saved to {checkpoint.path}; continue with --resume")
+        
+        print(f"\n{'='*70}")
+        print(f"✓ Found {self.apps_found} apps released within the last {self.days_threshold} days")
+        print(f"✓ All items saved to {output_file}")
+        self.rate_controller.summary()
+        self.retry_queue.summary()
+        scheduler.summary()
+        scheduler.save()
+        print(f"{'='*70}\n")
+    
+    def _feed_list(self, categories, countries):
+        """
+        Every (category, country) feed in a fixed, category-major order. The position
+        of a feed in this list decides which niche an app seen in several feeds gets.
+        """
+        feeds = []
         for category_name in categories:
             if category_name not in CATEGORIES:
                 print(f"⚠ Warning: Unknown category '{category_name}', skipping...")
                 continue
-                
-            category_id = CATEGORIES[category_name]
-            print(f"\n📂 Searching category: {category_name} (ID: {category_id})")
-            
             for country in countries:
-                print(f"  → Country: {country.upper()}", end=' ')
-                app_ids = self.search_by_category(category_id, country)
-                new_ids = 0
-                for aid in app_ids:
-                    if aid not in app_id_to_category:
-                        app_id_to_category[aid] = category_name
-                        new_ids += 1
-                print(f"({len(app_ids)} found, {new_ids} new)")
-                time.sleep(0.5)  # Rate limiting
+                feeds.append((category_name, country))
+        return feeds
+    
+    def search_from_queue(self, queue, categories=None, countries=None, output_file='app_store_apps.csv'):
+        """
+        Work on a job shared with other runners through a work queue (work_queue.py)
+        
+        Every runner adds all (category, country) feeds. Feeds are leased one at a time and
+        their apps added as lookup units; an app seen in several feeds keeps its first sighting
+        in feed order. Once every feed is done, lookups are leased LOOKUP_BATCH_SIZE at a time.
+        Rows carry the feed order columns like a shard's partial output: combine the workers'
+        files with merge_shards().
+        
+        :param queue: WorkQueue shared by the runners
+        :param categories: List of category names (uses all if None)
+        :param countries: List of country codes (uses default if None)
+        :param output_file: This worker's partial output
+        """
+        if categories is None:
+            categories = list(CATEGORIES.keys())
+        if countries is None:
+            countries = COUNTRIES
+        feeds = self._feed_list(categories, countries)
+        queue.add('feed', [(f"{category_name}:{country}", {'index': index}, index)
+                           for index, (category_name, country) in enumerate(feeds)])
+        
+        # Deadline only: the queue decides the order
+        scheduler = DeadlineScheduler('app_store.queue')
         
         print(f"\n{'='*70}")
-        print(f"PHASE 2: Fetching metadata for {len(app_id_to_category)} unique apps")
-        print(f"Filtering for apps released within the last {self.days_threshold} days")
-        print(f"Saving results immediately to {output_file}")
+        print(f"PHASE 1: Searching {len(feeds)} feeds shared through {queue.path} (worker {queue.worker})")
         print(f"{'='*70}\n")
         
-        # Define fields and write header (use keys from get_app_metadata to ensure consistency)
-        fieldnames = ['Niche', 'App Name', 'Logo URL', 'Install Count', 'Release Date', 'Rating', 'Review Count', 'App Link', 'Developer', 'Description', 'Keywords', 'Screenshot 1', 'Screenshot 2', 'Screenshot 3', 'Screenshot 4']
+        with self.profiler.phase('discovery'):
+            for batch in queue.drain('feed', 1, should_stop=scheduler.should_stop):
+                for key, payload in batch:
+                    feed_index = payload['index']
+                    category_name, country = feeds[feed_index]
+                    print(f"  → {category_name} / {country.upper()}", end=' ')
+                    app_ids = self.search_by_category(CATEGORIES[category_name], country)
+                    # Feeds list at most 200 apps, so the priority orders by (feed index, rank)
+                    queue.add('lookup', [(app_id, {'niche': category_name, 'feed_index': feed_index,
+                                                   'rank': rank, 'country': country}, feed_index * 1000 + rank)
+                                         for rank, app_id in enumerate(app_ids)])
+                    print(f"({len(app_ids)} found)")
+                queue.complete('feed', [key for key, _ in batch])
         
-        # Initialize file with headers
+        print(f"\n{'='*70}")
+        print(f"PHASE 2: Fetching metadata for {queue.counts('lookup')['pending']} pending apps")
+        print(f"Saving results immediately to {output_file}")
+        print(f"{'='*70}\n")
+        
+        fieldnames = list(FIELDNAMES) + SHARD_FIELDNAMES
         with open(output_file, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-        
-        # Fetch metadata for each unique app ID
-        total = len(app_id_to_category)
-        for i, (app_id, niche_name) in enumerate(app_id_to_category.items(), 1):
-            print(f"[{i}/{total}] ", end='')
-            metadata = self.get_app_metadata(app_id)
-            
-            if metadata:
-                # Use the category we searched, not primaryGenreName, so niche names match Play Store
-                metadata['Niche'] = niche_name
-                self.all_apps[app_id] = metadata
-                # Save immediately to CSV
+            csv.DictWriter(f, fieldnames=fieldnames).writeheader()
+        self.sort_index = None
+        self.apps_found = 0
+        
+        def handle(app_id, niche_name, record):
+            scheduler.done(str(app_id), niche_name, accepted=record is not None, tick=False)
+            finished.add(app_id)
+            if record:
+                payload = payloads[app_id]
+                record.niche = niche_name
+                row = record.to_row()
+                row.update({'Feed Index': payload['feed_index'], 'Feed Rank': payload['rank'], 'App ID': app_id})
                 try:
-                    with open(output_file, 'a', newline='', encoding='utf-8') as f:
-                        writer = csv.DictWriter(f, fieldnames=fieldnames)
-                        writer.writerow(metadata)
+                    with self.profiler.phase('write'):
+                        self._append_row(output_file, row, fieldnames)
+                    self.apps_found += 1
                 except Exception as e:
                     print(f"Error saving app {app_id} to CSV: {e}")
-            
-            time.sleep(0.3)  # Rate limiting
+        
+        with self.profiler.phase('metadata'):
+            for batch in queue.drain('lookup', CONFIG['LOOKUP_BATCH_SIZE'], should_stop=scheduler.should_stop):
+                payloads = {int(key): payload for key, payload in batch}
+                finished, failed = set(), set()
+                try:
+                    self.lookup_in_batches([(app_id, payload['niche']) for app_id, payload in payloads.items()],
+                                           {app_id: [payload['country']] for app_id, payload in payloads.items()},
+                                           handle, should_stop=scheduler.should_stop, on_request=scheduler.tick,
+                                           on_failure=lambda app_id, niche, e: failed.add(app_id))
+                finally:
+                    # Transient failures go back to the queue; apps not reached (deadline) are handed back
+                    queue.fail('lookup', failed)
+                    queue.complete('lookup', finished - failed)
+                    queue.release('lookup', set(payloads) - finished)
         
         print(f"\n{'='*70}")
-        print(f"✓ Found {len(self.all_apps)} apps released within the last {self.days_threshold} days")
-        print(f"✓ All items saved to {output_file}")
+        print(f"✓ Found {self.apps_found} apps released within the last {self.days_threshold} days")
+        print(f"✓ Saved to {output_file}")
+        self.rate_controller.summary()
+        scheduler.summary()
+        counts = queue.counts()
+        for kind in ('feed', 'lookup'):
+            state = counts.get(kind, {})
+            print(f"[Queue] {kind}: {state.get('done', 0)} done, {state.get('failed', 0)} failed, "
+                  f"{state.get('pending', 0) + state.get('leased', 0)} left")
         print(f"{'='*70}\n")
     
+    def _discover(self, feeds, start, end, countries):
+        """
+        Read the RSS feeds feeds[start:end]
+        
+        :return: (app_id -> niche of the first sighting, app_id -> (feed index, rank in feed)
+                 of the first sighting, app_id -> storefronts that listed it in `countries` order)
+        """
+        # Map app_id -> category_name so we can stamp the correct niche later
+        app_id_to_category = {}
+        # Map app_id -> (feed index, rank in feed) of the first sighting
+        app_id_to_order = {}
+        # Map app_id -> storefronts whose feeds listed it (a lookup elsewhere may miss it)
+        app_id_to_countries = defaultdict(set)
+        
+        current_category = None
+        for feed_index in range(start, end):
+            category_name, country = feeds[feed_index]
+            category_id = CATEGORIES[category_name]
+            if category_name != current_category:
+                current_category = category_name
+                print(f"\n📂 Searching category: {category_name} (ID: {category_id})")
+            
+            print(f"  → Country: {country.upper()}", end=' ')
+            app_ids = self.search_by_category(category_id, country)
+            new_ids = 0
+            for rank, aid in enumerate(app_ids):
+                app_id_to_countries[aid].add(country)
+                if aid not in app_id_to_category:
+                    app_id_to_category[aid] = category_name
+                    app_id_to_order[aid] = (feed_index, rank)
+                    new_ids += 1
+            print(f"({len(app_ids)} found, {new_ids} new)")
+        
+        # Look each app up in the storefronts it was listed in, in `countries` order (US first by default)
+        storefronts = {aid: sorted(seen_in, key=countries.index) for aid, seen_in in app_id_to_countries.items()}
+        return app_id_to_category, app_id_to_order, storefronts
+    
+    def _resume_output(self, output_file, sharded):
+        """
+        Continue an interrupted run's output: drop a partially written last row and
+        rebuild the sort index from the complete rows
+        
+        :return: IDs of the apps already saved
+        """
+        with open(output_file, 'rb') as f:
+            end = len(f.readline())  # Header
+        self.sort_index = None if sharded else ExternalSortIndex(output_file)
+        self.apps_found = 0
+        saved_ids = set()
+        for offset, length, row in iter_csv_records(output_file):
+            if self.sort_index is not None:
+                self.sort_index.add(row['App Name'], offset, length)
+            app_id = row.get('App ID') or (app_id_from_link(row['App Link']) or '').split(':')[-1]
+            if app_id:
+                saved_ids.add(int(app_id))
+            self.apps_found += 1
+            end = offset + length
+        
+        size = os.path.getsize(output_file)
+        if size > end:
+            os.truncate(output_file, end)
+            print(f"↻ Dropped {size - end} bytes of a partially written row")
+        return saved_ids
+    
+    def reparse_archive(self, archive, output_file='app_store_apps.csv'):
+        """
+        Rebuild the rows from archived lookup responses, ready for save_to_csv() (no network)
+        
+        :param archive: RawArchive of the 'app_store' store
+        :param output_file: Filename the rows are streamed to before sorting
+        """
+        with open(output_file, 'w', newline='', encoding='utf-8') as f:
+            csv.DictWriter(f, fieldnames=FIELDNAMES).writeheader()
+        self.sort_index = ExternalSortIndex(output_file)
+        self.apps_found = 0
+        
+        for capture in archive.iter_latest('lookup'):
+            app_id = capture['app_id']
+            page = archive.load_latest(app_id, 'page')
+            record = self.parse_app_metadata(json.loads(capture['content']), app_id,
+                                             lambda: page and page['content'])
+            if record:
+                if capture.get('niche'):
+                    record.niche = capture['niche']
+                self._append_row(output_file, record.to_row(), FIELDNAMES)
+                self.apps_found += 1
+        print(f"✓ Reparsed {self.apps_found} apps from {archive.store_dir}")
+    
+    def _append_row(self, filename, row, fieldnames):
+        """Append one CSV row and record its byte range in the sort index"""
+        buffer = io.StringIO()
+        csv.DictWriter(buffer, fieldnames=fieldnames).writerow(row)
+        data = buffer.getvalue().encode('utf-8')
+        with open(filename, 'ab') as f:
+            offset = f.tell()
+            f.write(data)
+        if self.sort_index is not None:
+            self.sort_index.add(row['App Name'], offset, len(data))
+    
+    def merge_shards(self, partial_files, spool_file='app_store_apps.merge.csv'):
+        """
+        Combine the partial outputs of a sharded run, ready for save_to_csv().
+        
+        An app found by several shards keeps the row from its earliest feed (the same
+        first-seen niche rule as an unsharded run), and apps are ordered by first sighting,
+        so save_to_csv() writes the same file whatever the shard count was. Developer apps
+        found by several shards keep the row of their developer's earliest accepted app.
+        
+        :param partial_files: Partial CSV files written by sharded search_all_categories runs
+        :param spool_file: Scratch file the merged rows are streamed to before sorting
+        """
+        # Only (feed order, file, byte range) per app is kept, rows stay on disk
+        best = {}
+        for file_index, partial_file in enumerate(partial_files):
+            for offset, length, row in iter_csv_records(partial_file):
+                app_id = int(row['App ID'])
+                order = (int(row['Feed Index']), int(row['Feed Rank']))
+                if app_id not in best or order < best[app_id][0]:
+                    best[app_id] = (order, file_index, offset, length)
+            print(f"✓ Read {partial_file}")
+        
+        with open(spool_file, 'w', newline='', encoding='utf-8') as f:
+            csv.DictWriter(f, fieldnames=FIELDNAMES).writeheader()
+        self.sort_index = ExternalSortIndex(spool_file)
+        self.apps_found = 0
+        
+        handles = [open(partial_file, 'rb') for partial_file in partial_files]
+        try:
+            for _, file_index, offset, length in sorted(best.values()):
+                handle = handles[file_index]
+                handle.seek(offset)
+                raw = handle.read(length).decode('utf-8')
+                row = next(csv.DictReader(io.StringIO(raw, newline=''), fieldnames=FIELDNAMES + SHARD_FIELDNAMES))
+                self._append_row(spool_file, {key: row[key] for key in FIELDNAMES}, FIELDNAMES)
+                self.apps_found += 1
+        finally:
+            for handle in handles:
+                handle.close()
+        print(f"✓ Merged {self.apps_found} unique apps from {len(partial_files)} partial files")
+    
     def save_to_csv(self, filename='app_store_apps.csv'):
         """
-        Save app details to CSV
+        Save app details to CSV, sorted by app name (external merge sort of the streamed rows)
         
         :param filename: Output CSV filename
         """
-        if not self.all_apps:
+        if self.sort_index is None or not self.apps_found:
             print("No apps to save.")
             return
         
-        apps_list = list(self.all_apps.values())
-        
-        # Sort by app name alphabetically
-        apps_list.sort(key=lambda x: x['App Name'])
+        header = io.StringIO()
+        csv.DictWriter(header, fieldnames=FIELDNAMES).writeheader()
+        spool_file = self.sort_index.spool_file
+        self.sort_index.write_sorted(filename, header.getvalue().encode('utf-8'))
+        self.sort_index = None
+        if os.path.abspath(spool_file) != os.path.abspath(filename):
+            os.remove(spool_file)
         
-        keys = apps_list[0].keys()
-        
-        with open(filename, 'w', newline='', encoding='utf-8') as file:
-            dict_writer = csv.DictWriter(file, keys)
-            dict_writer.writeheader()
-            dict_writer.writerows(apps_list)
-        
-        print(f"✓ Saved {len(apps_list)} apps to {filename}")
+        print(f"✓ Saved {self.apps_found} apps to {filename}")
         
         # Print summary statistics
         print(f"\n{'='*70}")
         print("SUMMARY")
         print(f"{'='*70}")
-        print(f"Total apps found: {len(apps_list)}")
+        print(f"Total apps found: {self.apps_found}")
         print(f"Date range: Last {self.days_threshold} days")
         print(f"{'='*70}\n")
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Search the App Store by category and save recent apps to CSV")
+    parser.add_argument('--shard-index', type=int, default=0,
+                        help="Index of this shard (0-based), used with --shard-count")
+    parser.add_argument('--shard-count', type=int, default=1,
+                        help="Split the (category, country) feeds across this many shards and write a partial output")
+    parser.add_argument('--merge', nargs='+', metavar='PARTIAL_CSV',
+                        help="Merge partial outputs of a sharded run into the final CSV instead of scraping")
+    parser.add_argument('--output', default='app_store_apps.csv', help="Final output CSV")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue an interrupted run from its checkpoint (skips discovery and processed apps)")
+    parser.add_argument('--queue', metavar='QUEUE_FILE',
+                        help="Share the job with other runners through this work queue (e.g. on a shared filesystem) "
+                             "and write a per-worker partial output")
+    args = parser.parse_args()
+    
+    if not 0 <= args.shard_index < args.shard_count:
+        parser.error("--shard-index must be between 0 and --shard-count - 1")
+    
     # Initialize searcher (90 days threshold)
     searcher = AppStoreSearcher(days_threshold=90)
     
+    if args.merge:
+        searcher.profiler.name = 'app_store.merge'
+    elif args.queue:
+        searcher.profiler.name = 'app_store.queue'
+    elif args.shard_count > 1:
+        searcher.profiler.name = f"app_store.shard-{args.shard_index}-of-{args.shard_count}"
+    
+    with searcher.profiler:
+        _run(searcher, args)
+
+
+def _run(searcher, args):
+    """Scrape (or merge shards) as selected on the command line"""
+    if args.merge:
+        with searcher.profiler.phase('write'):
+            searcher.merge_shards(args.merge)
+            searcher.save_to_csv(args.output)
+        return
+    
     # Select categories to search (you can customize this list)
     categories_to_search = [
         'Utilities',
@@ -471,15 +1283,43 @@ def main():
     # Or search all categories:
     # searcher.search_all_categories()
     
+    if args.queue:
+        # Write this worker's partial output; combine the workers' files later with --merge
+        queue = SQLiteWorkQueue(args.queue)
+        partial_file = worker_file(args.output, queue.worker)
+        try:
+            searcher.search_from_queue(queue, categories=categories_to_search, countries=COUNTRIES,
+                                       output_file=partial_file)
+        finally:
+            queue.close()
+        print(f"Merge the workers' files with: --merge {worker_file(args.output, '*')}")
+        return
+    
+    if args.shard_count > 1:
+        # Write this shard's partial output; combine the shards later with --merge
+        root, ext = os.path.splitext(args.output)
+        partial_file = f"{root}.shard-{args.shard_index}-of-{args.shard_count}{ext}"
+        searcher.search_all_categories(
+            categories=categories_to_search,
+            countries=COUNTRIES,
+            output_file=partial_file,
+            shard_index=args.shard_index,
+            shard_count=args.shard_count,
+            resume=args.resume,
+        )
+        return
+    
     # Search selected categories across all countries
     searcher.search_all_categories(
         categories=categories_to_search,
         countries=COUNTRIES,
-        output_file='app_store_apps.csv'
+        output_file=args.output,
+        resume=args.resume,
     )
     
     # Sort results at the end
-    searcher.save_to_csv('app_store_apps.csv')
+    with searcher.profiler.phase('write'):
+        searcher.save_to_csv(args.output)
 
 
 if __name__ == '__main__':
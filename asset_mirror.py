@@ -0,0 +1,258 @@
+# -*- coding: utf-8 -*-
+"""
+Logo / Screenshot Asset Mirror
+==============================
+1. Collect every 'Logo URL' and 'Screenshot 1-4' from the exported CSVs and
+   rewrite them to size-appropriate variants through the CDN URL templates
+   (mzstatic '{w}x{h}bb' paths, play-lh '=w..-h..' suffixes).
+2. Fetch the variants concurrently and store them content-addressed
+   (assets/<sha256[:2]>/<sha256>.<ext>), so identical images are stored once.
+3. Record URL -> file in a manifest, so later runs skip what is already mirrored.
+4. Optionally write a copy of each CSV with local URL columns for the website.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from rate_controller import AdaptiveRateController
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # CSV files whose images are mirrored
+    'INPUT_CSVS': ['app_store_apps.csv', 'google_play_apps.csv', 'google_play_similar_apps.csv'],
+
+    # Where mirrored files and the manifest live
+    'ASSET_DIR': 'assets',
+
+    # Public URL the ASSET_DIR is served from on the website
+    'ASSET_BASE_URL': '/wp-content/themes/astra-child/assets',
+
+    # Sizes requested from the CDNs (pixels)
+    'LOGO_SIZE': 256,
+    'SCREENSHOT_WIDTH': 392,
+
+    # Concurrent downloads
+    'MAX_WORKERS': 8,
+
+    # Suffix of the CSV copies that get the local URL columns (see --write-columns)
+    'OUTPUT_SUFFIX': '_mirrored',
+
+    # CDNs are fine with a higher request rate than the store APIs
+    'RATE_LIMIT': {
+        'INITIAL_RATE': 5.0,
+        'MIN_RATE': 0.5,
+        'MAX_RATE': 20.0,
+    },
+}
+
+# Source column -> local URL column added by --write-columns
+LOCAL_COLUMNS = {
+    'Logo URL': 'Local Logo URL',
+    'Screenshot 1': 'Local Screenshot 1',
+    'Screenshot 2': 'Local Screenshot 2',
+    'Screenshot 3': 'Local Screenshot 3',
+    'Screenshot 4': 'Local Screenshot 4',
+}
+
+_CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/webp': 'webp',
+    'image/gif': 'gif',
+}
+
+_MZSTATIC_SIZE_RE = re.compile(r'/(\d+)x(\d+)(\w*)\.(jpg|jpeg|png|webp)$')
+_PLAY_SIZE_RE = re.compile(r'=[^/=]*$')
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36',
+}
+
+
+# ===========================
+# URL variants
+# ===========================
+def sized_variant(url, is_logo):
+    """Rewrite a CDN image URL to request a size-appropriate variant"""
+    if 'mzstatic.com' in url:
+        match = _MZSTATIC_SIZE_RE.search(url)
+        if not match:
+            return url
+        width, height = int(match.group(1)), int(match.group(2))
+        target = CONFIG['LOGO_SIZE'] if is_logo else CONFIG['SCREENSHOT_WIDTH']
+        if width <= target:
+            return url
+        # Keep the aspect ratio; only ever scale down
+        new_height = max(1, round(height * target / width))
+        suffix = match.group(3) or 'bb'
+        return url[:match.start()] + f"/{target}x{new_height}{suffix}.{match.group(4)}"
+
+    if 'googleusercontent.com' in url:
+        size = f"=s{CONFIG['LOGO_SIZE']}-rw" if is_logo else f"=w{CONFIG['SCREENSHOT_WIDTH']}-rw"
+        return _PLAY_SIZE_RE.sub('', url) + size
+
+    return url
+
+
+# ===========================
+# Mirror
+# ===========================
+class AssetMirror:
+    def __init__(self, asset_dir=None):
+        """
+        Initialize the mirror and load the manifest of earlier runs
+
+        :param asset_dir: Directory for mirrored files (uses CONFIG if None)
+        """
+        self.asset_dir = asset_dir or CONFIG['ASSET_DIR']
+        self.manifest_path = os.path.join(self.asset_dir, 'manifest.json')
+        self.manifest = {}  # variant URL -> relative file path
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        self.rate_controller = AdaptiveRateController(CONFIG['RATE_LIMIT'], name="Assets")
+
+    def is_mirrored(self, url):
+        path = self.manifest.get(url)
+        return path is not None and os.path.exists(os.path.join(self.asset_dir, path))
+
+    def fetch(self, url):
+        """Download one image and store it under its content hash; return the relative path"""
+        self.rate_controller.wait(url)
+        start = time.monotonic()
+        try:
+            response = requests.get(url, headers=HEADERS, timeout=20)
+        except requests.RequestException:
+            self.rate_controller.record(url, latency=time.monotonic() - start, failed=True)
+            raise
+        self.rate_controller.record(url, response.status_code, time.monotonic() - start)
+        response.raise_for_status()
+
+        content = response.content
+        digest = hashlib.sha256(content).hexdigest()
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        ext = _CONTENT_TYPE_EXTENSIONS.get(content_type)
+        if not ext:
+            match = re.search(r'\.(jpg|jpeg|png|webp|gif)$', url)
+            ext = match.group(1) if match else 'img'
+
+        rel_path = f"{digest[:2]}/{digest}.{ext}"
+        path = os.path.join(self.asset_dir, rel_path)
+        # Identical images from different URLs are stored once
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + '.part'
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        return rel_path
+
+    def mirror(self, urls):
+        """Fetch every URL that is not mirrored yet, concurrently; return (fetched, failed)"""
+        pending = sorted(url for url in set(urls) if not self.is_mirrored(url))
+        print(f"Mirroring {len(pending)} new images ({len(set(urls)) - len(pending)} already mirrored)")
+
+        fetched = failed = 0
+        with ThreadPoolExecutor(max_workers=CONFIG['MAX_WORKERS']) as pool:
+            futures = {pool.submit(self.fetch, url): url for url in pending}
+            for future in as_completed(futures):
+                url = futures[future]
+                try:
+                    self.manifest[url] = future.result()
+                    fetched += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"  ✗ {url}: {e}")
+                if (fetched + failed) % 100 == 0:
+                    print(f"  [{fetched + failed}/{len(pending)}] fetched")
+                    self.save_manifest()
+
+        self.save_manifest()
+        return fetched, failed
+
+    def save_manifest(self):
+        os.makedirs(self.asset_dir, exist_ok=True)
+        tmp_path = self.manifest_path + '.part'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f, indent=0, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+    def local_url(self, url):
+        """Public URL of a mirrored image, or '' if it is not mirrored"""
+        path = self.manifest.get(url)
+        return f"{CONFIG['ASSET_BASE_URL']}/{path}" if path else ''
+
+
+def _image_urls(row):
+    """Yield (source column, variant URL) for every image of a CSV row"""
+    for column in LOCAL_COLUMNS:
+        url = row.get(column, '')
+        if url and url != 'N/A' and url.startswith('http'):
+            yield column, sized_variant(url, is_logo=(column == 'Logo URL'))
+
+
+def write_local_columns(mirror, filename):
+    """Write <name><OUTPUT_SUFFIX>.csv: the CSV plus local URL columns"""
+    root, ext = os.path.splitext(filename)
+    output_file = f"{root}{CONFIG['OUTPUT_SUFFIX']}{ext}"
+    with open(filename, newline='', encoding='utf-8-sig') as src, \
+            open(output_file, 'w', newline='', encoding='utf-8') as dst:
+        reader = csv.DictReader(src)
+        writer = csv.DictWriter(dst, fieldnames=list(reader.fieldnames) + list(LOCAL_COLUMNS.values()))
+        writer.writeheader()
+        for row in reader:
+            for column in LOCAL_COLUMNS.values():
+                row[column] = ''
+            for column, url in _image_urls(row):
+                row[LOCAL_COLUMNS[column]] = mirror.local_url(url)
+            writer.writerow(row)
+    print(f"✓ Saved {output_file}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mirror app logos and screenshots into a content-addressed store")
+    parser.add_argument('csv_files', nargs='*', help="CSV files to mirror (defaults to CONFIG['INPUT_CSVS'])")
+    parser.add_argument('--write-columns', action='store_true',
+                        help="Also write a copy of each CSV with local URL columns")
+    args = parser.parse_args()
+
+    csv_files = [f for f in (args.csv_files or CONFIG['INPUT_CSVS']) if os.path.exists(f)]
+
+    print("="*60)
+    print("Asset Mirror")
+    print("="*60)
+
+    urls = set()
+    for filename in csv_files:
+        with open(filename, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                urls.update(url for _, url in _image_urls(row))
+        print(f"Read {filename}")
+
+    mirror = AssetMirror()
+    fetched, failed = mirror.mirror(urls)
+
+    if args.write_columns:
+        for filename in csv_files:
+            write_local_columns(mirror, filename)
+
+    print(f"\n{'='*60}")
+    print(f"✓ Images referenced: {len(urls)}")
+    print(f"✓ Newly mirrored: {fetched}")
+    print(f"✗ Failed: {failed}")
+    mirror.rate_controller.summary()
+    print(f"{'='*60}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,359 @@
+# -*- coding: utf-8 -*-
+"""
+Shared Chrome for the Play Store Scrapers
+=========================================
+- BrowserSession starts Chrome lazily, on the first page that needs it, so
+  importing a scraper never launches a browser.
+- `python browser_service.py start` launches one long-lived headless Chrome
+  (with a persistent, warm profile) plus a chromedriver server. While it runs,
+  every BrowserSession attaches to it through remote WebDriver instead of
+  cold-starting its own browser, so back-to-back runs skip the start-up cost.
+- Without a running service, sessions fall back to a private local Chrome.
+- Sessions supervise their browser: after N pages, when Chrome's memory or
+  page latency crosses a threshold, or when the tab/session dies, the browser
+  is recycled and the in-flight URL is retried. Crawl state lives in the
+  scrapers and is untouched by a restart.
+- A page load that stalls past PAGE_LOAD_TIMEOUT raises at once (instead of
+  after Selenium's 300 s default), so the scrapers park it in the retry queue.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import time
+
+from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.chrome.options import Options
+
+try:
+    import psutil
+except ImportError:  # Optional: memory is read from /proc otherwise
+    psutil = None
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Ports of the shared browser (DevTools) and of the chromedriver server
+    'DEBUG_PORT': 9222,
+    'DRIVER_PORT': 9515,
+
+    # Persistent profile of the shared browser (keeps cache and cookies warm)
+    'PROFILE_DIR': '.browser_profile',
+
+    # File where `start` records the running service
+    'STATE_FILE': '.browser_service.json',
+
+    # Seconds to wait for the service to accept connections
+    'START_TIMEOUT': 30,
+
+    # Supervision: recycle the browser after this many pages ...
+    'RECYCLE_AFTER_PAGES': 300,
+
+    # ... or when the Chrome process tree uses more memory than this (MB, checked every N pages) ...
+    'MAX_MEMORY_MB': 1500,
+    'MEMORY_CHECK_EVERY': 10,
+
+    # ... or after this many page loads in a row slower than SLOW_PAGE_SECONDS
+    'SLOW_PAGE_SECONDS': 20.0,
+    'SLOW_PAGES_IN_ROW': 3,
+
+    # How often a page load is retried on a fresh browser after the driver failed
+    'MAX_PAGE_RETRIES': 2,
+
+    # Seconds a page may take to load before it counts as a (transient) failure
+    'PAGE_LOAD_TIMEOUT': 30,
+}
+
+CHROME_ARGUMENTS = [
+    "--headless=new",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--window-size=1920,1080",
+]
+
+_CHROME_BINARIES = ['google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome']
+
+
+def _port_open(port, host='127.0.0.1'):
+    try:
+        with socket.create_connection((host, port), timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def _load_state():
+    if not os.path.exists(CONFIG['STATE_FILE']):
+        return None
+    with open(CONFIG['STATE_FILE'], encoding='utf-8') as f:
+        return json.load(f)
+
+
+def service_address():
+    """(chromedriver URL, DevTools address) of the running shared browser, or None"""
+    state = _load_state()
+    if not state or not (_port_open(state['debug_port']) and _port_open(state['driver_port'])):
+        return None
+    return f"http://127.0.0.1:{state['driver_port']}", f"127.0.0.1:{state['debug_port']}"
+
+
+def create_driver():
+    """Attach to the shared browser service if it runs, otherwise start a private headless Chrome"""
+    address = service_address()
+    if address:
+        driver_url, debugger_address = address
+        options = Options()
+        options.debugger_address = debugger_address
+        driver = webdriver.Remote(command_executor=driver_url, options=options)
+        # A tab of its own, so several scraper workers can share the browser
+        driver.switch_to.new_window('tab')
+        print(f"WebDriver attached to shared browser at {debugger_address}.")
+    else:
+        options = Options()
+        for argument in CHROME_ARGUMENTS:
+            options.add_argument(argument)
+        driver = webdriver.Chrome(options=options)
+        print("WebDriver initialized.")
+    driver.set_page_load_timeout(CONFIG['PAGE_LOAD_TIMEOUT'])
+    return driver
+
+
+def _process_tree_rss_mb(pid):
+    """Resident memory of a process and all its descendants, in MB (None if unknown)"""
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            processes = [root] + root.children(recursive=True)
+            total = 0
+            for process in processes:
+                try:
+                    total += process.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except psutil.Error:
+            return None
+
+    if not os.path.isdir('/proc'):
+        return None
+    # /proc/<pid>/task/<tid>/children lists direct children (Linux)
+    total_kb, stack, seen = 0, [pid], set()
+    while stack:
+        current = stack.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+            for tid in os.listdir(f'/proc/{current}/task'):
+                with open(f'/proc/{current}/task/{tid}/children') as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (OSError, ValueError):
+            continue
+    return total_kb / 1024 if seen else None
+
+
+class BrowserSession:
+    def __init__(self):
+        """Holds the WebDriver of one scraper; Chrome is only started on first use"""
+        self._driver = None
+        self._attached = False
+        self.pages = 0          # Pages loaded by the current browser
+        self.slow_pages = 0     # Consecutive slow page loads
+        self.restarts = 0
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._attached = service_address() is not None
+            self._driver = create_driver()
+            self.pages = 0
+            self.slow_pages = 0
+        return self._driver
+
+    @property
+    def started(self):
+        return self._driver is not None
+
+    def memory_mb(self):
+        """Memory used by the browser behind this session, in MB (None if unknown)"""
+        if self._driver is None:
+            return None
+        if self._attached:
+            state = _load_state()
+            pid = state and state['chrome_pid']
+        else:
+            service = getattr(self._driver, 'service', None)
+            process = getattr(service, 'process', None)
+            pid = process and process.pid  # chromedriver; Chrome runs below it
+        return _process_tree_rss_mb(pid) if pid else None
+
+    def _recycle_reason(self):
+        if self.pages >= CONFIG['RECYCLE_AFTER_PAGES']:
+            return f"{self.pages} pages loaded"
+        if self.slow_pages >= CONFIG['SLOW_PAGES_IN_ROW']:
+            return f"{self.slow_pages} slow pages in a row"
+        if self.pages and self.pages % CONFIG['MEMORY_CHECK_EVERY'] == 0:
+            memory = self.memory_mb()
+            if memory is not None and memory > CONFIG['MAX_MEMORY_MB']:
+                return f"browser uses {memory:.0f} MB"
+        return None
+
+    def restart(self, reason):
+        """Replace the browser with a fresh one (a shared browser gets a fresh tab instead)"""
+        print(f"  ↻ Recycling browser: {reason}")
+        self.restarts += 1
+        if self._attached and self._driver is not None:
+            try:
+                # Closing the old tab frees its renderer without stopping the shared browser
+                old_handle = self._driver.current_window_handle
+                self._driver.switch_to.new_window('tab')
+                new_handle = self._driver.current_window_handle
+                self._driver.switch_to.window(old_handle)
+                self._driver.close()
+                self._driver.switch_to.window(new_handle)
+                self.pages = 0
+                self.slow_pages = 0
+                return
+            except WebDriverException:
+                pass  # Session is gone; reconnect below
+        try:
+            self.close()
+        except WebDriverException:
+            self._driver = None  # Browser already crashed
+        self.driver
+
+    def get(self, url):
+        """
+        Load a URL, recycling the browser when it is due or when the driver fails
+
+        The in-flight URL is retried on the fresh browser up to MAX_PAGE_RETRIES times.
+        A load slower than PAGE_LOAD_TIMEOUT is not retried here: the TimeoutException
+        is raised for the caller's retry queue, and counts as a slow page.
+        """
+        reason = self._recycle_reason()
+        if reason:
+            self.restart(reason)
+
+        for attempt in range(CONFIG['MAX_PAGE_RETRIES'] + 1):
+            start = time.monotonic()
+            try:
+                self.driver.get(url)
+                break
+            except TimeoutException:
+                self.pages += 1
+                self.slow_pages += 1
+                raise
+            except WebDriverException as e:
+                if attempt == CONFIG['MAX_PAGE_RETRIES']:
+                    raise
+                self.restart(f"driver error ({e.__class__.__name__}), retrying {url}")
+
+        self.pages += 1
+        if time.monotonic() - start > CONFIG['SLOW_PAGE_SECONDS']:
+            self.slow_pages += 1
+        else:
+            self.slow_pages = 0
+
+    def close(self):
+        """Quit the WebDriver (an attached shared browser keeps running)"""
+        if self._driver is not None:
+            try:
+                if self._attached:
+                    try:
+                        self._driver.close()  # This session's tab
+                    except WebDriverException:
+                        pass
+                self._driver.quit()
+            finally:
+                self._driver = None
+            print("WebDriver closed.")
+
+
+# ===========================
+# Service commands
+# ===========================
+def _find_chrome():
+    for name in _CHROME_BINARIES:
+        path = shutil.which(name)
+        if path:
+            return path
+    raise FileNotFoundError("No Chrome/Chromium binary found on PATH")
+
+
+def start_service():
+    if service_address():
+        print("✓ Browser service already running")
+        return
+
+    profile_dir = os.path.abspath(CONFIG['PROFILE_DIR'])
+    os.makedirs(profile_dir, exist_ok=True)
+    chrome = subprocess.Popen(
+        [_find_chrome(), *CHROME_ARGUMENTS,
+         f"--remote-debugging-port={CONFIG['DEBUG_PORT']}",
+         f"--user-data-dir={profile_dir}",
+         "about:blank"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+    chromedriver = subprocess.Popen(
+        [shutil.which('chromedriver') or 'chromedriver', f"--port={CONFIG['DRIVER_PORT']}"],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+    deadline = time.monotonic() + CONFIG['START_TIMEOUT']
+    while not (_port_open(CONFIG['DEBUG_PORT']) and _port_open(CONFIG['DRIVER_PORT'])):
+        if time.monotonic() > deadline:
+            chrome.kill()
+            chromedriver.kill()
+            raise TimeoutError("Browser service did not come up in time")
+        time.sleep(0.2)
+
+    with open(CONFIG['STATE_FILE'], 'w', encoding='utf-8') as f:
+        json.dump({
+            'chrome_pid': chrome.pid,
+            'driver_pid': chromedriver.pid,
+            'debug_port': CONFIG['DEBUG_PORT'],
+            'driver_port': CONFIG['DRIVER_PORT'],
+            'profile_dir': profile_dir,
+        }, f, indent=2)
+    print(f"✓ Browser service running (DevTools :{CONFIG['DEBUG_PORT']}, chromedriver :{CONFIG['DRIVER_PORT']})")
+
+
+def stop_service():
+    state = _load_state()
+    if not state:
+        print("Browser service is not running")
+        return
+    for pid in (state['driver_pid'], state['chrome_pid']):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except OSError:
+            pass  # Already gone
+    os.remove(CONFIG['STATE_FILE'])
+    print("✓ Browser service stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Long-lived shared Chrome for the Play Store scrapers")
+    parser.add_argument('command', choices=['start', 'stop', 'status'])
+    args = parser.parse_args()
+
+    if args.command == 'start':
+        start_service()
+    elif args.command == 'stop':
+        stop_service()
+    else:
+        address = service_address()
+        print(f"Running: chromedriver {address[0]}, DevTools {address[1]}" if address else "Not running")
+
+
+if __name__ == '__main__':
+    main()
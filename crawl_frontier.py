@@ -0,0 +1,289 @@
+# -*- coding: utf-8 -*-
+"""
+Compact Crawl Frontier
+======================
+Frontier and visited set of the similar-apps crawl (scrape_apps_by_similar.py),
+sized for crawls into the hundreds of thousands of apps.
+
+Apps are handled as integer node ids of the similar-apps graph
+(similar_graph.py), which already keeps every package name exactly once,
+so the frontier holds no URL or package strings:
+
+- visited / queued: bitmaps indexed by node id (1 bit per app)
+- collected: array of node ids, in claim order
+- heap entries: one int packing (depth, -graph score, node id)
+
+A Bloom or cuckoo filter would not save anything here: with dense node ids
+the exact bitmap already costs less than a filter's ~10 bits per app at 1%
+false positives, and never skips an unvisited app.
+
+The package id is parsed once per link (package_from_url) and URLs are only
+built again for the pages that are loaded (app_url).
+
+QueueFrontier has the same interface but keeps the frontier in a work queue
+(work_queue.py), so crawlers on several machines share one crawl.
+
+    python crawl_frontier.py bench --apps 1000000
+"""
+
+import argparse
+import heapq
+import re
+import struct
+import threading
+import time
+import tracemalloc
+from array import array
+
+from work_queue import CONFIG as QUEUE_CONFIG
+
+APP_URL = 'https://play.google.com/store/apps/details?id={}'
+APP_ID_PATTERN = re.compile(r'/store/apps/details\?id=([a-zA-Z0-9._]+)')
+
+# Heap entry layout: depth << 96 | inverted score bits << 32 | node id
+_NODE_BITS = 32
+_NODE_MASK = (1 << _NODE_BITS) - 1
+_SCORE_MASK = (1 << 64) - 1
+_DOUBLE = struct.Struct('<d')
+
+
+def package_from_url(url):
+    """Package id of a Play app details URL (None for other links)"""
+    match = APP_ID_PATTERN.search(url) if url else None
+    return match.group(1) if match else None
+
+
+def app_url(package):
+    """Canonical details URL of a package"""
+    return APP_URL.format(package)
+
+
+def _entry(depth, score, node):
+    # Non-negative doubles order like their IEEE-754 bits, so inverting the bits
+    # pops higher scores first without quantizing them
+    score_bits = int.from_bytes(_DOUBLE.pack(max(score, 0.0)), 'little')
+    return depth << (64 + _NODE_BITS) | (_SCORE_MASK - score_bits) << _NODE_BITS | node
+
+
+class NodeBitmap:
+    __slots__ = ('bits', 'count')
+
+    def __init__(self):
+        """Set of node ids, one bit each"""
+        self.bits = bytearray()
+        self.count = 0
+
+    def add(self, node):
+        """Add a node id; False if it was already in the set"""
+        byte, mask = node >> 3, 1 << (node & 7)
+        if byte >= len(self.bits):
+            self.bits.extend(bytes(max(byte + 1 - len(self.bits), len(self.bits) // 2)))
+        if self.bits[byte] & mask:
+            return False
+        self.bits[byte] |= mask
+        self.count += 1
+        return True
+
+    def __contains__(self, node):
+        byte = node >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] & (1 << (node & 7)))
+
+    def __len__(self):
+        return self.count
+
+
+class SharedFrontier:
+    def __init__(self, max_apps):
+        """
+        Thread-safe crawl frontier and visited set shared by all crawl workers
+
+        :param max_apps: Stop handing out apps once this many were claimed (across all workers)
+        """
+        self.max_apps = max_apps
+        self.heap = []                # Packed (depth, -graph score, node id) ints
+        self.visited = NodeBitmap()   # Node ids claimed by any worker
+        self.queued = NodeBitmap()    # Node ids ever pushed (an app is queued once)
+        self.collected = array('I')   # Claimed node ids, in claim order
+        self.in_flight = 0            # Claimed apps whose similar apps are still being collected
+        self.condition = threading.Condition()
+
+    def push(self, node, depth, score=0.0):
+        """Queue an app; shallower first, then higher graph score, then first discovered"""
+        with self.condition:
+            if node in self.visited or not self.queued.add(node):
+                return
+            heapq.heappush(self.heap, _entry(depth, score, node))
+            self.condition.notify()
+
+    def is_full(self):
+        return len(self.collected) >= self.max_apps
+
+    def claim(self):
+        """
+        Take the next unvisited app for this worker
+
+        :return: (node id, depth), or None once the limit is reached or the
+                 frontier is empty with no other worker still expanding
+        """
+        with self.condition:
+            while True:
+                if self.is_full():
+                    self.condition.notify_all()
+                    return None
+                while self.heap:
+                    entry = heapq.heappop(self.heap)
+                    node = entry & _NODE_MASK
+                    if self.visited.add(node):
+                        self.collected.append(node)
+                        self.in_flight += 1
+                        return node, entry >> (64 + _NODE_BITS)
+                if self.in_flight == 0:
+                    self.condition.notify_all()
+                    return None
+                # Another worker may still push the apps it is collecting
+                self.condition.wait()
+
+    def release(self):
+        """Mark the last claimed app of a worker as expanded"""
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+
+class QueueFrontier:
+    def __init__(self, queue, max_apps, package, node_id):
+        """
+        Crawl frontier shared with other runners through a work queue: frontier nodes are
+        'node' units keyed by package id, so the queue is also the crawl-wide visited set.
+        A node stays leased until its app is expanded and extracted, so an app claimed by a
+        worker that dies is handed out again when its lease expires.
+
+        :param queue: WorkQueue shared by the runners
+        :param max_apps: Stop handing out apps once this many were claimed (across all runners;
+                         claims racing at the limit may overshoot it by a few)
+        :param package: node id -> package id (this runner's graph)
+        :param node_id: package id -> node id (this runner's graph, adding the package if new)
+        """
+        self.queue = queue
+        self.max_apps = max_apps
+        self.package = package
+        self.node_id = node_id
+        self.visited = NodeBitmap()   # Node ids claimed by this runner (the queue knows the others')
+        self.collected = array('I')   # Node ids claimed by this runner, in claim order
+        self.lock = threading.Lock()
+        self._local = threading.local()  # Package each worker thread is expanding
+
+    def push(self, node, depth, score=0.0):
+        """Queue an app; shallower first, then higher graph score"""
+        self.queue.add('node', [(self.package(node), {'depth': depth}, depth + 1 / (1 + max(score, 0.0)))])
+
+    def is_full(self):
+        counts = self.queue.counts('node')
+        return counts['leased'] + counts['done'] + counts['failed'] >= self.max_apps
+
+    def claim(self):
+        """
+        Lease the next app for this worker thread
+
+        :return: (node id, depth), or None once the limit is reached or no app is
+                 pending or being expanded by any runner
+        """
+        while not self.is_full():
+            batch = self.queue.lease('node', 1)
+            if batch:
+                package, payload = batch[0]
+                node = self.node_id(package)
+                with self.lock:
+                    if self.visited.add(node):  # Not when a failed app comes back to this runner
+                        self.collected.append(node)
+                self._local.package = package
+                return node, payload['depth']
+            if not self.queue.remaining('node'):
+                return None
+            # Another runner may still push the apps it is collecting
+            time.sleep(QUEUE_CONFIG['POLL_INTERVAL'])
+        return None
+
+    def release(self, outcome='done'):
+        """
+        Retire the last claimed app of this worker thread
+
+        :param outcome: 'done' (expanded and extracted), 'failed' (transient failure: another
+                        attempt by any runner) or 'unfinished' (handed back, e.g. at the deadline)
+        """
+        keys = [self._local.package]
+        if outcome == 'done':
+            self.queue.complete('node', keys)
+        elif outcome == 'failed':
+            self.queue.fail('node', keys)
+        else:
+            self.queue.release('node', keys)
+
+
+# ===========================
+# Benchmark
+# ===========================
+def _legacy_crawl(packages):
+    """The URL-string frontier this module replaced: set of ids, list of URLs, 5-tuple heap entries"""
+    heap, visited, collected = [], set(), []
+    for sequence, package in enumerate(packages):
+        heapq.heappush(heap, (sequence % 10, -0.5, sequence, app_url(package), package))
+    while heap:
+        _, _, _, url, package = heapq.heappop(heap)
+        if package not in visited:
+            visited.add(package)
+            collected.append(url)
+    return visited, collected
+
+
+def _id_table(packages):
+    """The similar-apps graph's package list + index (kept by the scraper with either frontier)"""
+    nodes, index = [], {}
+    for package in packages:
+        if index.setdefault(package, len(nodes)) == len(nodes):
+            nodes.append(package)
+    return nodes, index
+
+
+def _compact_crawl(packages):
+    """This module's frontier, over node ids 0..len(packages) - 1"""
+    frontier = SharedFrontier(len(packages))
+    for node in range(len(packages)):
+        frontier.push(node, node % 10, 0.5)
+    while frontier.claim() is not None:
+        frontier.release()
+    return frontier
+
+
+def benchmark(apps):
+    """Peak memory of queueing and claiming `apps` apps, legacy vs compact frontier"""
+    # Package ids are built outside the measurement: the browser hands them over either way
+    packages = [f"com.developer{i % 50000}.app{i}" for i in range(apps)]
+    print(f"Crawling {apps} synthetic apps (queue all, then claim all)\n")
+    print(f"{'Structure':<36}{'Peak MB':>10}{'Bytes/app':>11}{'MB per 1M':>11}{'Seconds':>9}")
+    for label, crawl in (("Frontier: legacy (URL strings)", _legacy_crawl),
+                         ("Frontier: compact (node ids)", _compact_crawl),
+                         ("Graph id table (shared, both)", _id_table)):
+        tracemalloc.start()
+        start = time.perf_counter()
+        kept = crawl(packages)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del kept
+        print(f"{label:<36}{peak / 2**20:>10.1f}{peak / apps:>11.0f}{peak / apps * 1e6 / 2**20:>11.1f}{elapsed:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact frontier of the similar-apps crawl")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    bench_parser = subparsers.add_parser('bench', help="Measure frontier memory per visited app")
+    bench_parser.add_argument('--apps', type=int, default=1000000, help="Synthetic apps to crawl")
+    args = parser.parse_args()
+
+    if args.command == 'bench':
+        benchmark(args.apps)
+
+
+if __name__ == '__main__':
+    main()
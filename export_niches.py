@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+"""
+Per-Niche JSON Exports for the Website
+======================================
+Splits a scraper CSV into one pre-sorted, compressed JSON shard per niche
+(exports/<store>/<niche>.json.gz, plus .json.br when brotli is installed)
+with truncated descriptions, and a small manifest.json per store, so a page
+only downloads the niche it shows instead of the whole CSV.
+
+With --collapse-duplicates, apps that app_matching.py put in the same cluster
+(app_clusters.csv) are listed once per niche, under the first app in sort order.
+"""
+
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from app_matching import collapse_duplicates, load_canonical_ids
+from app_record import AppRecord
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip shards are always written
+    brotli = None
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Store label -> scraper CSV
+    'INPUT_CSVS': {
+        'app_store': 'app_store_apps.csv',
+        'google_play': 'google_play_apps.csv',
+        'google_play_similar': 'google_play_similar_apps.csv',
+    },
+
+    # Root directory of the exports (one sub-directory per store)
+    'OUTPUT_DIR': 'exports',
+
+    # Descriptions are cut to this many characters (at a word boundary)
+    'DESCRIPTION_MAX_CHARS': 280,
+}
+
+
+def niche_slug(niche):
+    """'Health & Fitness' -> 'health-fitness'"""
+    slug = re.sub(r'[^a-z0-9]+', '-', (niche or 'general').lower()).strip('-')
+    return slug or 'general'
+
+
+def truncate_description(description, max_chars=None):
+    """Cut a description to max_chars at a word boundary"""
+    max_chars = max_chars or CONFIG['DESCRIPTION_MAX_CHARS']
+    if not description or description == "N/A":
+        return ""
+    description = ' '.join(description.split())
+    if len(description) <= max_chars:
+        return description
+    cut = description[:max_chars].rsplit(' ', 1)[0]
+    return cut.rstrip(' .,;:') + '…'
+
+
+def _sort_key(record):
+    # Newest first, then most installed, then by name
+    released = record.released.toordinal() if record.released else 0
+    return (-released, -record.installs, record.app_name.lower())
+
+
+def _entry(record):
+    """Compact JSON entry for one app"""
+    return {
+        'id': record.app_id,
+        'name': record.app_name,
+        'link': record.app_link,
+        'logo': record.logo_url,
+        'developer': record.developer,
+        'installs': record.install_count,
+        'installs_value': record.installs,
+        'rating': record.rating_value,
+        'reviews': record.review_count,
+        'released': record.released.isoformat() if record.released else None,
+        'release_date': record.release_date,
+        'keywords': record.keywords,
+        'description': truncate_description(record.description),
+        'screenshots': [url for url in record.screenshots if url and url != 'N/A'],
+    }
+
+
+def _write_file(path, data):
+    tmp_path = path + '.part'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def export_niche_shards(csv_file, store, output_dir=None, canonical_ids=None):
+    """
+    Write one compressed JSON shard per niche plus the store's manifest
+
+    :param csv_file: Scraper CSV to export
+    :param store: Store label, used as the sub-directory name
+    :param output_dir: Root export directory (uses CONFIG if None)
+    :param canonical_ids: Optional app id -> canonical id mapping; keeps one app per cluster and niche
+    :return: The manifest dict
+    """
+    output_dir = os.path.join(output_dir or CONFIG['OUTPUT_DIR'], store)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Group by niche; the similar-apps CSV is append-only, so keep the latest row per app
+    niches = defaultdict(dict)
+    with open(csv_file, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            record = AppRecord.from_row(row)
+            niches[record.niche][record.app_id or record.app_link] = record
+
+    manifest = {
+        'store': store,
+        'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'niches': {},
+    }
+    written = set()
+    for niche in sorted(niches):
+        records = sorted(niches[niche].values(), key=_sort_key)
+        if canonical_ids:
+            records = collapse_duplicates(records, [canonical_ids.get(r.app_id, r.app_id or r.app_link) for r in records])
+        payload = json.dumps([_entry(r) for r in records], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        slug = niche_slug(niche)
+
+        # mtime=0 keeps the gzip bytes identical when the data is unchanged
+        gz_name = f"{slug}.json.gz"
+        _write_file(os.path.join(output_dir, gz_name), gzip.compress(payload, compresslevel=9, mtime=0))
+        written.add(gz_name)
+        info = {
+            'count': len(records),
+            'gzip': gz_name,
+            'gzip_bytes': os.path.getsize(os.path.join(output_dir, gz_name)),
+            'hash': hashlib.sha256(payload).hexdigest()[:16],
+        }
+        if brotli is not None:
+            br_name = f"{slug}.json.br"
+            _write_file(os.path.join(output_dir, br_name), brotli.compress(payload, quality=11))
+            written.add(br_name)
+            info['brotli'] = br_name
+            info['brotli_bytes'] = os.path.getsize(os.path.join(output_dir, br_name))
+        manifest['niches'][niche] = info
+        print(f"  {niche}: {len(records)} apps -> {gz_name} ({info['gzip_bytes']} bytes)")
+
+    # Drop shards of niches that no longer exist
+    for name in os.listdir(output_dir):
+        if name.endswith(('.json.gz', '.json.br')) and name not in written:
+            os.remove(os.path.join(output_dir, name))
+
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    print(f"✓ Exported {len(manifest['niches'])} niches to {output_dir}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export per-niche compressed JSON shards for the website")
+    parser.add_argument('--store', action='append', choices=sorted(CONFIG['INPUT_CSVS']),
+                        help="Store to export (repeatable, defaults to every store)")
+    parser.add_argument('--output-dir', default=CONFIG['OUTPUT_DIR'], help="Root export directory")
+    parser.add_argument('--collapse-duplicates', action='store_true',
+                        help="List each cluster of app_matching.py once per niche")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("Per-Niche JSON Export")
+    print("="*60)
+
+    canonical_ids = load_canonical_ids() if args.collapse_duplicates else None
+
+    for store in args.store or sorted(CONFIG['INPUT_CSVS']):
+        csv_file = CONFIG['INPUT_CSVS'][store]
+        if not os.path.exists(csv_file):
+            print(f"⚠ Warning: {csv_file} not found, skipping...")
+            continue
+        print(f"\n{store} ({csv_file})")
+        export_niche_shards(csv_file, store, args.output_dir, canonical_ids)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+In-Browser Extraction of Play App Pages
+=======================================
+Reading a page through Selenium element handles costs one WebDriver round
+trip per find_elements / get_attribute call, and parsing it in Python means
+shipping the whole page_source (megabytes) out of Chrome. extract_app_page()
+runs a single execute_script instead: the script collects the app detail
+links and every field the scrapers parse (same selectors and fallbacks as
+their BeautifulSoup parsers) and returns one small JSON object.
+extract_detail_links() does the same for listing pages that only need links.
+"""
+
+# Marker in the page's inline data that precedes the release date
+RELEASE_DATE_MARKER = 'dappgame_ratings"]]],["'
+
+# Text fields returned by the script ("N/A" when missing, as in the CSVs)
+TEXT_FIELDS = ('app_name', 'install_count', 'release_date', 'developer', 'logo_url',
+               'rating', 'review_count', 'description')
+
+DETAIL_LINKS_SCRIPT = r"""
+return Array.from(document.querySelectorAll('a[href*="/store/apps/details?id="]'), a => a.href);
+"""
+
+APP_PAGE_SCRIPT = r"""
+const releaseMarker = arguments[0];
+const text = el => el ? el.textContent.trim() : null;
+const first = (...selectors) => {
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el) return el;
+    }
+    return null;
+};
+
+let appName = text(first('h1[itemprop="name"]', 'h1.Fd93Bb'));
+if (!appName && document.title) {
+    appName = document.title.trim().replace(' - Apps on Google Play', '');
+}
+
+let installCount = Array.from(document.querySelectorAll('div.ClM7O'), text).find(t => t.includes('+'));
+if (!installCount) {
+    installCount = text(document.querySelector('div.w7Iutd > div.wVqUob:first-child > div.ClM7O:first-child'));
+}
+
+const logo = first('img.T75of.arM4bb[itemprop="image"]', 'img[itemprop="image"]');
+
+const screenshots = [];
+for (const img of document.querySelectorAll('img[alt="Screenshot image"]')) {
+    const src = img.getAttribute('src');
+    if (src && src.includes('play-lh.googleusercontent.com') && !screenshots.includes(src)) {
+        screenshots.push(src);
+    }
+}
+
+let description = text(document.querySelector('div[data-expandable-section]'));
+if (!description) {
+    const parts = Array.from(document.querySelectorAll('div.bARER'), text);
+    description = parts.length ? parts.join(' ') : null;
+}
+
+let releaseDate = null;
+for (const script of document.scripts) {
+    const source = script.textContent;
+    const index = source.indexOf(releaseMarker);
+    if (index !== -1) {
+        const start = index + releaseMarker.length;
+        releaseDate = source.slice(start, start + 12).replace(/"/g, '').trim();
+        break;
+    }
+}
+
+return {
+    links: Array.from(document.querySelectorAll('a[href*="/store/apps/details?id="]'), a => a.href),
+    app_name: appName,
+    install_count: installCount,
+    release_date: releaseDate,
+    developer: text(first('div.Vbfug.auoIOc', 'a.Si6A0c.Gwdmqd')),
+    logo_url: logo && logo.getAttribute('src'),
+    screenshots: screenshots.slice(0, 4),
+    rating: text(document.querySelector('div.jILTFe')),
+    review_count: text(document.querySelector('div.g1rdde')),
+    description: description,
+};
+"""
+
+
+def extract_detail_links(driver):
+    """Absolute app detail URLs linked from the loaded page, in page order (one round trip)"""
+    return driver.execute_script(DETAIL_LINKS_SCRIPT) or []
+
+
+def extract_app_page(driver):
+    """
+    Links and app fields of the loaded Play page, in one WebDriver round trip
+
+    :param driver: WebDriver with an app details page loaded
+    :return: Dict with 'links' (absolute detail URLs, in page order) and the AppRecord
+             display fields, "N/A" where not found, screenshots padded to 4
+    """
+    data = driver.execute_script(APP_PAGE_SCRIPT, RELEASE_DATE_MARKER) or {}
+    fields = {key: data.get(key) or "N/A" for key in TEXT_FIELDS}
+    fields['links'] = data.get('links') or []
+    fields['screenshots'] = (list(data.get('screenshots') or []) + ['N/A'] * 4)[:4]
+
+    # Same clean-up as the BeautifulSoup parsers
+    review_count = fields['review_count']
+    if fields['rating'] == "N/A" or "Download" in review_count or "Install" in review_count:
+        fields['review_count'] = "N/A"
+    return fields
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-In Run Profiling
+====================
+Off unless the SCRAPER_PROFILE environment variable is set:
+
+    SCRAPER_PROFILE=sample python scrape_google_play_apps.py
+    SCRAPER_PROFILE=cprofile python appstore_search_by_category.py
+
+- sample: a background thread samples the Python stacks of every thread
+  every SAMPLE_INTERVAL seconds (wall clock, so time spent waiting on the
+  network, the browser or the rate limiter shows up too). Stacks are
+  written in collapsed format, one root frame per phase, ready for
+  flamegraph.pl or speedscope: profiles/<name>-<time>.collapsed
+- cprofile: deterministic cProfile of the main thread, one .pstats file
+  per phase: profiles/<name>-<time>.<phase>.pstats
+
+The scrapers mark their phases (discovery, metadata/detail, write) with
+`with profiler.phase('...')`; a short per-phase summary is printed at the end.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Environment variable selecting the mode ('sample' or 'cprofile'; unset = off)
+    'ENV_VAR': 'SCRAPER_PROFILE',
+
+    # Directory of the profile files
+    'OUTPUT_DIR': 'profiles',
+
+    # Seconds between stack samples (sample mode)
+    'SAMPLE_INTERVAL': 0.005,
+
+    # Functions listed per phase in the printed summary
+    'TOP_FUNCTIONS': 10,
+}
+
+MODES = ('sample', 'cprofile')
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return f"{module}.{getattr(code, 'co_qualname', code.co_name)}".replace(';', ':')
+
+
+class RunProfiler:
+    def __init__(self, name, mode=None):
+        """
+        :param name: Entry point name, used in the file names
+        :param mode: 'sample', 'cprofile' or None (the SCRAPER_PROFILE env variable decides if None)
+        """
+        mode = mode if mode is not None else os.environ.get(CONFIG['ENV_VAR'], '').strip().lower()
+        if mode and mode not in MODES:
+            print(f"⚠ Unknown profile mode '{mode}' (use one of {', '.join(MODES)}), profiling is off")
+            mode = ''
+        self.name = name
+        self.mode = mode or None
+        self.running = False
+        self._phases = {}              # thread id -> stack of phase names
+        self._main_thread = threading.main_thread().ident
+        self._samples = Counter()      # (phase, frame labels root first) -> samples
+        self._stop = threading.Event()
+        self._sampler = None
+        self._profiles = {}            # phase -> cProfile.Profile (cprofile mode)
+        self.prefix = None
+
+    @property
+    def enabled(self):
+        return self.mode is not None
+
+    # ---------------------------------------------------------
+    # Phases
+    # ---------------------------------------------------------
+    def current_phase(self, thread_id=None):
+        """Phase of a thread; threads without their own phase report the main thread's"""
+        stack = self._phases.get(thread_id or threading.get_ident())
+        if not stack:
+            stack = self._phases.get(self._main_thread)
+        return stack[-1] if stack else 'setup'
+
+    def phase(self, name):
+        """Context manager attributing the enclosed work (of this thread) to a phase"""
+        return _Phase(self, name)
+
+    def _switch(self, old_phase, new_phase):
+        """cprofile mode: move main-thread profiling from one phase's profile to another's"""
+        if self.mode != 'cprofile' or threading.get_ident() != self._main_thread:
+            return
+        if old_phase in self._profiles:
+            self._profiles[old_phase].disable()
+        profile = self._profiles.setdefault(new_phase, cProfile.Profile())
+        profile.enable()
+
+    # ---------------------------------------------------------
+    # Start / stop
+    # ---------------------------------------------------------
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+        return False
+
+    def start(self):
+        if not self.enabled or self.running:
+            return
+        self.running = True
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self.prefix = os.path.join(CONFIG['OUTPUT_DIR'], f"{self.name}-{stamp}")
+        self.started = time.monotonic()
+        if self.mode == 'sample':
+            self._sampler = threading.Thread(target=self._sample_loop, name='profiler', daemon=True)
+            self._sampler.start()
+        else:
+            self._switch(None, self.current_phase())
+        print(f"[Profile] {self.mode} profiling of {self.name} enabled")
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        interval = CONFIG['SAMPLE_INTERVAL']
+        while not self._stop.wait(interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.reverse()
+                self._samples[(self.current_phase(thread_id), tuple(stack))] += 1
+
+    def stop(self):
+        """Stop profiling, write the profile files and print the summary"""
+        if not self.running:
+            return
+        self.running = False
+        os.makedirs(CONFIG['OUTPUT_DIR'], exist_ok=True)
+        if self.mode == 'sample':
+            self._stop.set()
+            self._sampler.join()
+            self._write_collapsed()
+        else:
+            for profile in self._profiles.values():
+                profile.disable()
+            self._write_pstats()
+
+    def _write_collapsed(self):
+        path = self.prefix + '.collapsed'
+        with open(path, 'w', encoding='utf-8') as f:
+            for (phase, stack), count in sorted(self._samples.items()):
+                f.write(f"{';'.join((phase,) + stack)} {count}\n")
+
+        interval = CONFIG['SAMPLE_INTERVAL']
+        per_phase = Counter()
+        leaves = defaultdict(Counter)
+        for (phase, stack), count in self._samples.items():
+            per_phase[phase] += count
+            leaves[phase][stack[-1] if stack else '?'] += count
+        print(f"\n[Profile] {sum(per_phase.values())} samples every {interval * 1000:.0f} ms -> {path}")
+        for phase, count in per_phase.most_common():
+            print(f"  {phase}: ~{count * interval:.1f} thread-seconds")
+            for label, leaf_count in leaves[phase].most_common(CONFIG['TOP_FUNCTIONS']):
+                print(f"    {leaf_count / count:6.1%}  {label}")
+
+    def _write_pstats(self):
+        print(f"\n[Profile] cProfile of the main thread, {time.monotonic() - self.started:.1f}s")
+        for phase, profile in self._profiles.items():
+            path = f"{self.prefix}.{phase}.pstats"
+            profile.dump_stats(path)
+            out = io.StringIO()
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats('cumulative').print_stats(CONFIG['TOP_FUNCTIONS'])
+            print(f"  {phase}: {stats.total_tt:.1f}s -> {path}")
+            lines = out.getvalue().splitlines()
+            start = next((i for i, line in enumerate(lines) if line.lstrip().startswith('ncalls')), len(lines))
+            for line in lines[start:]:
+                if line.strip():
+                    print(f"    {line}")
+
+
+class _Phase:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        profiler = self.profiler
+        if profiler.enabled:
+            stack = profiler._phases.setdefault(threading.get_ident(), [])
+            previous = stack[-1] if stack else None
+            stack.append(self.name)
+            if profiler.running and previous != self.name:
+                profiler._switch(previous or 'setup', self.name)
+        return self
+
+    def __exit__(self, *exc_info):
+        profiler = self.profiler
+        if profiler.enabled:
+            stack = profiler._phases.get(threading.get_ident())
+            if stack:
+                stack.pop()
+                previous = stack[-1] if stack else 'setup'
+                if profiler.running and previous != self.name:
+                    profiler._switch(self.name, previous)
+        return False
@@ -0,0 +1,262 @@
+# -*- coding: utf-8 -*-
+"""
+Row-Level Delta Publishing
+==========================
+Instead of re-uploading a whole CSV every night:
+1. Diff the new CSV against the last published snapshot, keyed by
+   (niche, app id): the Play CSV has a row per category that lists an app.
+2. Write a compact patch file with the added / updated / deleted rows.
+3. Upload only the patch and the small patch index (FTP, or a local
+   directory standing in for the FTP server).
+4. Record the new snapshot ((niche, app id) -> row hash) once the upload succeeded.
+
+The first publish of a CSV (no snapshot yet) uploads the full CSV as the base.
+A patch's added and updated rows carry their Niche and App Link; an updated row
+replaces the row of the same niche and app, and `deleted` lists [niche, app id]
+pairs (app ids as in app_record.app_id_from_link).
+"""
+
+import argparse
+import csv
+import ftplib
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+from datetime import datetime, timezone
+
+from app_record import CSV_COLUMNS, app_id_from_link
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Local directory with the published snapshots and patch indexes (committed with the CSVs)
+    'SNAPSHOT_DIR': '.publish',
+
+    # Local directory the patch files are written to before upload
+    'PATCH_DIR': 'patches',
+
+    # After this many patches the full CSV is uploaded again as a new base,
+    # so readers never have to replay a long chain
+    'MAX_PATCHES': 30,
+
+    # Remote directory the CSVs and patches are published to
+    'REMOTE_DIR': '/public_html/wp-content/themes/astra-child/',
+}
+
+
+# ===========================
+# Uploaders
+# ===========================
+class FTPUploader:
+    def __init__(self, host, user, password, remote_dir, port=21):
+        """Upload files to an FTP server under remote_dir"""
+        self.ftp = ftplib.FTP()
+        self.ftp.connect(host, port, timeout=60)
+        self.ftp.login(user, password)
+        self.remote_dir = remote_dir
+
+    def _ensure_dir(self, remote_dir):
+        path = ''
+        for part in remote_dir.strip('/').split('/'):
+            path += '/' + part
+            try:
+                self.ftp.mkd(path)
+            except ftplib.error_perm:
+                pass  # Already exists
+
+    def upload(self, local_path, remote_name):
+        remote_path = posixpath.join(self.remote_dir, remote_name)
+        self._ensure_dir(posixpath.dirname(remote_path))
+        # Upload under a temp name and rename, so readers never see a partial file
+        with open(local_path, 'rb') as f:
+            self.ftp.storbinary(f'STOR {remote_path}.part', f)
+        try:
+            self.ftp.delete(remote_path)
+        except ftplib.error_perm:
+            pass
+        self.ftp.rename(f'{remote_path}.part', remote_path)
+        print(f"  ↑ {remote_path}")
+
+    def close(self):
+        try:
+            self.ftp.quit()
+        except ftplib.all_errors:
+            self.ftp.close()
+
+
+class LocalDirUploader:
+    def __init__(self, root):
+        """Stand-in for the FTP server: 'uploads' are copies into a local directory"""
+        self.root = root
+
+    def upload(self, local_path, remote_name):
+        target = os.path.join(self.root, *remote_name.split('/'))
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(local_path, target + '.part')
+        os.replace(target + '.part', target)
+        print(f"  ↑ {target}")
+
+    def close(self):
+        pass
+
+
+# ===========================
+# Snapshots and diffs
+# ===========================
+def _row_hash(row):
+    data = json.dumps([row.get(column, '') for column in CSV_COLUMNS], ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+def load_rows(csv_file):
+    """Read a CSV into {(niche, app id): row}; for a repeated (niche, app) the last row wins"""
+    rows = {}
+    with open(csv_file, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            app_id = app_id_from_link(row.get('App Link')) or row.get('App Link')
+            if app_id:
+                rows[(row.get('Niche') or '', app_id)] = row
+    return rows
+
+
+def snapshot_version(snapshot):
+    """Short hash identifying a snapshot's full content"""
+    data = json.dumps(sorted(snapshot.items()))
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()[:16]
+
+
+def diff_rows(snapshot, rows):
+    """
+    Compare new rows with the published snapshot
+
+    :param snapshot: {(niche, app id): row hash} of the last publish
+    :param rows: {(niche, app id): row} of the new CSV
+    :return: (added, updated, deleted) - lists of rows, rows and [niche, app id] keys
+    """
+    added, updated = [], []
+    for key in sorted(rows):
+        row_hash = _row_hash(rows[key])
+        if key not in snapshot:
+            added.append(rows[key])
+        elif snapshot[key] != row_hash:
+            updated.append(rows[key])
+    deleted = [list(key) for key in sorted(snapshot) if key not in rows]
+    return added, updated, deleted
+
+
+class DeltaPublisher:
+    def __init__(self, uploader, snapshot_dir=None, patch_dir=None):
+        """
+        :param uploader: FTPUploader or LocalDirUploader
+        :param snapshot_dir: Directory holding the published snapshots and indexes (uses CONFIG if None)
+        :param patch_dir: Directory the patch files are written to (uses CONFIG if None)
+        """
+        self.uploader = uploader
+        self.snapshot_dir = snapshot_dir or CONFIG['SNAPSHOT_DIR']
+        self.patch_dir = patch_dir or CONFIG['PATCH_DIR']
+
+    def _snapshot_path(self, name):
+        return os.path.join(self.snapshot_dir, f"{name}.snapshot.json")
+
+    def _load_json(self, path, default):
+        if not os.path.exists(path):
+            return default
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_json(self, path, data):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path + '.part', 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'), sort_keys=True)
+        os.replace(path + '.part', path)
+
+    def _load_snapshot(self, path):
+        """(version, {(niche, app id): row hash}) of the last publish, or None"""
+        state = self._load_json(path, None)
+        if state is None or not isinstance(state['rows'], list):
+            return None  # Snapshots keyed by app id alone start a new base
+        return state['version'], {(niche, app_id): row_hash for niche, app_id, row_hash in state['rows']}
+
+    def publish(self, csv_file):
+        """Publish one CSV as a patch against its last published snapshot"""
+        name = os.path.splitext(os.path.basename(csv_file))[0]
+        rows = load_rows(csv_file)
+        snapshot_path = self._snapshot_path(name)
+        state = self._load_snapshot(snapshot_path)
+        new_snapshot = {key: _row_hash(row) for key, row in rows.items()}
+        new_version = snapshot_version(new_snapshot)
+        index_path = os.path.join(self.snapshot_dir, f"{name}.index.json")
+        index = self._load_json(index_path, None)
+
+        if state is None or index is None or len(index['patches']) >= CONFIG['MAX_PATCHES']:
+            # The full CSV becomes the base every later patch applies to
+            print(f"{name}: uploading full CSV as new base ({len(rows)} rows)")
+            self.uploader.upload(csv_file, os.path.basename(csv_file))
+            index = {'base_file': os.path.basename(csv_file), 'base_version': new_version, 'patches': []}
+            self._save_json(index_path, index)
+            self.uploader.upload(index_path, f"patches/{name}/index.json")
+        else:
+            version, snapshot = state
+            added, updated, deleted = diff_rows(snapshot, rows)
+            print(f"{name}: {len(added)} added, {len(updated)} updated, {len(deleted)} deleted")
+            if not (added or updated or deleted):
+                print(f"{name}: nothing to publish")
+                return
+
+            stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+            patch_name = f"{stamp}.json"
+            patch = {
+                'base': version,
+                'version': new_version,
+                'columns': CSV_COLUMNS,
+                'added': [[row.get(column, '') for column in CSV_COLUMNS] for row in added],
+                'updated': [[row.get(column, '') for column in CSV_COLUMNS] for row in updated],
+                'deleted': deleted,
+            }
+            patch_path = os.path.join(self.patch_dir, name, patch_name)
+            self._save_json(patch_path, patch)
+
+            index['patches'].append({'file': patch_name, 'base': version, 'version': new_version})
+            self._save_json(index_path, index)
+
+            # Patch first, index last: readers only learn about a patch once it is there
+            self.uploader.upload(patch_path, f"patches/{name}/{patch_name}")
+            self.uploader.upload(index_path, f"patches/{name}/index.json")
+
+        # Only remember what was actually uploaded
+        self._save_json(snapshot_path, {'version': new_version,
+                                        'rows': [[*key, row_hash] for key, row_hash in sorted(new_snapshot.items())]})
+        print(f"✓ Published {name} (version {new_version})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish row-level CSV patches instead of whole files")
+    parser.add_argument('csv_files', nargs='+', help="CSV files to publish")
+    parser.add_argument('--local-dir', help="Publish into this local directory instead of FTP (stand-in for testing)")
+    parser.add_argument('--remote-dir', default=CONFIG['REMOTE_DIR'], help="Remote directory on the FTP server")
+    args = parser.parse_args()
+
+    print("="*60)
+    print("Delta Publisher")
+    print("="*60)
+
+    if args.local_dir:
+        uploader = LocalDirUploader(args.local_dir)
+    else:
+        # Credentials come from the environment (GitHub Actions secrets)
+        uploader = FTPUploader(os.environ['FTP_HOST'], os.environ['FTP_USER'], os.environ['FTP_PASS'],
+                               args.remote_dir, port=int(os.environ.get('FTP_PORT', 21)))
+
+    try:
+        publisher = DeltaPublisher(uploader)
+        for csv_file in args.csv_files:
+            publisher.publish(csv_file)
+    finally:
+        uploader.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive Per-Host Rate Controller (AIMD)
+========================================
+Replaces fixed politeness sleeps between requests:
+- while a host answers quickly and successfully, its request rate grows additively
+- on 429 / 5xx / errors or a latency spike, its rate is cut multiplicatively
+- the rate always stays between a configurable floor and ceiling
+"""
+
+import threading
+import time
+from urllib.parse import urlparse
+
+# Default settings, used when a scraper does not override them
+DEFAULT_RATE_LIMIT = {
+    # Requests per second when a host is first contacted
+    'INITIAL_RATE': 2.0,
+
+    # Floor and ceiling for the request rate (requests per second)
+    'MIN_RATE': 0.25,
+    'MAX_RATE': 5.0,
+
+    # Additive increase per healthy response, multiplicative decrease on trouble
+    'ADDITIVE_STEP': 0.1,
+    'BACKOFF_FACTOR': 0.5,
+
+    # A response slower than this many seconds, or this many times slower
+    # than the host's average (and at least LATENCY_SPIKE_MIN seconds),
+    # counts as a latency spike
+    'LATENCY_THRESHOLD': 5.0,
+    'LATENCY_SPIKE_RATIO': 3.0,
+    'LATENCY_SPIKE_MIN': 1.0,
+
+    # Print the current rate of a host every N requests (0 = only on backoff)
+    'LOG_EVERY': 25,
+}
+
+
+class AdaptiveRateController:
+    def __init__(self, settings=None, name="Rate"):
+        """
+        Initialize the rate controller
+
+        :param settings: Dict overriding keys of DEFAULT_RATE_LIMIT
+        :param name: Label printed in the run log
+        """
+        self.settings = dict(DEFAULT_RATE_LIMIT)
+        if settings:
+            self.settings.update(settings)
+        self.name = name
+        self.hosts = {}
+        self.lock = threading.Lock()
+
+    def _host(self, url_or_host):
+        return urlparse(url_or_host).netloc or url_or_host
+
+    def _state(self, host):
+        state = self.hosts.get(host)
+        if state is None:
+            state = {
+                'rate': self.settings['INITIAL_RATE'],
+                'next_time': 0.0,
+                'avg_latency': None,
+                'requests': 0,
+                'backoffs': 0,
+            }
+            self.hosts[host] = state
+        return state
+
+    def current_rate(self, url_or_host):
+        """Return the current request rate (requests per second) for a host"""
+        with self.lock:
+            return self._state(self._host(url_or_host))['rate']
+
+    def wait(self, url_or_host):
+        """Block until the host's current rate allows another request"""
+        host = self._host(url_or_host)
+        with self.lock:
+            state = self._state(host)
+            now = time.monotonic()
+            start = max(now, state['next_time'])
+            # Reserve the slot before sleeping so concurrent callers queue up behind it
+            state['next_time'] = start + 1.0 / state['rate']
+        delay = start - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url_or_host, status_code=None, latency=None, failed=False):
+        """
+        Feed back the outcome of a request
+
+        :param url_or_host: URL (or host) the request went to
+        :param status_code: HTTP status code, if known
+        :param latency: Request duration in seconds, if known
+        :param failed: True if the request raised (timeout, connection error, ...)
+        """
+        host = self._host(url_or_host)
+        with self.lock:
+            state = self._state(host)
+            state['requests'] += 1
+
+            reason = None
+            if failed:
+                reason = "request failed"
+            elif status_code is not None and (status_code == 429 or status_code >= 500):
+                reason = f"HTTP {status_code}"
+            elif latency is not None:
+                avg = state['avg_latency']
+                if latency > self.settings['LATENCY_THRESHOLD']:
+                    reason = f"slow response ({latency:.1f}s)"
+                elif (avg and latency > avg * self.settings['LATENCY_SPIKE_RATIO']
+                        and latency >= self.settings['LATENCY_SPIKE_MIN']):
+                    reason = f"latency spike ({latency:.1f}s vs {avg:.1f}s avg)"
+                # Exponentially weighted average of recent latencies
+                state['avg_latency'] = latency if avg is None else 0.8 * avg + 0.2 * latency
+
+            old_rate = state['rate']
+            if reason:
+                state['rate'] = max(self.settings['MIN_RATE'], old_rate * self.settings['BACKOFF_FACTOR'])
+                state['backoffs'] += 1
+                # Push the next slot out so the lower rate takes effect immediately
+                state['next_time'] = max(state['next_time'], time.monotonic() + 1.0 / state['rate'])
+                print(f"  [{self.name}] {host}: {reason}, backing off {old_rate:.2f} -> {state['rate']:.2f} req/s")
+            else:
+                state['rate'] = min(self.settings['MAX_RATE'], old_rate + self.settings['ADDITIVE_STEP'])
+                log_every = self.settings['LOG_EVERY']
+                if log_every and state['requests'] % log_every == 0:
+                    print(f"  [{self.name}] {host}: {state['rate']:.2f} req/s after {state['requests']} requests")
+
+    def summary(self):
+        """Print the final rate of every host"""
+        with self.lock:
+            for host, state in self.hosts.items():
+                print(f"[{self.name}] {host}: {state['rate']:.2f} req/s, "
+                      f"{state['requests']} requests, {state['backoffs']} backoffs")
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+Raw Capture Archive
+===================
+Keeps the raw page source (Play) and lookup JSON (App Store) the scrapers
+fetched, compressed and keyed by app id and fetch time:
+
+    raw_archive/<store>/<app id>/<YYYYmmddTHHMMSSZ>.<kind>.json.zst   (.gz without zstandard)
+
+When Google renames a CSS class or marker and a run parses badly, the CSVs
+can be rebuilt from the archive with fixed parsers, with no network:
+
+    python raw_archive.py reparse google_play --output google_play_apps.csv
+
+The similar-apps CSV is an append-only history, so its reparse only replaces
+the rows of archived apps and keeps every other row.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+try:
+    import zstandard
+except ImportError:  # Optional: gzip is used otherwise
+    zstandard = None
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Root directory of the archive (one sub-directory per store)
+    'ARCHIVE_DIR': 'raw_archive',
+
+    # Captures kept per app and kind; older ones are deleted on save (0 = keep all)
+    'KEEP_CAPTURES': 3,
+}
+
+# Store label (as in export_niches.py) -> default CSV rebuilt by `reparse`
+STORES = {
+    'app_store': 'app_store_apps.csv',
+    'google_play': 'google_play_apps.csv',
+    'google_play_similar': 'google_play_similar_apps.csv',
+}
+
+_CAPTURE_RE = re.compile(r'^(\d{8}T\d{6}Z)\.(\w+)\.json\.(zst|gz)$')
+
+
+def _safe_key(app_id):
+    """'play:com.example.app' -> 'com.example.app' (usable as a directory name)"""
+    return re.sub(r'[^A-Za-z0-9._-]', '_', str(app_id).split(':')[-1])
+
+
+class RawArchive:
+    def __init__(self, store, root=None):
+        """
+        :param store: Store label, used as the sub-directory name
+        :param root: Archive root directory (uses CONFIG if None)
+        """
+        self.store = store
+        self.store_dir = os.path.join(root or CONFIG['ARCHIVE_DIR'], store)
+
+    def save(self, app_id, kind, content, **meta):
+        """
+        Store one raw capture
+
+        :param app_id: App id (package name, numeric id or store-prefixed id)
+        :param kind: What was captured, e.g. 'html', 'lookup', 'page'
+        :param content: Raw text as fetched
+        :param meta: Extra fields needed to reparse (url, niche, ...)
+        """
+        fetched_at = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        envelope = dict(meta, app_id=str(app_id), kind=kind, fetched_at=fetched_at, content=content)
+        data = json.dumps(envelope, ensure_ascii=False).encode('utf-8')
+        if zstandard is not None:
+            data, ext = zstandard.ZstdCompressor(level=10).compress(data), 'zst'
+        else:
+            data, ext = gzip.compress(data, compresslevel=6), 'gz'
+
+        app_dir = os.path.join(self.store_dir, _safe_key(app_id))
+        os.makedirs(app_dir, exist_ok=True)
+        path = os.path.join(app_dir, f"{fetched_at}.{kind}.json.{ext}")
+        with open(path + '.part', 'wb') as f:
+            f.write(data)
+        os.replace(path + '.part', path)
+        self._prune(app_dir, kind)
+
+    def _captures(self, app_dir, kind):
+        """Capture file names of one kind, oldest first"""
+        names = []
+        for name in os.listdir(app_dir):
+            match = _CAPTURE_RE.match(name)
+            if match and match.group(2) == kind:
+                names.append(name)
+        return sorted(names)
+
+    def _prune(self, app_dir, kind):
+        keep = CONFIG['KEEP_CAPTURES']
+        if keep:
+            for name in self._captures(app_dir, kind)[:-keep]:
+                os.remove(os.path.join(app_dir, name))
+
+    @staticmethod
+    def _read(path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path.endswith('.zst'):
+            if zstandard is None:
+                raise RuntimeError(f"{path} needs the zstandard package")
+            data = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            data = gzip.decompress(data)
+        return json.loads(data.decode('utf-8'))
+
+    def load_latest(self, app_id, kind):
+        """Latest capture of one kind for an app (the envelope dict), or None"""
+        app_dir = os.path.join(self.store_dir, _safe_key(app_id))
+        if not os.path.isdir(app_dir):
+            return None
+        names = self._captures(app_dir, kind)
+        return self._read(os.path.join(app_dir, names[-1])) if names else None
+
+    def is_empty(self):
+        """True if no app of this store has been archived"""
+        return not os.path.isdir(self.store_dir) or not any(
+            os.path.isdir(os.path.join(self.store_dir, key)) for key in os.listdir(self.store_dir))
+
+    def iter_latest(self, kind):
+        """Yield the latest capture of one kind for every archived app, in fetch order"""
+        if not os.path.isdir(self.store_dir):
+            return
+        latest = []
+        for key in os.listdir(self.store_dir):
+            app_dir = os.path.join(self.store_dir, key)
+            if os.path.isdir(app_dir):
+                names = self._captures(app_dir, kind)
+                if names:
+                    latest.append((names[-1], app_dir))
+        for name, app_dir in sorted(latest):
+            yield self._read(os.path.join(app_dir, name))
+
+
+# ===========================
+# Reparse
+# ===========================
+def reparse(store, output_file, root=None):
+    """Rebuild a store's CSV from the archive with the current parsers (no network)"""
+    archive = RawArchive(store, root)
+    if archive.is_empty():
+        print(f"✗ Nothing archived in {archive.store_dir} (is ARCHIVE_RAW_PAGES on?), {output_file} left unchanged")
+        return
+
+    # Imported here: each scraper imports this module for capturing
+    if store == 'app_store':
+        from appstore_search_by_category import AppStoreSearcher
+        searcher = AppStoreSearcher(days_threshold=90)
+        searcher.reparse_archive(archive, output_file)
+        searcher.save_to_csv(output_file)
+    elif store == 'google_play':
+        import scrape_google_play_apps
+        scrape_google_play_apps.reparse_archive(archive, output_file)
+    else:
+        from scrape_apps_by_similar import SimilarAppsScraper
+        SimilarAppsScraper().reparse_archive(archive, output_file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Raw capture archive of the scrapers")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    reparse_parser = subparsers.add_parser('reparse', help="Rebuild a CSV from archived captures, offline")
+    reparse_parser.add_argument('store', choices=sorted(STORES))
+    reparse_parser.add_argument('--output', help="Output CSV (defaults to the store's usual CSV)")
+    reparse_parser.add_argument('--archive-dir', default=CONFIG['ARCHIVE_DIR'], help="Archive root directory")
+    args = parser.parse_args()
+
+    print("="*60)
+    print(f"Reparse {args.store} from {args.archive_dir}")
+    print("="*60)
+    reparse(args.store, args.output or STORES[args.store], args.archive_dir)
+
+
+if __name__ == '__main__':
+    main()
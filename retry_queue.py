@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+Deferred Retry Queue
+====================
+Per-app failures caused by transient trouble (timeouts, connection errors,
+429/5xx responses, WebDriver errors) are not retried inline, where they
+would stall the main loop. They are parked here with their error class
+instead, and replayed at the end of the run in a few rounds with
+exponential backoff. Whatever still fails is kept in a small JSONL file
+and replayed by the next run, until MAX_ATTEMPTS is reached.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import requests
+except ImportError:
+    requests = None
+
+try:
+    from selenium.common.exceptions import WebDriverException
+except ImportError:
+    WebDriverException = None
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Directory of the persisted queues (one JSONL file per pipeline; the workflows cache it between runs)
+    'QUEUE_DIR': '.retry',
+
+    # Give up on an item after this many failed attempts (across runs)
+    'MAX_ATTEMPTS': 4,
+
+    # Replay rounds at the end of a run; round n waits BASE_DELAY * 2**(n-1) seconds first
+    'REPLAY_ROUNDS': 2,
+    'BASE_DELAY': 30,
+    'MAX_DELAY': 300,
+}
+
+
+def is_transient(error):
+    """True for failures worth retrying later (network trouble, 429/5xx, browser errors)"""
+    if requests is not None and isinstance(error, requests.RequestException):
+        response = getattr(error, 'response', None)
+        return response is None or response.status_code == 429 or response.status_code >= 500
+    if WebDriverException is not None and isinstance(error, WebDriverException):
+        return True
+    return isinstance(error, (TimeoutError, ConnectionError))
+
+
+class RetryQueue:
+    def __init__(self, name, queue_dir=None):
+        """
+        Load the items the previous run could not recover
+
+        :param name: Pipeline name, used as the file name
+        :param queue_dir: Directory of the persisted queues (uses CONFIG if None)
+        """
+        self.name = name
+        self.path = os.path.join(queue_dir or CONFIG['QUEUE_DIR'], f"{name}.jsonl")
+        self.entries = {}  # key -> entry
+        self.lock = threading.Lock()
+        self.recorded = self.recovered = self.given_up = 0
+        self.carried_over = 0
+
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.entries[entry['key']] = entry
+            self.carried_over = len(self.entries)
+            if self.carried_over:
+                print(f"[Retry] {self.carried_over} items carried over from the last run")
+
+    def __len__(self):
+        return len(self.entries)
+
+    def record(self, key, payload, error):
+        """
+        Park a failed item for a later retry
+
+        :param key: Unique item key (app id or URL)
+        :param payload: JSON-serialisable data the replay handler needs
+        :param error: The exception that made the item fail
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                entry = {'key': key, 'payload': payload, 'attempts': 0,
+                         'first_failed': datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+                self.entries[key] = entry
+            entry['attempts'] += 1
+            entry['error_class'] = error.__class__.__name__
+            entry['error'] = str(error)[:200]
+            self.recorded += 1
+
+    def discard(self, key):
+        """Drop an item that succeeded some other way (e.g. found again by this run)"""
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def replay(self, handler, rounds=None, deadline=None):
+        """
+        Retry the parked items with exponential backoff between rounds
+
+        :param handler: Called with an item's payload; it raises to signal another failure
+        :param rounds: Replay rounds (uses CONFIG if None)
+        :param deadline: Optional time.monotonic() value; no new round starts after it
+        :return: Number of items recovered
+        """
+        recovered = 0
+        rounds = CONFIG['REPLAY_ROUNDS'] if rounds is None else rounds
+        for round_number in range(1, rounds + 1):
+            with self.lock:
+                # Items over the cap are dropped, not retried
+                for key in [k for k, e in self.entries.items() if e['attempts'] >= CONFIG['MAX_ATTEMPTS']]:
+                    entry = self.entries.pop(key)
+                    self.given_up += 1
+                    print(f"[Retry] Giving up on {key} after {entry['attempts']} attempts ({entry['error_class']})")
+                pending = list(self.entries.values())
+            if not pending:
+                break
+
+            delay = min(CONFIG['MAX_DELAY'], CONFIG['BASE_DELAY'] * 2 ** (round_number - 1))
+            if deadline is not None and time.monotonic() + delay > deadline:
+                print("[Retry] Not enough time left for another replay round")
+                break
+            print(f"[Retry] Round {round_number}: {len(pending)} items in {delay}s")
+            time.sleep(delay)
+
+            for entry in pending:
+                try:
+                    handler(entry['payload'])
+                except Exception as e:
+                    if is_transient(e):
+                        self.record(entry['key'], entry['payload'], e)
+                    else:
+                        # A permanent failure now; retrying again would not help
+                        self.discard(entry['key'])
+                        self.given_up += 1
+                        print(f"[Retry] Dropping {entry['key']}: {e.__class__.__name__}: {e}")
+                    continue
+                self.discard(entry['key'])
+                recovered += 1
+
+        self.recovered += recovered
+        self.save()
+        return recovered
+
+    def save(self):
+        """Persist what is still failing for the next run"""
+        with self.lock:
+            entries = list(self.entries.values())
+        # The directory is kept even when empty: CI caches it, and a missing path would
+        # leave the previous run's (stale) cache entry to be restored next time
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if not entries:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        with open(self.path + '.part', 'w', encoding='utf-8') as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        os.replace(self.path + '.part', self.path)
+
+    def summary(self):
+        print(f"[Retry] {self.name}: {self.recorded} failures parked, {self.recovered} recovered, "
+              f"{self.given_up} given up, {len(self.entries)} left for the next run")
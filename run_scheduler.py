@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+Deadline-Aware Run Scheduler
+============================
+Shared by the three scrapers so a time-boxed nightly run does its most
+valuable work first and stops cleanly before the CI job is killed:
+
+1. order(): unseen apps first, then the stalest refreshes, and apps of
+   low-yield niches (few apps pass the filters there) last.
+2. done() keeps a rolling (EWMA) seconds-per-item estimate, so can_start()
+   can tell whether the remaining items still fit before the deadline,
+   leaving SAFETY_MARGIN seconds to flush output. Pipelines that finish many
+   items with one request call tick(items) per request and done(tick=False)
+   per item instead, so the request's time is divided over its items.
+3. When each app was last processed (for LAST_SEEN_DAYS) and how each niche
+   yielded are kept in a small state file between runs.
+
+The budget comes from the RUN_BUDGET_MINUTES environment variable (set by
+the workflows); without it there is no deadline and only the ordering applies.
+"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Directory of the per-pipeline state files
+    'STATE_DIR': '.scheduler',
+
+    # Seconds kept free before the deadline for saving and uploading
+    'SAFETY_MARGIN': 300,
+
+    # Weight of the newest item in the rolling seconds-per-item estimate
+    'EWMA_ALPHA': 0.2,
+
+    # A niche yields "low" when under this share of its apps were saved (after MIN_NICHE_ATTEMPTS)
+    'LOW_YIELD': 0.05,
+    'MIN_NICHE_ATTEMPTS': 20,
+
+    # Apps not processed for this many days are forgotten (they count as unseen again)
+    'LAST_SEEN_DAYS': 90,
+}
+
+
+def _now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class DeadlineScheduler:
+    def __init__(self, name, budget_seconds=None, state_dir=None):
+        """
+        :param name: Pipeline name, used for the state file
+        :param budget_seconds: Wall-clock budget of the run (RUN_BUDGET_MINUTES env if None, no deadline if unset)
+        :param state_dir: Directory of the state files (uses CONFIG if None)
+        """
+        if budget_seconds is None and os.environ.get('RUN_BUDGET_MINUTES'):
+            budget_seconds = float(os.environ['RUN_BUDGET_MINUTES']) * 60
+        self.name = name
+        self.started = time.monotonic()
+        self.deadline = None if budget_seconds is None else self.started + budget_seconds - CONFIG['SAFETY_MARGIN']
+        self.path = os.path.join(state_dir or CONFIG['STATE_DIR'], f"{name}.json")
+        self.state = {'last_seen': {}, 'niches': {}, 'seconds_per_item': None}
+        if os.path.exists(self.path):
+            with open(self.path, encoding='utf-8') as f:
+                self.state.update(json.load(f))
+        self.last_done = None
+        self.completed = 0
+        self.lock = threading.Lock()  # Workers of the similar-apps crawl report concurrently
+        self.stopped_early = False
+
+    # ---------------------------------------------------------
+    # Ordering
+    # ---------------------------------------------------------
+    def niche_yield(self, niche):
+        """Share of a niche's processed apps that were saved (None until MIN_NICHE_ATTEMPTS)"""
+        stats = self.state['niches'].get(niche)
+        if not stats or stats['attempts'] < CONFIG['MIN_NICHE_ATTEMPTS']:
+            return None
+        return stats['accepted'] / stats['attempts']
+
+    def order(self, items, key, niche=None):
+        """
+        Sort work by expected value
+
+        :param items: Work items
+        :param key: item -> app key (as passed to done())
+        :param niche: item -> niche name, or None if the pipeline has no niches
+        :return: New list: unseen apps, then stalest first; low-yield niches last
+        """
+        last_seen = self.state['last_seen']
+
+        def priority(item):
+            niche_yield = self.niche_yield(niche(item)) if niche else None
+            low_yield = niche_yield is not None and niche_yield < CONFIG['LOW_YIELD']
+            seen = last_seen.get(key(item))
+            return (low_yield, seen is not None, seen or '', -(niche_yield or 0.0))
+
+        return sorted(items, key=priority)
+
+    # ---------------------------------------------------------
+    # Throughput and deadline
+    # ---------------------------------------------------------
+    def tick(self, items=1):
+        """
+        Count finished work in the seconds-per-item estimate
+
+        :param items: Items finished together since the last tick (e.g. the apps of one
+                      batched request); the elapsed time is divided over them
+        """
+        with self.lock:
+            self._tick(items)
+
+    def _tick(self, items=1):
+        now = time.monotonic()
+        last_done, self.last_done = self.last_done, now
+        if last_done is None or items < 1:
+            return  # The first item also paid for the set-up; the last run's estimate stands
+        elapsed = (now - last_done) / items
+        average = self.state['seconds_per_item']
+        alpha = CONFIG['EWMA_ALPHA']
+        self.state['seconds_per_item'] = elapsed if average is None else (1 - alpha) * average + alpha * elapsed
+
+    def done(self, key, niche=None, accepted=False, tick=True):
+        """
+        Record a processed app: throughput, when it was last seen, and its niche's yield
+
+        :param tick: Count it in the throughput estimate (False when the caller ticks per request)
+        """
+        with self.lock:
+            if tick:
+                self._tick()
+            self.completed += 1
+            self.state['last_seen'][key] = _now_iso()
+            if niche is not None:
+                stats = self.state['niches'].setdefault(niche, {'attempts': 0, 'accepted': 0})
+                stats['attempts'] += 1
+                stats['accepted'] += bool(accepted)
+
+    def time_left(self):
+        """Seconds until the deadline (None without a budget)"""
+        return None if self.deadline is None else self.deadline - time.monotonic()
+
+    def can_start(self, items=1):
+        """True if `items` more items are expected to finish before the deadline"""
+        if self.deadline is None:
+            return True
+        average = self.state['seconds_per_item'] or 0.0
+        return time.monotonic() + average * items <= self.deadline
+
+    def should_stop(self):
+        """True (and logged once) when the next item would no longer fit before the deadline"""
+        if self.can_start():
+            return False
+        if not self.stopped_early:
+            self.stopped_early = True
+            print(f"⏱ [{self.name}] Deadline reached after {self.completed} items "
+                  f"(~{self.state['seconds_per_item'] or 0:.1f}s per item), stopping to flush results")
+        return True
+
+    def save(self):
+        """Write the state file, dropping last_seen entries older than LAST_SEEN_DAYS"""
+        # ISO timestamps in UTC sort like the times they stand for
+        horizon = (datetime.now(timezone.utc) - timedelta(days=CONFIG['LAST_SEEN_DAYS'])).strftime('%Y-%m-%dT%H:%M:%SZ')
+        with self.lock:
+            last_seen = self.state['last_seen']
+            for key in [k for k, seen in last_seen.items() if seen < horizon]:
+                del last_seen[key]
+            data = json.dumps(self.state, separators=(',', ':'), sort_keys=True)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.part', 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(self.path + '.part', self.path)
+
+    def summary(self):
+        elapsed = time.monotonic() - self.started
+        print(f"[{self.name}] {self.completed} items in {elapsed / 60:.1f} min"
+              + (" (stopped at the deadline)" if self.stopped_early else ""))
@@ -4,22 +4,53 @@ Google Play Store App Scraper (Similar Apps Method)
 ===================================================
 1. PHASE 1: Crawl & collect app URLs starting from a SEED URL using "Similar Apps" links.
 2. PHASE 2: Extract detailed data for each collected app.
+
+The similar-app edges and which apps were saved accumulate across runs in a
+compact graph (similar_graph.py); its PageRank x acceptance-density ranking
+picks the seed and orders the crawl frontier.
+
+With MULTI_SEED, the crawl starts from every app_links entry at once, and
+CRAWL_WORKERS browsers share one frontier and visited set; CRAWL_DEPTH and
+MAX_APPS_TO_SCRAPE apply to the whole crawl. The frontier works on the
+graph's integer node ids, not URLs (crawl_frontier.py).
+
+With a time budget (RUN_BUDGET_MINUTES), the crawl stops expanding once the
+apps already collected would use up the rest of it, and Phase 2 extracts
+unseen apps first (run_scheduler.py).
+
+With --queue, crawlers on several runners share the frontier through a work
+queue (work_queue.py); each extracts the apps it claimed right after expanding
+them (an app's unit stays leased until then) into its own CSV, appended to
+OUTPUT_CSV afterwards with --merge.
 """
 
+import argparse
 import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
 import time
 import csv
 import os
 import re
 from datetime import datetime
-from collections import deque, Counter
+from collections import Counter
+
+from app_record import AppRecord, CSV_COLUMNS, parse_install_count
+from browser_service import BrowserSession
+from crawl_frontier import QueueFrontier, SharedFrontier, app_url, package_from_url
+from play_page_script import extract_app_page, extract_detail_links
+from raw_archive import RawArchive
+from profiling import RunProfiler
+from retry_queue import RetryQueue, is_transient
+from run_scheduler import DeadlineScheduler
+from similar_graph import SimilarGraph
+from work_queue import SQLiteWorkQueue, merge_worker_csvs, worker_file
+from rate_controller import AdaptiveRateController
 
 app_links = [
 "https://play.google.com/store/apps/details?id=com.artmvstd.pregnancyChecker",
@@ -69,7 +100,8 @@ CONFIG = {
     'MAX_APPS_TO_SCRAPE': 3000, 
     
     # The starting app URL too find similar apps from
-    'SEED_APP_URL': random.choice(app_links),
+    # (None = best-ranked app of the similar-apps graph, a random app_links entry while the graph is empty)
+    'SEED_APP_URL': None,
     
     # Output file name (shared with category scraper)
     'OUTPUT_CSV': 'google_play_similar_apps.csv',
@@ -86,7 +118,31 @@ CONFIG = {
     # Crawling settings
     'CRAWL_DEPTH': 10,
     'MAX_SIMILAR_APPS_PER_PAGE': 20,
-    'DELAY_BETWEEN_REQUESTS': 1
+    
+    # Seed from every app_links entry at once instead of a single seed
+    'MULTI_SEED': False,
+    
+    # Browser workers sharing the frontier (each runs its own Chrome, or tab of the shared browser).
+    # They share RATE_LIMIT too, so raise MAX_RATE along with the worker count.
+    'CRAWL_WORKERS': 1,
+    
+    # Read pages in Chrome with one execute_script (links + app fields as a small JSON object)
+    # instead of per-link WebDriver calls and a page source transfer. The fields read while
+    # crawling are reused by Phase 2, so collected pages are not loaded twice.
+    # Raw-page archiving still loads and transfers the page source in Phase 2.
+    'IN_BROWSER_EXTRACTION': True,
+    
+    # Keep the raw page source of every app page in the compressed archive, so the
+    # CSV can be rebuilt offline with `python raw_archive.py reparse google_play_similar`
+    'ARCHIVE_RAW_PAGES': False,
+    
+    # Adaptive page-load rate for play.google.com (pages per second), replaces fixed delays
+    'RATE_LIMIT': {
+        'INITIAL_RATE': 1.0,
+        'MIN_RATE': 0.1,
+        'MAX_RATE': 3.0,
+        'LATENCY_THRESHOLD': 15.0,
+    },
 }
 
 # ===========================
@@ -130,34 +186,83 @@ def extract_keywords_from_description(description, num_keywords=5):
 # MAIN SCRAPER CLASS
 # ===========================
 class SimilarAppsScraper:
-    def __init__(self):
-        self.driver = None
-        self.visited_apps = set()
-        self.apps_to_visit = deque()
+    def __init__(self, queue=None):
+        """
+        :param queue: WorkQueue shared with crawlers on other runners (None = crawl alone).
+                      Each runner extracts the apps it claimed into its own CSV.
+        """
+        self._local = threading.local()  # One BrowserSession per worker thread
+        self.browsers = []       # Every BrowserSession started, closed at the end
+        self.idle_browsers = []  # Sessions released by finished workers
+        self.graph = SimilarGraph.load()  # Also maps package ids to the node ids the frontier works on
+        self.lock = threading.Lock()  # Guards the graph, the CSV and the saved count
+        self.queue = queue
+        if queue is None:
+            self.frontier = SharedFrontier(CONFIG['MAX_APPS_TO_SCRAPE'])
+            self.output_csv = CONFIG['OUTPUT_CSV']
+        else:
+            self.frontier = QueueFrontier(queue, CONFIG['MAX_APPS_TO_SCRAPE'],
+                                          lambda node: self.graph.nodes[node], self.node_id)
+            self.output_csv = worker_file(CONFIG['OUTPUT_CSV'], queue.worker)
         self.apps_saved_count = 0
+        self.rate_controller = AdaptiveRateController(CONFIG['RATE_LIMIT'])
+        self.archive = RawArchive('google_play_similar') if CONFIG['ARCHIVE_RAW_PAGES'] else None
+        self.retry_queue = RetryQueue('google_play_similar')
+        self.scheduler = DeadlineScheduler('google_play_similar')
+        self.profiler = RunProfiler('google_play_similar')  # Off unless SCRAPER_PROFILE is set
+        # Node id -> AppRecord (None if filtered out) parsed from the page read in Phase 1
+        # (IN_BROWSER_EXTRACTION), used once by Phase 2; filtered apps keep no fields
+        self.page_records = {}
         
-    def initialize_driver(self):
-        """Initialize Chrome WebDriver in Headless Mode"""
-        chrome_options = Options()
-        # Headless mode allows it to run in the background or on GitHub Actions
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        print("WebDriver initialized.")
+    @property
+    def browser(self):
+        """This worker's BrowserSession (an idle one from an earlier worker is reused)"""
+        browser = getattr(self._local, 'browser', None)
+        if browser is None:
+            with self.lock:
+                browser = self.idle_browsers.pop() if self.idle_browsers else None
+                if browser is None:
+                    browser = BrowserSession()
+                    self.browsers.append(browser)
+            self._local.browser = browser
+        return browser
+
+    def release_browser(self):
+        """Hand this worker's BrowserSession back for the next worker"""
+        browser = getattr(self._local, 'browser', None)
+        if browser is not None:
+            self._local.browser = None
+            with self.lock:
+                self.idle_browsers.append(browser)
+
+    @property
+    def driver(self):
+        """Headless Chrome, started on first use (or attached to `browser_service.py start`)"""
+        return self.browser.driver
+
+    def load_page(self, url):
+        """Navigate the browser to a URL, paced by the rate controller (the session recycles Chrome as needed)"""
+        self.rate_controller.wait(url)
+        start = time.monotonic()
+        try:
+            self.browser.get(url)
+        except Exception:
+            self.rate_controller.record(url, latency=time.monotonic() - start, failed=True)
+            raise
+        # Google redirects throttled clients to its /sorry/ captcha page
+        status_code = 429 if '/sorry/' in self.driver.current_url else None
+        self.rate_controller.record(url, status_code, time.monotonic() - start)
     
     def extract_app_id_from_url(self, url):
         """Extract app package ID from Play Store URL"""
-        match = re.search(r'id=([a-zA-Z0-9._]+)', url)
-        return match.group(1) if match else None
+        return package_from_url(url)
     
-    def get_similar_apps(self, app_url):
-        """Get similar apps from an app page (Phase 1)"""
+    def get_similar_apps(self, app_url, app_id, node):
+        """Get similar apps from an app page (Phase 1), as graph node ids not visited yet"""
         similar_apps = []
+        similar_ids = []
         try:
-            self.driver.get(app_url)
+            self.load_page(app_url)
             time.sleep(0.5) 
             
             # Wait for basic body presence
@@ -175,27 +280,120 @@ class SimilarAppsScraper:
             time.sleep(0.5)
             
             # Get all links matching an app detail URL
-            all_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, '/store/apps/details?id=')]")
+            if CONFIG['IN_BROWSER_EXTRACTION'] and self.archive is None:
+                page_data = extract_app_page(self.driver)
+                hrefs = page_data.pop('links')
+                self.page_records[node] = self.parse_page_data(page_data, app_url)
+            elif CONFIG['IN_BROWSER_EXTRACTION']:
+                hrefs = extract_detail_links(self.driver)
+            else:
+                hrefs = []
+                all_links = self.driver.find_elements(By.XPATH, "//a[contains(@href, '/store/apps/details?id=')]")
+                for link in all_links[:CONFIG['MAX_SIMILAR_APPS_PER_PAGE']]:
+                    try:
+                        hrefs.append(link.get_attribute('href'))
+                    except:
+                        pass
             
-            for link in all_links[:CONFIG['MAX_SIMILAR_APPS_PER_PAGE']]:
-                try:
-                    href = link.get_attribute('href')
-                    if href and '/store/apps/details?id=' in href:
-                        # Clean URL
-                        if '&' in href:
-                            href = href.split('&')[0]
-                        full_url = href if href.startswith('http') else 'https://play.google.com' + href
-                        
-                        app_id = self.extract_app_id_from_url(full_url)
-                        if app_id and app_id not in self.visited_apps:
-                            similar_apps.append(full_url)
-                except:
-                    pass
+            # The package id is parsed once per link; URLs are rebuilt only for pages loaded later
+            for href in hrefs[:CONFIG['MAX_SIMILAR_APPS_PER_PAGE']]:
+                similar_id = package_from_url(href)
+                if similar_id:
+                    similar_ids.append(similar_id)
+            
+            # Keep the edges for seed selection and frontier ranking in later runs
+            with self.lock:
+                nodes = self.graph.add_edges(app_id, similar_ids)
+            similar_apps = [node for node in dict.fromkeys(nodes) if node not in self.frontier.visited]
                     
         except Exception as e:
             print(f"Error collecting similar apps: {e}")
             
-        return list(set(similar_apps))
+        return similar_apps
+    
+    def push_frontier(self, node, depth):
+        """Queue a graph node on the shared frontier, prioritised by its graph score"""
+        self.frontier.push(node, depth, self.graph.node_score(node))
+    
+    def node_id(self, app_id):
+        """Graph node id of a package (added to the graph if new)"""
+        with self.lock:
+            return self.graph.node_id(app_id)
+    
+    def push_seed(self, url):
+        """Queue a seed URL (depth 0)"""
+        app_id = self.extract_app_id_from_url(url)
+        if app_id:
+            self.push_frontier(self.node_id(app_id), 0)
+    
+    def crawl_worker(self):
+        """
+        Phase 1 worker: claim apps from the shared frontier and queue their similar apps.
+        With a work queue, the worker also extracts each app it claimed (extract_claimed),
+        so the app's node stays leased until its row is saved.
+        """
+        try:
+            while True:
+                if self.queue is not None and self.scheduler.should_stop():
+                    return
+                claimed = self.frontier.claim()
+                if claimed is None:
+                    return
+                node, depth = claimed
+                app_id = self.graph.nodes[node]
+                outcome = 'unfinished'
+                try:
+                    print(f"Found [{len(self.frontier.collected)}/{CONFIG['MAX_APPS_TO_SCRAPE']}]: {app_id}")
+                    # Expand only while the apps still to extract (plus this page) fit the budget
+                    to_extract = 1 if self.queue is not None else len(self.frontier.collected) + 1
+                    if (depth < CONFIG['CRAWL_DEPTH'] and not self.frontier.is_full()
+                            and self.scheduler.can_start(to_extract)):
+                        for similar in self.get_similar_apps(app_url(app_id), app_id, node):
+                            self.push_frontier(similar, depth + 1)
+                        if self.queue is None:
+                            self.scheduler.tick()  # With a queue, extract_claimed() counts the app once
+                    if self.queue is not None:
+                        outcome = self.extract_claimed(app_id)
+                finally:
+                    if self.queue is None:
+                        self.frontier.release()
+                    else:
+                        self.frontier.release(outcome)
+        except Exception as e:
+            print(f"Crawl worker stopped: {e}")
+        finally:
+            if threading.current_thread() is not threading.main_thread():
+                self.release_browser()
+    
+    def extract_and_save(self, url, app_id=None):
+        """Phase 2 task: extract one app and save it if it passed the filters"""
+        self.retry_queue.discard(url)  # Carried over from the last run, but fetched now anyway
+        app_data = self.extract_app_details(url, app_id)
+        self.scheduler.done(url, accepted=app_data is not None)
+        if app_data:
+            with self.lock, self.profiler.phase('write'):
+                self.save_to_csv(app_data)
+    
+    def extract_claimed(self, app_id):
+        """
+        Queued crawl: extract an app this worker claimed, right after expanding it
+        (usually from the page just read). Transient failures go back to the work queue.
+        
+        :return: Outcome for QueueFrontier.release(): 'done', 'failed' or 'unfinished'
+        """
+        if self.scheduler.should_stop():
+            return 'unfinished'
+        url = app_url(app_id)
+        try:
+            app_data = self.fetch_app_details(url, app_id)
+        except Exception as e:
+            print(f"Error extracting details for {url}: {e}")
+            return 'failed' if is_transient(e) else 'done'
+        self.scheduler.done(url, accepted=app_data is not None)
+        if app_data:
+            with self.lock, self.profiler.phase('write'):
+                self.save_to_csv(app_data)
+        return 'done'
     
     # ---------------------------------------------------------
     # DATA EXTRACTION METHODS (From scrape_categories_to_csv)
@@ -224,29 +422,69 @@ class SimilarAppsScraper:
             return install_text.strip()
         return "N/A"
 
-    def parse_install_count(self, install_str):
-        """Parse install count string to integer"""
-        if not install_str or install_str == "N/A":
-            return 0
-            
-        clean_str = install_str.upper().replace(',', '').replace('+', '').replace(' ', '')
-        
+    def scan_install_count(self, page_source):
+        """Cheap string scan for the install count (the ClM7O stat value containing '+')"""
+        for match in re.finditer(r'<div class="ClM7O">([^<]*)<', page_source):
+            text = match.group(1).strip()
+            if '+' in text:
+                return text
+        return "N/A"
+
+    def prefilter_app_page(self, page_source, app_url):
+        """
+        Stage 1: evaluate the release-date and install filters with plain string
+        scans of the page source, before paying for a full BeautifulSoup parse.
+        Returns the release date for apps that pass, None otherwise.
+        """
+        release_date = self.extract_release_date(page_source, app_url)
+        if not self.passes_date_filter(release_date):
+            return None
+
+        # --- Install Count Filter Logic ---
+        # Only reject when the scan actually found a value; otherwise the full parse decides
+        if 'MIN_INSTALLS' in CONFIG and CONFIG['MIN_INSTALLS'] > 0:
+            install_count = self.scan_install_count(page_source)
+            if install_count != "N/A" and parse_install_count(install_count) < CONFIG['MIN_INSTALLS']:
+                print(f"    [Skipping] Install count '{install_count}' is below {CONFIG['MIN_INSTALLS']} limit.")
+                return None
+
+        return release_date
+
+    def passes_date_filter(self, release_date):
+        """Release-date filter (ONLY_RECENT_APPS / MONTHS_THRESHOLD)"""
+        if not CONFIG['ONLY_RECENT_APPS']:
+            return True
         try:
-            if 'K' in clean_str:
-                return int(float(clean_str.replace('K', '')) * 1000)
-            elif 'M' in clean_str:
-                return int(float(clean_str.replace('M', '')) * 1000000)
-            elif 'B' in clean_str:
-                return int(float(clean_str.replace('B', '')) * 1000000000)
-            else:
-                return int(float(clean_str))
-        except ValueError:
-            return 0
+            parsed_date = datetime.strptime(release_date, "%b %d, %Y")
+            now = datetime.now()
+            months_diff = (now.year - parsed_date.year) * 12 + (now.month - parsed_date.month)
+            months_threshold = CONFIG.get('MONTHS_THRESHOLD', 3)
+            if not (0 <= months_diff < months_threshold):
+                print(f"    [Skipping] Release date '{release_date}' is outside {months_threshold} month window.")
+                return False
+        except Exception as e:
+            print(f"    [Skipping] Could not verify release date: {release_date}")
+            return False
+        return True
 
-    def extract_app_details(self, app_url):
-        """Extract detailed information from the app page (Phase 2)"""
+    def extract_app_details(self, app_url, app_id=None):
+        """Load an app page and extract its details (Phase 2); transient failures go to the retry queue"""
         try:
-            self.driver.get(app_url)
+            return self.fetch_app_details(app_url, app_id)
+        except Exception as e:
+            print(f"Error extracting details for {app_url}: {e}")
+            if is_transient(e):
+                self.retry_queue.record(app_url, {'url': app_url}, e)
+            return None
+
+    def fetch_app_details(self, app_url, app_id=None):
+        """Like extract_app_details(), but browser failures are raised"""
+        app_id = app_id or self.extract_app_id_from_url(app_url)
+        node = self.graph.index.get(app_id)
+        if node in self.page_records:  # Already read while crawling
+            record = self.page_records.pop(node)
+        else:
+            self.load_page(app_url)
             
             try:
                 WebDriverWait(self.driver, 5).until(
@@ -257,147 +495,165 @@ class SimilarAppsScraper:
             
             time.sleep(1) # Buffer to render JS elements
             
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            # --- Extract App Name ---
-            app_name = "N/A"
-            app_name_tag = soup.find('h1', {'itemprop': 'name'})
-            if app_name_tag:
-                app_name = app_name_tag.text.strip()
-            if app_name == "N/A":
-                app_name_tag = soup.find('h1', {'class': 'Fd93Bb'})
-                if app_name_tag:
-                     app_name = app_name_tag.text.strip()
-            if app_name == "N/A":
-                title_tag = soup.find('title')
-                if title_tag:
-                    title_text = title_tag.text.strip()
-                    app_name = title_text.replace(" - Apps on Google Play", "") if " - Apps on Google Play" in title_text else title_text
-
-            # --- Extract Install Count ---
-            install_count = "N/A"
-            stats_values = soup.find_all('div', {'class': 'ClM7O'})
-            for val in stats_values:
-                text = val.text.strip()
-                if '+' in text:
-                    install_count = text
-                    break
-            if install_count == "N/A":
-                install_count = self.extract_install_count(page_source)
-
-            # --- Extract Developer name ---
-            developer_tag = soup.find('div', {'class': 'Vbfug auoIOc'})
-            if not developer_tag:
-                developer_tag = soup.find('a', {'class': 'Si6A0c Gwdmqd'})
-            developer = developer_tag.text.strip() if developer_tag else "N/A"
-            
-            # --- Extract Logo URL ---
-            logo_tag = soup.find('img', {'class': 'T75of arM4bb', 'itemprop': 'image'})
-            if not logo_tag:
-                logo_tag = soup.find('img', {'itemprop': 'image'})
-            logo_url = logo_tag['src'] if logo_tag and 'src' in logo_tag.attrs else "N/A"
-            
-            # --- Extract up to 4 Screenshots ---
-            # Use alt='Screenshot image' attribute which is specific to screenshots in Google Play
-            screenshot_imgs = [
-                img.get('src') for img in soup.find_all('img', alt='Screenshot image')
-                if img.get('src') and 'play-lh.googleusercontent.com' in img.get('src', '')
-            ]
-            seen = set()
-            screenshot_imgs_deduped = []
-            for s in screenshot_imgs:
-                if s not in seen:
-                    seen.add(s)
-                    screenshot_imgs_deduped.append(s)
-            screenshots = screenshot_imgs_deduped[:4]
-            while len(screenshots) < 4:
-                screenshots.append('N/A')
-            
-            # --- Extract Rating ---
-            rating_tag = soup.find('div', {'class': 'jILTFe'})
-            rating = rating_tag.text.strip() if rating_tag else "N/A"
-            
-            # --- Extract Review Count ---
-            review_count_tag = soup.find('div', {'class': 'g1rdde'})
-            review_count = review_count_tag.text.strip() if review_count_tag else "N/A"
-            if rating == "N/A" or "Download" in review_count or "Install" in review_count:
-                review_count = "N/A"
-            
-            # --- Extract Release Date ---
-            release_date = self.extract_release_date(page_source, app_url)
-            
-            # --- Extract Description ---
-            description = "N/A"
-            description_tag = soup.find('div', {'data-expandable-section': True})
-            if description_tag:
-                description = description_tag.text.strip()
+            if CONFIG['IN_BROWSER_EXTRACTION'] and self.archive is None:
+                record = self.parse_page_data(extract_app_page(self.driver), app_url)
             else:
-                # Try alternative selectors
-                desc_tags = soup.find_all('div', {'class': 'bARER'})
-                if desc_tags:
-                    description = ' '.join([tag.text.strip() for tag in desc_tags])
-            
-            # --- Extract Keywords from Description ---
-            keywords = extract_keywords_from_description(description)
-            
-            # --- Extract Category (Niche) ---
-            category_name = "General"
+                page_source = self.driver.page_source
+                if self.archive is not None:
+                    self.archive.save(app_id or app_url, 'html', page_source, url=app_url)
+                record = self.parse_app_page(page_source, app_url)
+        with self.lock:
+            self.graph.set_status(app_id, record is not None)
+        return record
 
-            # --- Date Filter Logic ---
-            if CONFIG['ONLY_RECENT_APPS']:
-                try:
-                    parsed_date = datetime.strptime(release_date, "%b %d, %Y")
-                    now = datetime.now()
-                    months_diff = (now.year - parsed_date.year) * 12 + (now.month - parsed_date.month)
-                    months_threshold = CONFIG.get('MONTHS_THRESHOLD', 3)
-                    if not (0 <= months_diff < months_threshold):
-                        print(f"    [Skipping] Release date '{release_date}' is outside {months_threshold} month window.")
-                        return None
-                except Exception as e:
-                    print(f"    [Skipping] Could not verify release date: {release_date}")
-                    return None
-
-            # --- Install Count Filter Logic ---
-            if 'MIN_INSTALLS' in CONFIG and CONFIG['MIN_INSTALLS'] > 0:
-                parsed_installs = self.parse_install_count(install_count)
-                if parsed_installs < CONFIG['MIN_INSTALLS']:
-                    print(f"    [Skipping] Install count '{install_count}' is below {CONFIG['MIN_INSTALLS']} limit.")
-                    return None
-
-            return {
-                'Niche': category_name,
-                'App Name': app_name,
-                'Logo URL': logo_url,
-                'Install Count': install_count,
-                'Release Date': release_date,
-                'Rating': rating,
-                'Review Count': review_count,
-                'App Link': app_url,
-                'Developer': developer,
-                'Description': description,
-                'Keywords': keywords,
-                'Screenshot 1': screenshots[0],
-                'Screenshot 2': screenshots[1],
-                'Screenshot 3': screenshots[2],
-                'Screenshot 4': screenshots[3],
-            }
-            
-        except Exception as e:
-            print(f"Error extracting details for {app_url}: {e}")
+    def parse_app_page(self, page_source, app_url):
+        """Parse an app page source into an AppRecord (None if filtered out); no network"""
+        # --- Stage 1: cheap filters on the raw page source ---
+        release_date = self.prefilter_app_page(page_source, app_url)
+        if release_date is None:
+            return None
+
+        # --- Stage 2: full parse for apps that survived the filters ---
+        soup = BeautifulSoup(page_source, 'html.parser')
+        
+        # --- Extract App Name ---
+        app_name = "N/A"
+        app_name_tag = soup.find('h1', {'itemprop': 'name'})
+        if app_name_tag:
+            app_name = app_name_tag.text.strip()
+        if app_name == "N/A":
+            app_name_tag = soup.find('h1', {'class': 'Fd93Bb'})
+            if app_name_tag:
+                 app_name = app_name_tag.text.strip()
+        if app_name == "N/A":
+            title_tag = soup.find('title')
+            if title_tag:
+                title_text = title_tag.text.strip()
+                app_name = title_text.replace(" - Apps on Google Play", "") if " - Apps on Google Play" in title_text else title_text
+
+        # --- Extract Install Count ---
+        install_count = "N/A"
+        stats_values = soup.find_all('div', {'class': 'ClM7O'})
+        for val in stats_values:
+            text = val.text.strip()
+            if '+' in text:
+                install_count = text
+                break
+        if install_count == "N/A":
+            install_count = self.extract_install_count(page_source)
+
+        # --- Extract Developer name ---
+        developer_tag = soup.find('div', {'class': 'Vbfug auoIOc'})
+        if not developer_tag:
+            developer_tag = soup.find('a', {'class': 'Si6A0c Gwdmqd'})
+        developer = developer_tag.text.strip() if developer_tag else "N/A"
+        
+        # --- Extract Logo URL ---
+        logo_tag = soup.find('img', {'class': 'T75of arM4bb', 'itemprop': 'image'})
+        if not logo_tag:
+            logo_tag = soup.find('img', {'itemprop': 'image'})
+        logo_url = logo_tag['src'] if logo_tag and 'src' in logo_tag.attrs else "N/A"
+        
+        # --- Extract up to 4 Screenshots ---
+        # Use alt='Screenshot image' attribute which is specific to screenshots in Google Play
+        screenshot_imgs = [
+            img.get('src') for img in soup.find_all('img', alt='Screenshot image')
+            if img.get('src') and 'play-lh.googleusercontent.com' in img.get('src', '')
+        ]
+        seen = set()
+        screenshot_imgs_deduped = []
+        for s in screenshot_imgs:
+            if s not in seen:
+                seen.add(s)
+                screenshot_imgs_deduped.append(s)
+        screenshots = screenshot_imgs_deduped[:4]
+        while len(screenshots) < 4:
+            screenshots.append('N/A')
+        
+        # --- Extract Rating ---
+        rating_tag = soup.find('div', {'class': 'jILTFe'})
+        rating = rating_tag.text.strip() if rating_tag else "N/A"
+        
+        # --- Extract Review Count ---
+        review_count_tag = soup.find('div', {'class': 'g1rdde'})
+        review_count = review_count_tag.text.strip() if review_count_tag else "N/A"
+        if rating == "N/A" or "Download" in review_count or "Install" in review_count:
+            review_count = "N/A"
+        
+        # --- Extract Description ---
+        description = "N/A"
+        description_tag = soup.find('div', {'data-expandable-section': True})
+        if description_tag:
+            description = description_tag.text.strip()
+        else:
+            # Try alternative selectors
+            desc_tags = soup.find_all('div', {'class': 'bARER'})
+            if desc_tags:
+                description = ' '.join([tag.text.strip() for tag in desc_tags])
+        
+        # --- Extract Keywords from Description ---
+        keywords = extract_keywords_from_description(description)
+        
+        # --- Extract Category (Niche) ---
+        category_name = "General"
+
+        record = AppRecord(
+            niche=category_name,
+            app_name=app_name,
+            logo_url=logo_url,
+            install_count=install_count,
+            release_date=release_date,
+            rating=rating,
+            review_count=review_count,
+            app_link=app_url,
+            developer=developer,
+            description=description,
+            keywords=keywords,
+            screenshots=screenshots,
+        )
+
+        # --- Install Count Filter Logic ---
+        if 'MIN_INSTALLS' in CONFIG and CONFIG['MIN_INSTALLS'] > 0:
+            if record.installs < CONFIG['MIN_INSTALLS']:
+                print(f"    [Skipping] Install count '{install_count}' is below {CONFIG['MIN_INSTALLS']} limit.")
+                return None
+
+        return record
+
+    def parse_page_data(self, page_data, app_url):
+        """Build an AppRecord from extract_app_page() fields (None if filtered out), with parse_app_page()'s filters"""
+        if not self.passes_date_filter(page_data['release_date']):
             return None
 
-    def save_to_csv(self, app_data):
-        """Save app data to CSV file (append mode, no overwrites)"""
+        record = AppRecord(
+            niche="General",
+            app_name=page_data['app_name'],
+            logo_url=page_data['logo_url'],
+            install_count=page_data['install_count'],
+            release_date=page_data['release_date'],
+            rating=page_data['rating'],
+            review_count=page_data['review_count'],
+            app_link=app_url,
+            developer=page_data['developer'],
+            description=page_data['description'],
+            keywords=extract_keywords_from_description(page_data['description']),
+            screenshots=page_data['screenshots'],
+        )
+
+        if 'MIN_INSTALLS' in CONFIG and CONFIG['MIN_INSTALLS'] > 0:
+            if record.installs < CONFIG['MIN_INSTALLS']:
+                print(f"    [Skipping] Install count '{record.install_count}' is below {CONFIG['MIN_INSTALLS']} limit.")
+                return None
+
+        return record
+
+    def save_to_csv(self, app_data, filename=None):
+        """Save an AppRecord to CSV file (append mode, no overwrites)"""
         if not app_data:
             return
             
-        csv_path = os.path.join(os.path.dirname(__file__), CONFIG['OUTPUT_CSV'])
-        headers = [
-            'Niche', 'App Name', 'Logo URL', 'Install Count', 
-            'Release Date', 'Rating', 'Review Count', 'App Link', 'Developer',
-            'Description', 'Keywords', 'Screenshot 1', 'Screenshot 2', 'Screenshot 3', 'Screenshot 4'
-        ]
+        csv_path = os.path.join(os.path.dirname(__file__), filename or self.output_csv)
+        headers = CSV_COLUMNS
         
         file_exists = os.path.exists(csv_path)
         
@@ -408,14 +664,54 @@ class SimilarAppsScraper:
                 # Only write header if file is brand new
                 if not file_exists:
                     writer.writeheader()
-                writer.writerow(app_data)
+                writer.writerow(app_data.to_row())
             
             self.apps_saved_count += 1
-            print(f"    ✓ SAVED: {app_data['App Name']} ({app_data['Install Count']} installs)")
+            print(f"    ✓ SAVED: {app_data.app_name} ({app_data.install_count} installs)")
             
         except Exception as e:
             print(f"    ✗ Error saving to CSV: {e}")
 
+    def reparse_archive(self, archive, filename=None):
+        """
+        Re-parse archived app pages with the current parser (no browser, no network).
+        The CSV is an append-only history and the archive holds only recent captures, so
+        only the latest row of each archived app is replaced; apps missing from the CSV are appended.
+
+        :param archive: RawArchive of the 'google_play_similar' store
+        :param filename: CSV to update (defaults to OUTPUT_CSV)
+        """
+        csv_path = os.path.join(os.path.dirname(__file__), filename or self.output_csv)
+        reparsed = {}
+        for capture in archive.iter_latest('html'):
+            try:
+                app_data = self.parse_app_page(capture['content'], capture['url'])
+            except Exception as e:
+                print(f"Error reparsing {capture['url']}: {e}")
+                continue
+            if app_data:
+                reparsed[app_data.app_link] = app_data
+        if not reparsed:
+            print(f"⚠ No app could be reparsed from {archive.store_dir}, {csv_path} left unchanged")
+            return
+        
+        rows = []
+        if os.path.exists(csv_path):
+            with open(csv_path, newline='', encoding='utf-8-sig') as f:
+                rows = list(csv.DictReader(f))
+        latest_row = {row['App Link']: i for i, row in enumerate(rows) if row['App Link'] in reparsed}
+        for app_link, i in latest_row.items():
+            rows[i] = reparsed[app_link].to_row()
+        rows.extend(app_data.to_row() for app_link, app_data in reparsed.items() if app_link not in latest_row)
+        
+        with open(csv_path + '.part', 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        os.replace(csv_path + '.part', csv_path)
+        print(f"✓ Reparsed {len(reparsed)} apps from {archive.store_dir} "
+              f"({len(latest_row)} rows replaced, {len(reparsed) - len(latest_row)} appended)")
+
     def run(self):
         """Run the two-phase scraper"""
         print("="*60)
@@ -423,63 +719,95 @@ class SimilarAppsScraper:
         print(f"Max apps target: {CONFIG['MAX_APPS_TO_SCRAPE']}")
         print("="*60)
         
-        self.initialize_driver()
-        self.apps_to_visit.append((CONFIG['SEED_APP_URL'], 0))
-        collected_app_urls = set()
+        if CONFIG['MULTI_SEED']:
+            seed_urls = app_links
+        else:
+            seed_url = CONFIG['SEED_APP_URL']
+            if not seed_url:
+                seed = self.graph.choose_seed()
+                seed_url = f"https://play.google.com/store/apps/details?id={seed}" if seed else random.choice(app_links)
+            seed_urls = [seed_url]
+        print(f"Seeds: {len(seed_urls)}" if len(seed_urls) > 1 else f"Seed: {seed_urls[0]}")
+        # Seeds are pushed (and the graph ranked) before any worker starts
+        for seed_url in seed_urls:
+            self.push_seed(seed_url)
+        workers = max(1, CONFIG['CRAWL_WORKERS'])
         
         # DO NOT remove old CSV - we're appending data from both scripts
-        csv_path = os.path.join(os.path.dirname(__file__), CONFIG['OUTPUT_CSV'])
+        csv_path = os.path.join(os.path.dirname(__file__), self.output_csv)
         print(f"Appending data to: {csv_path}")
+        self.profiler.start()
             
         try:
             # ==================================
             # PHASE 1: COLLECT URLs
             # ==================================
             print("\n" + "-"*40)
-            print("PHASE 1: Collecting App URLs")
+            print(f"PHASE 1: Collecting App URLs ({workers} workers)" if workers > 1 else "PHASE 1: Collecting App URLs")
             print("-"*40)
             
-            while self.apps_to_visit and len(collected_app_urls) < CONFIG['MAX_APPS_TO_SCRAPE']:
-                current_url, depth = self.apps_to_visit.popleft()
-                app_id = self.extract_app_id_from_url(current_url)
-                
-                if not app_id or app_id in self.visited_apps:
-                    continue
-                    
-                self.visited_apps.add(app_id)
-                collected_app_urls.add(current_url)
-                
-                print(f"Found [{len(collected_app_urls)}/{CONFIG['MAX_APPS_TO_SCRAPE']}]: {app_id}")
-                
-                if depth < CONFIG['CRAWL_DEPTH'] and len(collected_app_urls) < CONFIG['MAX_APPS_TO_SCRAPE']:
-                    similar = self.get_similar_apps(current_url)
-                    for url in similar:
-                        if self.extract_app_id_from_url(url) not in self.visited_apps:
-                            self.apps_to_visit.append((url, depth + 1))
-                            
-                time.sleep(0.2)
+            with self.profiler.phase('discovery'):
+                if workers == 1:
+                    self.crawl_worker()
+                else:
+                    threads = [threading.Thread(target=self.crawl_worker, name=f"crawl-{i}", daemon=True)
+                               for i in range(workers)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+            if self.queue is None:
+                collected_apps = self.scheduler.order(self.frontier.collected[:CONFIG['MAX_APPS_TO_SCRAPE']],
+                                                      key=lambda node: app_url(self.graph.nodes[node]))
+            else:
+                collected_apps = []  # Every claimed app was extracted while crawling
             
             # ==================================
             # PHASE 2: EXTRACT DATA
             # ==================================
             print("\n" + "-"*40)
-            print("PHASE 2: Extracting App Data")
+            print("PHASE 2: Extracting App Data" if self.queue is None else "PHASE 2: Done while crawling (work queue)")
             print("-"*40)
             
-            for index, url in enumerate(list(collected_app_urls)[:CONFIG['MAX_APPS_TO_SCRAPE']], 1):
-                app_id = self.extract_app_id_from_url(url)
-                print(f"\nProcessing {index}/{len(collected_app_urls)}: {app_id}")
-                
-                app_data = self.extract_app_details(url)
+            def process(item):
+                index, node = item
+                if self.scheduler.should_stop():
+                    return
+                app_id = self.graph.nodes[node]
+                print(f"\nProcessing {index}/{len(collected_apps)}: {app_id}")
+                self.extract_and_save(app_url(app_id), app_id)
+            
+            with self.profiler.phase('detail'):
+                if workers == 1:
+                    for item in enumerate(collected_apps, 1):
+                        process(item)
+                else:
+                    with ThreadPoolExecutor(max_workers=workers) as pool:
+                        list(pool.map(process, enumerate(collected_apps, 1)))
+            self.page_records.clear()  # Pages read while crawling whose app the deadline cut off
+            
+            # Replay the app pages that failed transiently (this run's and the last run's)
+            def replay(payload):
+                app_data = self.fetch_app_details(payload['url'])
                 if app_data:
-                    self.save_to_csv(app_data)
-                    
-                time.sleep(CONFIG['DELAY_BETWEEN_REQUESTS'])
+                    with self.lock:
+                        self.save_to_csv(app_data)
+            
+            if len(self.retry_queue):
+                print(f"\nRetrying {len(self.retry_queue)} apps that failed transiently...")
+                with self.profiler.phase('detail'):
+                    self.retry_queue.replay(replay, deadline=self.scheduler.deadline)
                 
             print("\n" + "="*60)
             print("SCRAPING COMPLETE!")
             print(f"Total apps successfully saved: {self.apps_saved_count}")
             print(f"Data saved to: {csv_path}")
+            self.rate_controller.summary()
+            self.retry_queue.summary()
+            self.scheduler.summary()
+            restarts = sum(browser.restarts for browser in self.browsers)
+            if restarts:
+                print(f"Browser recycled {restarts} times")
             print("="*60)
 
         except KeyboardInterrupt:
@@ -487,10 +815,34 @@ class SimilarAppsScraper:
         except Exception as e:
             print(f"\nCritical Error: {e}")
         finally:
-            if self.driver:
-                self.driver.quit()
-                print("WebDriver closed.")
+            with self.lock, self.profiler.phase('write'):
+                self.graph.save()
+            self.retry_queue.save()
+            self.scheduler.save()
+            for browser in self.browsers:
+                browser.close()
+            self.profiler.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl Google Play similar-app links and save recent apps to CSV")
+    parser.add_argument('--queue', metavar='QUEUE_FILE',
+                        help="Share the crawl with other runners through this work queue (e.g. on a shared filesystem) "
+                             "and write a per-worker CSV")
+    parser.add_argument('--merge', nargs='+', metavar='WORKER_CSV',
+                        help=f"Append the per-worker CSVs of a queued run to {CONFIG['OUTPUT_CSV']} instead of crawling")
+    args = parser.parse_args()
+    
+    if args.merge:
+        merge_worker_csvs(os.path.join(os.path.dirname(__file__), CONFIG['OUTPUT_CSV']), args.merge, append=True)
+        return
+    
+    queue = SQLiteWorkQueue(args.queue) if args.queue else None
+    try:
+        SimilarAppsScraper(queue).run()
+    finally:
+        if queue is not None:
+            queue.close()
+            print(f"Merge the workers' files with: --merge {worker_file(CONFIG['OUTPUT_CSV'], '*')}")
 
 if __name__ == "__main__":
-    scraper = SimilarAppsScraper()
-    scraper.run()
+    main()
@@ -1,18 +1,31 @@
 # -*- coding: utf-8 -*-
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from bs4 import BeautifulSoup
+import requests
+import argparse
 import time
+import copy
 import csv
+import html
+import json
 import os
 from datetime import datetime
 from datetime import timedelta
 from collections import Counter
 import re
 
+from app_record import AppRecord, CSV_COLUMNS, app_id_from_link, parse_install_count
+from browser_service import BrowserSession
+from play_page_script import extract_app_page, extract_detail_links
+from raw_archive import RawArchive
+from profiling import RunProfiler
+from retry_queue import RetryQueue, is_transient
+from rate_controller import AdaptiveRateController
+from run_scheduler import DeadlineScheduler
+from work_queue import SQLiteWorkQueue, merge_worker_csvs, worker_file
+
 # ===========================
 # CONFIGURATION - EDIT HERE
 # ===========================
@@ -23,16 +36,63 @@ CONFIG = {
     # How many months back too include (only used if FILTER_BY_RELEASE_DATE = True)
     # Example: 3 = last 3 months, 6 = last 6 months, 12 = last year
     'MONTHS_THRESHOLD': 12,
+
+    # Minimum install count required to save the app (0 = no install filter)
+    'MIN_INSTALLS': 0,
+
+    # Fetch category listings over plain HTTP (True) instead of scrolling in Chrome.
+    # The browser is still used as a fallback when the HTTP listing returns nothing.
+    'BROWSERLESS_LISTING': True,
+
+    # Most "see more" pages fetched per cluster of the HTTP listing
+    'MAX_LISTING_PAGES': 20,
+
+    # Read pages in Chrome with one execute_script (links + app fields as a small JSON object)
+    # instead of transferring the whole page source. Raw-page archiving still needs the source.
+    'IN_BROWSER_EXTRACTION': True,
+
+    # Keep the raw page source of every app page in the compressed archive, so the
+    # CSV can be rebuilt offline with `python raw_archive.py reparse google_play`
+    'ARCHIVE_RAW_PAGES': False,
+
+    # App pages leased from the work queue at a time (--queue)
+    'QUEUE_BATCH_SIZE': 10,
+
+    # Adaptive page-load rate for play.google.com (pages per second), replaces fixed sleeps
+    'RATE_LIMIT': {
+        'INITIAL_RATE': 1.0,
+        'MIN_RATE': 0.1,
+        'MAX_RATE': 3.0,
+        'LATENCY_THRESHOLD': 15.0,
+    },
 }
 
-# Set up Chrome WebDriver in headless mode for GitHub Actions
-chrome_options = Options()
-chrome_options.add_argument("--headless=new")
-chrome_options.add_argument("--no-sandbox")
-chrome_options.add_argument("--disable-dev-shm-usage")
-chrome_options.add_argument("--window-size=1920,1080")
+# Headless Chrome, started on first use (or attached to `browser_service.py start`)
+browser = BrowserSession()
+
+page_archive = RawArchive('google_play') if CONFIG['ARCHIVE_RAW_PAGES'] else None
+
+# App pages that failed transiently, replayed at the end of main()
+retry_queue = None
+
+rate_controller = AdaptiveRateController(CONFIG['RATE_LIMIT'])
 
-driver = webdriver.Chrome(options=chrome_options)
+# Off unless SCRAPER_PROFILE is set (see profiling.py)
+profiler = RunProfiler('google_play')
+
+# Plain HTTP category listing (see fetch_category_app_links)
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+BATCHEXECUTE_URL = 'https://play.google.com/_/PlayStoreUi/data/batchexecute?rpcids=qnKhOb&hl=en&gl=us&soc-app=121&soc-platform=1&soc-device=1'
+# Field mask the Play web client sends when paging a cluster
+LISTING_FIELDS = [96, 27, 4, 8, 57, 30, 110, 79, 11, 16, 49, 1, 3, 9, 12, 104, 55, 56, 51, 10, 34, 77]
+DETAILS_HREF_RE = re.compile(r'href="(/store/apps/details\?id=[a-zA-Z0-9._]+[^"]*)"')
+CLUSTER_HREF_RE = re.compile(r'href="(/store/apps/collection/cluster\?[^"]+)"')
+INIT_DATA_RE = re.compile(r"AF_initDataCallback\(\{key: 'ds:\d+',.*?data:(.*?), sideChannel: \{\}\}\);", re.DOTALL)
+APP_ENTRY_RE = re.compile(r'\[\\?"([a-zA-Z][a-zA-Z0-9_]*(?:\.[a-zA-Z0-9_]+)+)\\?",\s*7\]')
+PAGINATION_TOKEN_RE = re.compile(r'[A-Za-z0-9_\-]{40,}={0,2}')
 
 # Google Play Store Categories  (names match App Store niches exactly)
 CATEGORIES = {
@@ -55,6 +115,19 @@ CATEGORIES = {
     "Travel":              "TRAVEL_AND_LOCAL",
     "Utilities":           "TOOLS",
 }
+def load_page(url):
+    """Navigate the browser to a URL, paced by the rate controller (the session recycles Chrome as needed)"""
+    rate_controller.wait(url)
+    start = time.monotonic()
+    try:
+        browser.get(url)
+    except Exception:
+        rate_controller.record(url, latency=time.monotonic() - start, failed=True)
+        raise
+    # Google redirects throttled clients to its /sorry/ captcha page
+    status_code = 429 if '/sorry/' in browser.driver.current_url else None
+    rate_controller.record(url, status_code, time.monotonic() - start)
+
 def extract_keywords_from_description(description, num_keywords=5):
     """Extract most common keywords from description"""
     if not description or description == "N/A":
@@ -120,175 +193,371 @@ def extract_install_count(page_source):
         return install_text.strip()
     return "N/A"
 
-def extract_app_details(app_url, category_name):
-    """Extract detailed information from app page"""
+def scan_install_count(page_source):
+    """Cheap string scan for the install count (the ClM7O stat value containing '+')"""
+    for match in re.finditer(r'<div class="ClM7O">([^<]*)<', page_source):
+        text = match.group(1).strip()
+        if '+' in text:
+            return text
+    return "N/A"
+
+def is_within_threshold(date_str, months=None):
+    """Check whether a Play release date (e.g. 'Feb 11, 2025') falls within the month threshold"""
+    if months is None:
+        months = CONFIG['MONTHS_THRESHOLD']
     try:
-        driver.get(app_url)
-        
-        # Wait for content to load, utilizing WebDriverWait to ensure H1 is present
-        try:
-            WebDriverWait(driver, 5).until(
-                EC.presence_of_element_located((By.TAG_NAME, "h1"))
-            )
-        except:
-            pass
-        
-        time.sleep(1) # Small buffer
-        
-        page_source = driver.page_source
-        soup = BeautifulSoup(page_source, 'html.parser')
-        
-        # --- Extract App Name ---
-        app_name = "N/A"
-        # 1. Try standard H1 with itemprop
-        app_name_tag = soup.find('h1', {'itemprop': 'name'})
-        if app_name_tag:
-            app_name = app_name_tag.text.strip()
-        
-        # 2. Try class Fd93Bb
-        if app_name == "N/A":
-            app_name_tag = soup.find('h1', {'class': 'Fd93Bb'})
-            if app_name_tag:
-                 app_name = app_name_tag.text.strip()
-        
-        # 3. Try <title> tag fallback
-        if app_name == "N/A":
-            title_tag = soup.find('title')
-            if title_tag:
-                title_text = title_tag.text.strip()
-                if " - Apps on Google Play" in title_text:
-                    app_name = title_text.replace(" - Apps on Google Play", "")
-                else:
-                    app_name = title_text
-
-        # --- Extract Install Count ---
-        install_count = "N/A"
-        # 1. Search for the class 'ClM7O' which often contains the stats values (Rating, Downloads, Size etc.)
-        # We look for one containing '+'
-        stats_values = soup.find_all('div', {'class': 'ClM7O'})
-        for val in stats_values:
-            text = val.text.strip()
-            if '+' in text:
-                install_count = text
-                break
-        
-        # 2. Fallback to existing string extraction method if soup failed
-        if install_count == "N/A":
-            install_count = extract_install_count(page_source)
+        parsed_date = datetime.strptime(date_str, "%b %d, %Y")
+        now = datetime.now()
+        # Calculate the difference in months
+        months_diff = (now.year - parsed_date.year) * 12 + (now.month - parsed_date.month)
+        # If released within threshold months, keep it
+        return 0 <= months_diff < months
+    except Exception as e:
+        print(f"  [Date Filter] Could not parse release date '{date_str}': {e}")
+        return False
 
-        
-        # Extract developer name
-        developer_tag = soup.find('div', {'class': 'Vbfug auoIOc'})
-        if not developer_tag:
-            developer_tag = soup.find('a', {'class': 'Si6A0c Gwdmqd'})
-        developer = developer_tag.text.strip() if developer_tag else "N/A"
-        
-        # Extract logo URL
-        logo_tag = soup.find('img', {'class': 'T75of arM4bb', 'itemprop': 'image'})
-        if not logo_tag:
-            logo_tag = soup.find('img', {'itemprop': 'image'})
-        logo_url = logo_tag['src'] if logo_tag and 'src' in logo_tag.attrs else "N/A"
-        
-        # Extract up to 4 screenshots using alt='Screenshot image' (exact HTML attribute from Google Play)
-        screenshot_imgs = [
-            img.get('src') for img in soup.find_all('img', alt='Screenshot image')
-            if img.get('src') and 'play-lh.googleusercontent.com' in img.get('src', '')
-        ]
-        # Deduplicate while preserving order
-        seen = set()
-        screenshot_imgs_deduped = []
-        for s in screenshot_imgs:
-            if s not in seen:
-                seen.add(s)
-                screenshot_imgs_deduped.append(s)
-        screenshots = screenshot_imgs_deduped[:4]
-        while len(screenshots) < 4:
-            screenshots.append('N/A')
-        
-        # Extract rating
-        rating_tag = soup.find('div', {'class': 'jILTFe'})
-        rating = rating_tag.text.strip() if rating_tag else "N/A"
-        
-        # Extract review count
-        review_count_tag = soup.find('div', {'class': 'g1rdde'})
-        review_count = review_count_tag.text.strip() if review_count_tag else "N/A"
-        
-        # Fix: If rating is N/A or review count looks like Downloads/Installs, set to N/A
-        if rating == "N/A" or "Download" in review_count or "Install" in review_count:
-            review_count = "N/A"
-        
-        # Extract description
-        description = "N/A"
-        description_tag = soup.find('div', {'data-expandable-section': True})
-        if description_tag:
-            description = description_tag.text.strip()
-        else:
-            # Try alternative selectors
-            desc_tags = soup.find_all('div', {'class': 'bARER'})
-            if desc_tags:
-                description = ' '.join([tag.text.strip() for tag in desc_tags])
-        
-        # Extract keywords from description
-        keywords = extract_keywords_from_description(description)
-        
-        # Extract release date
-        release_date = extract_release_date(page_source, app_url)
-        
-        # --- Filter by release date (OPTIONAL) ---
-        if CONFIG['FILTER_BY_RELEASE_DATE']:
-            def is_within_threshold(date_str, months=CONFIG['MONTHS_THRESHOLD']):
-                try:
-                    # Example format: Feb 11, 2025
-                    parsed_date = datetime.strptime(date_str, "%b %d, %Y")
-                    now = datetime.now()
-                    # Calculate the difference in months
-                    months_diff = (now.year - parsed_date.year) * 12 + (now.month - parsed_date.month)
-                    # If released within threshold months, keep it
-                    return 0 <= months_diff < months
-                except Exception as e:
-                    print(f"  [Date Filter] Could not parse release date '{date_str}': {e}")
-                    return False
+def prefilter_app_page(page_source, app_url):
+    """
+    Stage 1: evaluate the release-date and install filters with plain string
+    scans of the page source, before paying for a full BeautifulSoup parse.
+    Returns (release_date, install_count) for apps that pass, None otherwise.
+    """
+    release_date = extract_release_date(page_source, app_url)
+    
+    if CONFIG['FILTER_BY_RELEASE_DATE']:
+        if release_date == "N/A" or not is_within_threshold(release_date):
+            print(f"  [Date Filter] Skipping app (release date: {release_date})")
+            return None
+    
+    install_count = scan_install_count(page_source)
+    
+    # Only reject when the scan actually found a value; otherwise let the full parse decide
+    if CONFIG['MIN_INSTALLS'] > 0 and install_count != "N/A":
+        if parse_install_count(install_count) < CONFIG['MIN_INSTALLS']:
+            print(f"  [Install Filter] Skipping app (installs: {install_count})")
+            return None
+    
+    return release_date, install_count
 
-            if release_date == "N/A" or not is_within_threshold(release_date):
-                print(f"  [Date Filter] Skipping app (release date: {release_date})")
-                return None
-        
-        # Debug print
-        print(f"  App: {app_name}, Installs: {install_count}, Date: {release_date}")
-        
-        return {
-            'niche': category_name,
-            'app_name': app_name,
-            'logo_url': logo_url,
-            'install_count': install_count,
-            'release_date': release_date,
-            'rating': rating,
-            'review_count': review_count,
-            'app_link': app_url,
-            'developer': developer,
-            'description': description,
-            'keywords': keywords,
-            'screenshot_1': screenshots[0],
-            'screenshot_2': screenshots[1],
-            'screenshot_3': screenshots[2],
-            'screenshot_4': screenshots[3],
-        }
-        
+def extract_app_details(app_url, category_name, niches=None):
+    """Load an app page in Chrome and extract its details (transient failures go to the retry queue)"""
+    try:
+        return fetch_app_details(app_url, category_name, niches)
     except Exception as e:
         print(f"Error extracting details for {app_url}: {e}")
+        if retry_queue is not None and is_transient(e):
+            retry_queue.record(app_url, {'url': app_url, 'niche': category_name, 'niches': niches}, e)
         return None
 
-def scrape_category(category_name, category_id, max_apps=100, csv_filename='google_play_apps.csv', is_first_category=False):
-    """Scrape apps from a specific category"""
-    print(f"\n{'='*60}")
-    print(f"Scraping category: {category_name}")
-    print(f"{'='*60}")
+def fetch_app_details(app_url, category_name, niches=None):
+    """
+    Like extract_app_details(), but browser failures are raised
+    
+    :param niches: Every category the app is saved under (the archived page records them,
+                   so a reparse writes the same rows); [category_name] if None
+    """
+    load_page(app_url)
+    
+    # Wait for content to load, utilizing WebDriverWait to ensure H1 is present
+    try:
+        WebDriverWait(browser.driver, 5).until(
+            EC.presence_of_element_located((By.TAG_NAME, "h1"))
+        )
+    except:
+        pass
+    
+    time.sleep(1) # Small buffer
+    
+    if CONFIG['IN_BROWSER_EXTRACTION'] and page_archive is None:
+        return parse_page_data(extract_app_page(browser.driver), app_url, category_name)
+    
+    page_source = browser.driver.page_source
+    if page_archive is not None:
+        page_archive.save(app_id_from_link(app_url) or app_url, 'html', page_source,
+                          url=app_url, niche=category_name, niches=niches or [category_name])
+    
+    return parse_app_page(page_source, app_url, category_name)
+
+def parse_app_page(page_source, app_url, category_name):
+    """Parse an app page source into an AppRecord (None if filtered out); no network"""
+    # --- Stage 1: cheap filters on the raw page source ---
+    prefiltered = prefilter_app_page(page_source, app_url)
+    if prefiltered is None:
+        return None
+    release_date, _ = prefiltered
+    
+    # --- Stage 2: full parse for apps that survived the filters ---
+    soup = BeautifulSoup(page_source, 'html.parser')
+    
+    # --- Extract App Name ---
+    app_name = "N/A"
+    # 1. Try standard H1 with itemprop
+    app_name_tag = soup.find('h1', {'itemprop': 'name'})
+    if app_name_tag:
+        app_name = app_name_tag.text.strip()
+    
+    # 2. Try class Fd93Bb
+    if app_name == "N/A":
+        app_name_tag = soup.find('h1', {'class': 'Fd93Bb'})
+        if app_name_tag:
+             app_name = app_name_tag.text.strip()
+    
+    # 3. Try <title> tag fallback
+    if app_name == "N/A":
+        title_tag = soup.find('title')
+        if title_tag:
+            title_text = title_tag.text.strip()
+            if " - Apps on Google Play" in title_text:
+                app_name = title_text.replace(" - Apps on Google Play", "")
+            else:
+                app_name = title_text
+
+    # --- Extract Install Count ---
+    install_count = "N/A"
+    # 1. Search for the class 'ClM7O' which often contains the stats values (Rating, Downloads, Size etc.)
+    # We look for one containing '+'
+    stats_values = soup.find_all('div', {'class': 'ClM7O'})
+    for val in stats_values:
+        text = val.text.strip()
+        if '+' in text:
+            install_count = text
+            break
+    
+    # 2. Fallback to existing string extraction method if soup failed
+    if install_count == "N/A":
+        install_count = extract_install_count(page_source)
+    
+
+    
+    # Extract developer name
+    developer_tag = soup.find('div', {'class': 'Vbfug auoIOc'})
+    if not developer_tag:
+        developer_tag = soup.find('a', {'class': 'Si6A0c Gwdmqd'})
+    developer = developer_tag.text.strip() if developer_tag else "N/A"
+    
+    # Extract logo URL
+    logo_tag = soup.find('img', {'class': 'T75of arM4bb', 'itemprop': 'image'})
+    if not logo_tag:
+        logo_tag = soup.find('img', {'itemprop': 'image'})
+    logo_url = logo_tag['src'] if logo_tag and 'src' in logo_tag.attrs else "N/A"
+    
+    # Extract up to 4 screenshots using alt='Screenshot image' (exact HTML attribute from Google Play)
+    screenshot_imgs = [
+        img.get('src') for img in soup.find_all('img', alt='Screenshot image')
+        if img.get('src') and 'play-lh.googleusercontent.com' in img.get('src', '')
+    ]
+    # Deduplicate while preserving order
+    seen = set()
+    screenshot_imgs_deduped = []
+    for s in screenshot_imgs:
+        if s not in seen:
+            seen.add(s)
+            screenshot_imgs_deduped.append(s)
+    screenshots = screenshot_imgs_deduped[:4]
+    while len(screenshots) < 4:
+        screenshots.append('N/A')
+    
+    # Extract rating
+    rating_tag = soup.find('div', {'class': 'jILTFe'})
+    rating = rating_tag.text.strip() if rating_tag else "N/A"
+    
+    # Extract review count
+    review_count_tag = soup.find('div', {'class': 'g1rdde'})
+    review_count = review_count_tag.text.strip() if review_count_tag else "N/A"
+    
+    # Fix: If rating is N/A or review count looks like Downloads/Installs, set to N/A
+    if rating == "N/A" or "Download" in review_count or "Install" in review_count:
+        review_count = "N/A"
+    
+    # Extract description
+    description = "N/A"
+    description_tag = soup.find('div', {'data-expandable-section': True})
+    if description_tag:
+        description = description_tag.text.strip()
+    else:
+        # Try alternative selectors
+        desc_tags = soup.find_all('div', {'class': 'bARER'})
+        if desc_tags:
+            description = ' '.join([tag.text.strip() for tag in desc_tags])
+    
+    # Extract keywords from description
+    keywords = extract_keywords_from_description(description)
+    
+    # Debug print
+    print(f"  App: {app_name}, Installs: {install_count}, Date: {release_date}")
     
-    apps_saved_count = 0
+    record = AppRecord(
+        niche=category_name,
+        app_name=app_name,
+        logo_url=logo_url,
+        install_count=install_count,
+        release_date=release_date,
+        rating=rating,
+        review_count=review_count,
+        app_link=app_url,
+        developer=developer,
+        description=description,
+        keywords=keywords,
+        screenshots=screenshots,
+    )
     
+    if CONFIG['MIN_INSTALLS'] > 0 and record.installs < CONFIG['MIN_INSTALLS']:
+        print(f"  [Install Filter] Skipping app (installs: {install_count})")
+        return None
+    
+    return record
+
+def parse_page_data(page_data, app_url, category_name):
+    """Build an AppRecord from extract_app_page() fields (None if filtered out), with parse_app_page()'s filters"""
+    release_date = page_data['release_date']
+    print(f"  Release Date extracted: {release_date}")
+    if CONFIG['FILTER_BY_RELEASE_DATE']:
+        if release_date == "N/A" or not is_within_threshold(release_date):
+            print(f"  [Date Filter] Skipping app (release date: {release_date})")
+            return None
+    
+    print(f"  App: {page_data['app_name']}, Installs: {page_data['install_count']}, Date: {release_date}")
+    
+    record = AppRecord(
+        niche=category_name,
+        app_name=page_data['app_name'],
+        logo_url=page_data['logo_url'],
+        install_count=page_data['install_count'],
+        release_date=release_date,
+        rating=page_data['rating'],
+        review_count=page_data['review_count'],
+        app_link=app_url,
+        developer=page_data['developer'],
+        description=page_data['description'],
+        keywords=extract_keywords_from_description(page_data['description']),
+        screenshots=page_data['screenshots'],
+    )
+    
+    if CONFIG['MIN_INSTALLS'] > 0 and record.installs < CONFIG['MIN_INSTALLS']:
+        print(f"  [Install Filter] Skipping app (installs: {record.install_count})")
+        return None
+    
+    return record
+
+def _add_app_link(app_links, seen, href):
+    """Normalise an app details href and append it to app_links if it is new"""
+    full_url = 'https://play.google.com' + href if href.startswith('/') else href
+    # Clean URL (remove extra parameters)
+    if '&' in full_url:
+        full_url = full_url.split('&')[0]
+    if full_url not in seen:
+        seen.add(full_url)
+        app_links.append(full_url)
+
+def _play_http_request(url, data=None):
+    """Plain HTTP GET (or POST with data) to play.google.com, paced by the same rate controller as the browser"""
+    rate_controller.wait(url)
+    start = time.monotonic()
+    try:
+        if data is not None:
+            response = requests.post(url, headers=HTTP_HEADERS, data=data, timeout=20)
+        else:
+            response = requests.get(url, headers=HTTP_HEADERS, timeout=20)
+    except requests.RequestException:
+        rate_controller.record(url, latency=time.monotonic() - start, failed=True)
+        raise
+    rate_controller.record(url, response.status_code, time.monotonic() - start)
+    response.raise_for_status()
+    return response
+
+def _find_pagination_token(data):
+    """Find a cluster pagination token in Play's embedded data: a [null, "<token>"] pair"""
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            if (len(node) == 2 and node[0] is None and isinstance(node[1], str)
+                    and PAGINATION_TOKEN_RE.fullmatch(node[1])):
+                return node[1]
+            stack.extend(reversed(node))
+    return None
+
+def _initial_pagination_token(html_text):
+    """Extract the first pagination token from the AF_initDataCallback blocks of a cluster page"""
+    for match in INIT_DATA_RE.finditer(html_text):
+        try:
+            token = _find_pagination_token(json.loads(match.group(1)))
+        except ValueError:
+            continue
+        if token:
+            return token
+    return None
+
+def _fetch_next_page(token, app_links, seen):
+    """Fetch the next page of a cluster through the batchexecute endpoint, return the next token"""
+    inner = json.dumps([[None, [[10, [10, 50]], True, None, LISTING_FIELDS], None, token]])
+    payload = json.dumps([[["qnKhOb", inner, None, "generic"]]])
+    response = _play_http_request(BATCHEXECUTE_URL, data={'f.req': payload})
+    
+    # Response body: ")]}'" guard line, then chunks of JSON; our payload is the wrb.fr entry
+    for line in response.text.splitlines():
+        if '"wrb.fr"' not in line:
+            continue
+        try:
+            envelope = json.loads(line)
+            body = json.loads(envelope[0][2])
+        except (ValueError, IndexError, TypeError):
+            return None
+        for package in APP_ENTRY_RE.findall(envelope[0][2]):
+            _add_app_link(app_links, seen, f"/store/apps/details?id={package}")
+        return _find_pagination_token(body)
+    return None
+
+def fetch_category_app_links(category_id, max_apps):
+    """
+    Collect app links for a category over plain HTTP (no browser).
+    Reads the category page, then each cluster's "see more" page, following
+    pagination tokens until max_apps links are collected. A cluster stops at a
+    repeated token, at a page without new links, or after MAX_LISTING_PAGES pages.
+    """
+    app_links = []
+    seen = set()
+    
+    category_url = f'https://play.google.com/store/apps/category/{category_id}?hl=en&gl=US'
+    html_text = _play_http_request(category_url).text
+    for href in DETAILS_HREF_RE.findall(html_text):
+        _add_app_link(app_links, seen, html.unescape(href))
+    
+    cluster_hrefs = []
+    for href in CLUSTER_HREF_RE.findall(html_text):
+        href = html.unescape(href)
+        if href not in cluster_hrefs:
+            cluster_hrefs.append(href)
+    
+    for cluster_href in cluster_hrefs:
+        if len(app_links) >= max_apps:
+            break
+        try:
+            cluster_text = _play_http_request('https://play.google.com' + cluster_href).text
+            for href in DETAILS_HREF_RE.findall(cluster_text):
+                _add_app_link(app_links, seen, html.unescape(href))
+            
+            token = _initial_pagination_token(cluster_text)
+            used_tokens = set()
+            while token and token not in used_tokens and len(app_links) < max_apps:
+                if len(used_tokens) >= CONFIG['MAX_LISTING_PAGES']:
+                    print(f"  Cluster page limit reached ({cluster_href})")
+                    break
+                used_tokens.add(token)
+                links_before = len(app_links)
+                token = _fetch_next_page(token, app_links, seen)
+                if len(app_links) == links_before:
+                    break
+        except requests.RequestException as e:
+            print(f"  Cluster fetch failed ({cluster_href}): {e}")
+    
+    return app_links[:max_apps]
+
+def fetch_category_app_links_browser(category_id, max_apps):
+    """Collect app links for a category by scrolling the category page in Chrome (fallback)"""
     # Navigate to category page
     category_url = f'https://play.google.com/store/apps/category/{category_id}'
-    driver.get(category_url)
+    load_page(category_url)
     time.sleep(3)
     
     # Scroll to load more apps
@@ -297,108 +566,180 @@ def scrape_category(category_name, category_id, max_apps=100, csv_filename='goog
     max_scrolls = 20  # Limit scrolls to prevent infinite loop
     
     while scroll_count < max_scrolls:
-        last_height = driver.execute_script("return document.body.scrollHeight")
-        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        last_height = browser.driver.execute_script("return document.body.scrollHeight")
+        browser.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
         time.sleep(2)
-        new_height = driver.execute_script("return document.body.scrollHeight")
+        new_height = browser.driver.execute_script("return document.body.scrollHeight")
         
         if new_height == last_height:
             break
         scroll_count += 1
     
-    # Get page source and parse
-    page_source = driver.page_source
-    soup = BeautifulSoup(page_source, 'html.parser')
-    
     # Find all app links
-    app_links = set()
-    all_links = soup.find_all('a', href=True)
+    if CONFIG['IN_BROWSER_EXTRACTION']:
+        hrefs = extract_detail_links(browser.driver)
+    else:
+        soup = BeautifulSoup(browser.driver.page_source, 'html.parser')
+        hrefs = [link['href'] for link in soup.find_all('a', href=True)]
     
-    for link in all_links:
-        href = link['href']
+    app_links = []
+    seen = set()
+    for href in hrefs:
         if '/store/apps/details?id=' in href:
-            full_url = 'https://play.google.com' + href if href.startswith('/') else href
-            # Clean URL (remove extra parameters)
-            if '&' in full_url:
-                full_url = full_url.split('&')[0]
-            app_links.add(full_url)
+            _add_app_link(app_links, seen, href)
             
             if len(app_links) >= max_apps:
                 break
     
-    print(f"Found {len(app_links)} app links in {category_name}")
-    
-    # Extract details for each app and save immediately
-    for idx, app_url in enumerate(list(app_links)[:max_apps], 1):
-        print(f"Processing app {idx}/{min(len(app_links), max_apps)}: {app_url}")
-        
-        app_data = extract_app_details(app_url, category_name)
-        
-        if app_data:
-            # Save each app immediately
-            save_to_csv([app_data], csv_filename, append=(not is_first_category or idx > 1))
-            apps_saved_count += 1
-            print(f"  ✓ {app_data['app_name']} - {app_data['install_count']} installs - {app_data['release_date']}")
-        
-        # Small delay to avoid rate limiting
-        time.sleep(1)
+    return app_links
+
+def fetch_category_listing(category_name, category_id, max_apps=100):
+    """App links of a category's listing (HTTP pagination, browser scrolling as fallback)"""
+    app_links = []
+    if CONFIG['BROWSERLESS_LISTING']:
+        try:
+            app_links = fetch_category_app_links(category_id, max_apps)
+        except (requests.RequestException, ValueError) as e:
+            print(f"HTTP listing failed: {e}")
+        if not app_links:
+            print("HTTP listing returned no apps, falling back to browser scrolling")
+    if not app_links:
+        app_links = fetch_category_app_links_browser(category_id, max_apps)
     
-    return apps_saved_count
+    print(f"Found {len(app_links)} app links in {category_name}")
+    return app_links[:max_apps]
 
 def save_to_csv(apps_data, filename='google_play_apps.csv', append=False):
-    """Save collected data to CSV file"""
+    """Save collected AppRecords to CSV file"""
     if not apps_data:
         print("No data to save!")
         return
     
     csv_path = os.path.join(os.path.dirname(__file__), filename)
     
-    # Define CSV headers
-    headers = [
-        'Niche',
-        'App Name',
-        'Logo URL',
-        'Install Count',
-        'Release Date',
-        'Rating',
-        'Review Count',
-        'App Link',
-        'Developer',
-        'Description',
-        'Keywords',
-        'Screenshot 1',
-        'Screenshot 2',
-        'Screenshot 3',
-        'Screenshot 4'
-    ]
-    
     try:
-        # Check if file exists to determine if we need to write headers
-        file_exists = os.path.exists(csv_path)
-        mode = 'a' if append and file_exists else 'w'
-        
-        with open(csv_path, mode, newline='', encoding='utf-8-sig') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=[
-                'niche', 'app_name', 'logo_url', 'install_count', 
-                'release_date', 'rating', 'review_count', 'app_link', 'developer',
-                'description', 'keywords', 'screenshot_1', 'screenshot_2', 'screenshot_3', 'screenshot_4'
-            ])
+        with profiler.phase('write'):
+            # Check if file exists to determine if we need to write headers
+            file_exists = os.path.exists(csv_path)
+            mode = 'a' if append and file_exists else 'w'
             
-            # Write header only if file is new or we're overwriting
-            if not file_exists or not append:
-                csvfile.write(','.join(headers) + '\n')
+            with open(csv_path, mode, newline='', encoding='utf-8-sig') as csvfile:
+                writer = csv.DictWriter(csvfile, fieldnames=CSV_COLUMNS)
             
-            # Write data
-            for app in apps_data:
-                writer.writerow(app)
-        
-        print(f"  ✓ Saved {len(apps_data)} apps to: {csv_path}")
+                # Write header only if file is new or we're overwriting
+                if not file_exists or not append:
+                    writer.writeheader()
+            
+                # Write data
+                for app in apps_data:
+                    writer.writerow(app.to_row())
+            
+            print(f"  ✓ Saved {len(apps_data)} apps to: {csv_path}")
         
     except Exception as e:
         print(f"  ✗ Error saving to CSV: {e}")
 
+def reparse_archive(archive, csv_filename='google_play_apps.csv'):
+    """
+    Rebuild the CSV from archived app pages with the current parser (no browser, no network);
+    like a live run, an app gets a row per category it was saved under
+    """
+    apps_data = []
+    reparsed = 0
+    for capture in archive.iter_latest('html'):
+        try:
+            app_data = parse_app_page(capture['content'], capture['url'], capture['niche'])
+        except Exception as e:
+            print(f"Error reparsing {capture['url']}: {e}")
+            continue
+        if app_data:
+            reparsed += 1
+            # Captures from before niches were recorded only know the niche the page was loaded for
+            for niche in capture.get('niches') or [capture['niche']]:
+                row_data = copy.copy(app_data)
+                row_data.niche = niche
+                apps_data.append(row_data)
+    save_to_csv(apps_data, csv_filename)
+    print(f"✓ Reparsed {reparsed} apps ({len(apps_data)} rows) from {archive.store_dir}")
+
+def scrape_from_queue(queue, csv_filename):
+    """
+    Work on a job shared with other runners through a work queue (work_queue.py)
+    
+    Category listings, then app pages are leased from the queue; an app listed in several
+    categories is a unit (and a row) per category, as in a single-runner run. Apps are saved
+    to this worker's own CSV (csv_filename); combine the workers' files with --merge.
+    """
+    scheduler = DeadlineScheduler('google_play.queue')  # Deadline only: the queue decides the order
+    queue.add('category', [(category_name, {'index': index}, index)
+                           for index, category_name in enumerate(CATEGORIES)])
+    total_apps_scraped = 0
+    
+    with profiler.phase('discovery'):
+        for batch in queue.drain('category', 1, should_stop=scheduler.should_stop):
+            for category_name, payload in batch:
+                print(f"\n📂 Listing category: {category_name}")
+                try:
+                    app_links = fetch_category_listing(category_name, CATEGORIES[category_name], max_apps=100)
+                except Exception as e:
+                    print(f"✗ Error listing {category_name}: {e}")
+                    queue.fail('category', [category_name])
+                    continue
+                # Listings hold at most 100 apps, so the priority orders by (category, position)
+                queue.add('detail', [(f"{app_url}#{category_name}", {'url': app_url, 'niche': category_name},
+                                      payload['index'] * 1000 + position)
+                                     for position, app_url in enumerate(app_links)])
+                queue.complete('category', [category_name])
+    
+    print(f"\n{'='*60}")
+    print(f"Processing {queue.counts('detail')['pending']} pending apps (worker {queue.worker})")
+    print(f"{'='*60}")
+    with profiler.phase('detail'):
+        for batch in queue.drain('detail', CONFIG['QUEUE_BATCH_SIZE'], should_stop=scheduler.should_stop):
+            done, failed = [], []
+            try:
+                for key, payload in batch:
+                    if scheduler.should_stop():
+                        break
+                    app_url = payload['url']
+                    print(f"Processing app ({payload['niche']}): {app_url}")
+                    try:
+                        app_data = fetch_app_details(app_url, payload['niche'])
+                    except Exception as e:
+                        print(f"Error extracting details for {app_url}: {e}")
+                        # Transient failures go back to the queue for any worker to retry
+                        (failed if is_transient(e) else done).append(key)
+                        continue
+                    scheduler.done(app_url, payload['niche'], accepted=app_data is not None)
+                    done.append(key)
+                    if app_data:
+                        save_to_csv([app_data], csv_filename, append=True)
+                        total_apps_scraped += 1
+                        print(f"  ✓ {app_data.app_name} - {app_data.install_count} installs - {app_data.release_date}")
+            finally:
+                queue.fail('detail', failed)
+                queue.complete('detail', done)
+                queue.release('detail', [key for key, _ in batch if key not in done and key not in failed])
+    
+    print(f"\n{'='*60}")
+    print(f"✓ This worker scraped {total_apps_scraped} apps into {csv_filename}")
+    for kind, state in sorted(queue.counts().items()):
+        print(f"[Queue] {kind}: {state['done']} done, {state['failed']} failed, {state['pending'] + state['leased']} left")
+    print(f"Merge the workers' files with: --merge {worker_file('google_play_apps.csv', '*')}")
+    print(f"{'='*60}")
+    scheduler.summary()
+
 def main():
     """Main function to orchestrate scraping"""
+    global retry_queue
+    parser = argparse.ArgumentParser(description="Scrape Google Play categories and save recent apps to CSV")
+    parser.add_argument('--queue', metavar='QUEUE_FILE',
+                        help="Share the job with other runners through this work queue (e.g. on a shared filesystem) "
+                             "and write a per-worker CSV")
+    parser.add_argument('--merge', nargs='+', metavar='WORKER_CSV',
+                        help="Combine the per-worker CSVs of a queued run into google_play_apps.csv instead of scraping")
+    args = parser.parse_args()
+    
     print("="*60)
     print("Google Play Store Category Scraper")
     print(f"Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -407,29 +748,106 @@ def main():
     total_apps_scraped = 0
     csv_filename = 'google_play_apps.csv'
     
+    if args.merge:
+        merge_worker_csvs(os.path.join(os.path.dirname(__file__), csv_filename), args.merge,
+                          key=('Niche', 'App Link'))
+        return
+    
+    queue = None
+    if args.queue:
+        queue = SQLiteWorkQueue(args.queue)
+        csv_filename = worker_file(csv_filename, queue.worker)
+    
     # Remove existing CSV file to start fresh
     csv_path = os.path.join(os.path.dirname(__file__), csv_filename)
     if os.path.exists(csv_path):
         os.remove(csv_path)
         print(f"Removed existing file: {csv_filename}\n")
     
+    if queue is not None:
+        profiler.start()
+        try:
+            scrape_from_queue(queue, csv_filename)
+        except KeyboardInterrupt:
+            print("\n\nScraping interrupted by user! Unfinished app pages were handed back to the queue")
+        finally:
+            rate_controller.summary()
+            browser.close()
+            queue.close()
+            profiler.stop()
+        return
+    
+    retry_queue = RetryQueue('google_play')
+    scheduler = DeadlineScheduler('google_play')
+    profiler.start()
+    
     try:
-        # Scrape each category
-        for idx, (category_name, category_id) in enumerate(CATEGORIES.items(), 1):
-            try:
-                apps_count = scrape_category(category_name, category_id, max_apps=100, 
-                                            csv_filename=csv_filename, is_first_category=(idx == 1))
+        # Phase 1: the listings of every category (cheap), so the app pages can be
+        # scheduled across categories: unseen apps first, then the stalest refreshes.
+        # An app listed in several categories is loaded once and saved once per category.
+        niches_by_link = {}
+        with profiler.phase('discovery'):
+            for category_name, category_id in CATEGORIES.items():
+                print(f"\n📂 Listing category: {category_name}")
+                try:
+                    app_links = fetch_category_listing(category_name, category_id, max_apps=100)
+                except Exception as e:
+                    print(f"✗ Error listing {category_name}: {e}")
+                    continue
+                for app_url in app_links:
+                    niches_by_link.setdefault(app_url, []).append(category_name)
+        work = scheduler.order([(app_url, niches[0]) for app_url, niches in niches_by_link.items()],
+                               key=lambda item: item[0], niche=lambda item: item[1])
+        
+        def save_app(app_data, niches):
+            # One row per category the app is listed in, as if each category's page was loaded
+            for niche in niches:
+                app_data.niche = niche
+                save_to_csv([app_data], csv_filename, append=True)
+                apps_per_category[niche] += 1
+        
+        # Phase 2: app pages, until the run's time budget is used up
+        print(f"\n{'='*60}")
+        print(f"Processing {len(work)} apps from {len(CATEGORIES)} categories")
+        print(f"{'='*60}")
+        apps_per_category = Counter()
+        with profiler.phase('detail'):
+            for idx, (app_url, category_name) in enumerate(work, 1):
+                if scheduler.should_stop():
+                    break
+                print(f"Processing app {idx}/{len(work)} ({category_name}): {app_url}")
+                retry_queue.discard(app_url)  # Carried over from the last run, but fetched now anyway
                 
-                total_apps_scraped += apps_count
-                if apps_count > 0:
-                    print(f"✓ Collected {apps_count} apps from {category_name}")
-                    print(f"  📊 Total apps saved so far: {total_apps_scraped}\n")
-                else:
-                    print(f"✗ No apps collected from {category_name}\n")
-                    
-            except Exception as e:
-                print(f"✗ Error scraping {category_name}: {e}\n")
-                continue
+                app_data = extract_app_details(app_url, category_name, niches_by_link[app_url])
+                scheduler.done(app_url, category_name, accepted=app_data is not None)
+                
+                if app_data:
+                    # Save each app immediately (the file was removed above, so the first save writes the header)
+                    save_app(app_data, niches_by_link[app_url])
+                    total_apps_scraped += 1
+                    print(f"  ✓ {app_data.app_name} - {app_data.install_count} installs - {app_data.release_date}")
+        
+        for category_name in CATEGORIES:
+            if apps_per_category[category_name]:
+                print(f"✓ Collected {apps_per_category[category_name]} apps from {category_name}")
+            else:
+                print(f"✗ No apps collected from {category_name}")
+        
+        # Replay the app pages that failed transiently (this run's and the last run's)
+        recovered = []
+        def replay(payload):
+            # Apps carried over from the last run keep the categories they were listed in then
+            niches = niches_by_link.get(payload['url']) or payload.get('niches') or [payload['niche']]
+            app_data = fetch_app_details(payload['url'], payload['niche'], niches)
+            if app_data:
+                save_app(app_data, niches)
+                recovered.append(app_data)
+        
+        if len(retry_queue):
+            print(f"\nRetrying {len(retry_queue)} apps that failed transiently...")
+            with profiler.phase('detail'):
+                retry_queue.replay(replay, deadline=scheduler.deadline)
+            total_apps_scraped += len(recovered)
         
         # Final summary
         print(f"\n{'='*60}")
@@ -444,9 +862,17 @@ def main():
         print(f"Total apps saved: {total_apps_scraped}")
     
     finally:
-        # Close the browser
-        driver.quit()
-        print("\nBrowser closed.")
+        rate_controller.summary()
+        retry_queue.save()
+        retry_queue.summary()
+        scheduler.save()
+        scheduler.summary()
+        if browser.restarts:
+            print(f"Browser recycled {browser.restarts} times")
+        
+        # Close the browser (only if a page needed it)
+        browser.close()
+        profiler.stop()
         print(f"Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
 
 if __name__ == "__main__":
@@ -0,0 +1,331 @@
+# -*- coding: utf-8 -*-
+"""
+Sharded Full-Text Search Index
+==============================
+Builds a prebuilt inverted index over the names, keywords and descriptions
+of every scraped app (all three CSVs), so the website can search without
+downloading and scanning the CSVs:
+
+    exports/search/manifest.json          tokenizer settings, shard map, doc count
+    exports/search/terms/<prefix>.json.gz {term: [doc gap, weight, doc gap, weight, ...]}
+    exports/search/docs/<n>.json.gz       compact entries of docs n*DOCS_PER_SHARD ...
+
+Terms are sharded by prefix: a prefix whose postings exceed
+MAX_SHARD_POSTINGS is split by its next character, so a term lives in the
+shard with the longest key that prefixes it. Posting lists are sorted by doc
+id and delta-encoded (the first value is the doc id, then the gap to the
+previous one), interleaved with the term's weight in that doc. A query
+fetches the manifest, one term shard per query word (usually the same one
+or two) and the doc shards of the hits.
+
+    python search_index.py build
+    python search_index.py query "pdf scanner"
+"""
+
+import argparse
+import csv
+import gzip
+import json
+import math
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from app_record import AppRecord
+from export_niches import CONFIG as EXPORT_CONFIG
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Output directory of the index (uploaded with the per-niche exports)
+    'OUTPUT_DIR': os.path.join('exports', 'search'),
+
+    # A term shard holding more postings than this is split by the next character
+    'MAX_SHARD_POSTINGS': 20000,
+
+    # Apps per doc shard
+    'DOCS_PER_SHARD': 256,
+
+    # Weight of one occurrence of a term, per field
+    'FIELD_WEIGHTS': {'name': 3, 'keywords': 2, 'description': 1},
+
+    # Terms shorter than this are not indexed
+    'MIN_TERM_LENGTH': 2,
+}
+
+STOP_WORDS = frozenset("""
+a an and are as at be but by can for from has have how i if in into is it its me more my no not of on or our
+so than that the their them then there these they this to up us was we what when which will with you your
+""".split())
+
+_WORD_RE = re.compile(r'\w+')
+_SAFE_PREFIX_RE = re.compile(r'[a-z0-9_]+')
+
+
+def tokenize(text):
+    """Lower-cased, accent-stripped word tokens of a text (stop words and short tokens dropped)"""
+    if not text or text == "N/A":
+        return []
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return [word for word in _WORD_RE.findall(text)
+            if len(word) >= CONFIG['MIN_TERM_LENGTH'] and word not in STOP_WORDS]
+
+
+def shard_file(prefix):
+    """File name of a term shard ('ph' -> 'ph.json.gz'; non-ASCII prefixes are hex-encoded)"""
+    if _SAFE_PREFIX_RE.fullmatch(prefix):
+        return f"{prefix}.json.gz"
+    return f"x{prefix.encode('utf-8').hex()}.json.gz"
+
+
+def find_shard(term, shards):
+    """Key of the shard holding a term (the longest shard key that prefixes it), or None"""
+    for length in range(len(term), 0, -1):
+        if term[:length] in shards:
+            return term[:length]
+    return None
+
+
+def _doc_entry(record, store):
+    """Compact doc-table entry for one app"""
+    return {
+        'id': record.app_id,
+        'store': store,
+        'niche': record.niche,
+        'name': record.app_name,
+        'link': record.app_link,
+        'logo': record.logo_url,
+        'developer': record.developer,
+        'installs': record.install_count,
+        'released': record.released.isoformat() if record.released else None,
+    }
+
+
+def _write_json_gz(path, obj):
+    data = json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # mtime=0 keeps the bytes identical when the data is unchanged
+    with open(path + '.part', 'wb') as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    os.replace(path + '.part', path)
+
+
+def _split_shards(terms, prefix, postings, shards):
+    """Assign sorted terms sharing `prefix` to shards, splitting prefixes that are too large"""
+    size = sum(len(postings[term]) for term in terms)
+    if size <= CONFIG['MAX_SHARD_POSTINGS'] or all(len(term) <= len(prefix) for term in terms):
+        shards[prefix] = terms
+        return
+    own, children = [], defaultdict(list)
+    for term in terms:
+        if len(term) <= len(prefix):
+            own.append(term)
+        else:
+            children[term[:len(prefix) + 1]].append(term)
+    if own:
+        shards[prefix] = own
+    for child_prefix, child_terms in children.items():
+        _split_shards(child_terms, child_prefix, postings, shards)
+
+
+def build_index(csv_files=None, output_dir=None):
+    """
+    Build the index from the scraper CSVs
+
+    :param csv_files: Store label -> CSV (uses export_niches' INPUT_CSVS if None; missing files are skipped)
+    :param output_dir: Output directory (uses CONFIG if None)
+    :return: The manifest dict
+    """
+    csv_files = csv_files or EXPORT_CONFIG['INPUT_CSVS']
+    output_dir = output_dir or CONFIG['OUTPUT_DIR']
+    weights = CONFIG['FIELD_WEIGHTS']
+
+    # Doc table: one doc per app; an app found by both Play scrapers is indexed once,
+    # and the append-only similar-apps CSV keeps its latest row
+    docs, doc_ids = [], {}
+    records = []
+    for store, csv_file in sorted(csv_files.items()):
+        if not os.path.exists(csv_file):
+            print(f"⚠ Warning: {csv_file} not found, skipping...")
+            continue
+        with open(csv_file, newline='', encoding='utf-8-sig') as f:
+            for row in csv.DictReader(f):
+                record = AppRecord.from_row(row)
+                key = record.app_id or record.app_link
+                if key in doc_ids:
+                    if docs[doc_ids[key]]['store'] == store:
+                        docs[doc_ids[key]] = _doc_entry(record, store)
+                        records[doc_ids[key]] = record
+                    continue
+                doc_ids[key] = len(docs)
+                docs.append(_doc_entry(record, store))
+                records.append(record)
+
+    # term -> [(doc id, weight)], built in doc order so every list is sorted
+    postings = defaultdict(list)
+    for doc_id, record in enumerate(records):
+        term_weights = Counter()
+        for field, text in (('name', record.app_name), ('keywords', record.keywords),
+                            ('description', record.description)):
+            for term in tokenize(text.replace(',', ' ') if field == 'keywords' else text):
+                term_weights[term] += weights[field]
+        for term, weight in term_weights.items():
+            postings[term].append((doc_id, weight))
+
+    shards = {}
+    by_first_char = defaultdict(list)
+    for term in sorted(postings):
+        by_first_char[term[0]].append(term)
+    for prefix, terms in by_first_char.items():
+        _split_shards(terms, prefix, postings, shards)
+
+    terms_dir = os.path.join(output_dir, 'terms')
+    docs_dir = os.path.join(output_dir, 'docs')
+    os.makedirs(terms_dir, exist_ok=True)
+    os.makedirs(docs_dir, exist_ok=True)
+
+    shard_info = {}
+    for prefix in sorted(shards):
+        payload = {}
+        for term in shards[prefix]:
+            encoded, previous = [], 0
+            for doc_id, weight in postings[term]:
+                encoded.extend((doc_id - previous, weight))
+                previous = doc_id
+            payload[term] = encoded
+        name = shard_file(prefix)
+        _write_json_gz(os.path.join(terms_dir, name), payload)
+        shard_info[prefix] = {'file': name, 'terms': len(payload),
+                              'bytes': os.path.getsize(os.path.join(terms_dir, name))}
+
+    per_shard = CONFIG['DOCS_PER_SHARD']
+    doc_shards = (len(docs) + per_shard - 1) // per_shard
+    for n in range(doc_shards):
+        _write_json_gz(os.path.join(docs_dir, f"{n}.json.gz"), docs[n * per_shard:(n + 1) * per_shard])
+
+    # Drop shards left over from a larger index
+    written_terms = {info['file'] for info in shard_info.values()}
+    for name in os.listdir(terms_dir):
+        if name.endswith('.json.gz') and name not in written_terms:
+            os.remove(os.path.join(terms_dir, name))
+    for name in os.listdir(docs_dir):
+        if name.endswith('.json.gz') and int(name.split('.')[0]) >= doc_shards:
+            os.remove(os.path.join(docs_dir, name))
+
+    manifest = {
+        'generated_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'doc_count': len(docs),
+        'docs_per_shard': per_shard,
+        'doc_shards': doc_shards,
+        'tokenizer': {
+            'lowercase': True,
+            'strip_accents': True,
+            'pattern': _WORD_RE.pattern,
+            'min_length': CONFIG['MIN_TERM_LENGTH'],
+            'stop_words': sorted(STOP_WORDS),
+        },
+        'field_weights': weights,
+        'shards': shard_info,
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+    total_bytes = sum(info['bytes'] for info in shard_info.values())
+    print(f"✓ Indexed {len(docs)} apps: {len(postings)} terms in {len(shard_info)} shards "
+          f"({total_bytes // 1024} KB), {doc_shards} doc shards -> {output_dir}")
+    return manifest
+
+
+# ===========================
+# Query
+# ===========================
+class SearchIndex:
+    def __init__(self, index_dir=None):
+        """
+        Reads a built index lazily, one shard at a time (as the website would over HTTP)
+
+        :param index_dir: Index directory (uses CONFIG if None)
+        """
+        self.index_dir = index_dir or CONFIG['OUTPUT_DIR']
+        with open(os.path.join(self.index_dir, 'manifest.json'), encoding='utf-8') as f:
+            self.manifest = json.load(f)
+        self._term_shards = {}
+        self._doc_shards = {}
+
+    def _load(self, path):
+        with open(path, 'rb') as f:
+            return json.loads(gzip.decompress(f.read()).decode('utf-8'))
+
+    def postings(self, term):
+        """(doc id, weight) pairs of a term, decoded from its shard"""
+        prefix = find_shard(term, self.manifest['shards'])
+        if prefix is None:
+            return []
+        if prefix not in self._term_shards:
+            name = self.manifest['shards'][prefix]['file']
+            self._term_shards[prefix] = self._load(os.path.join(self.index_dir, 'terms', name))
+        encoded = self._term_shards[prefix].get(term, [])
+        pairs, doc_id = [], 0
+        for i in range(0, len(encoded), 2):
+            doc_id += encoded[i]
+            pairs.append((doc_id, encoded[i + 1]))
+        return pairs
+
+    def doc(self, doc_id):
+        per_shard = self.manifest['docs_per_shard']
+        n = doc_id // per_shard
+        if n not in self._doc_shards:
+            self._doc_shards[n] = self._load(os.path.join(self.index_dir, 'docs', f"{n}.json.gz"))
+        return self._doc_shards[n][doc_id % per_shard]
+
+    def search(self, query, limit=20):
+        """
+        Apps matching every query word (any word if none matches all), best first
+
+        Score: sum over query words of weight x log(1 + docs / docs with the word).
+
+        :return: List of (score, doc entry)
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        doc_count = self.manifest['doc_count']
+        scores, matched = defaultdict(float), Counter()
+        for term in terms:
+            pairs = self.postings(term)
+            if not pairs:
+                continue
+            idf = math.log(1 + doc_count / len(pairs))
+            for doc_id, weight in pairs:
+                scores[doc_id] += weight * idf
+                matched[doc_id] += 1
+        every_word = [doc_id for doc_id in scores if matched[doc_id] == len(terms)]
+        candidates = every_word or list(scores)
+        best = sorted(candidates, key=lambda doc_id: (-scores[doc_id], doc_id))[:limit]
+        return [(scores[doc_id], self.doc(doc_id)) for doc_id in best]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuilt sharded search index over the scraped apps")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('build', help="Build the index from the scraper CSVs")
+    query_parser = subparsers.add_parser('query', help="Search a built index")
+    query_parser.add_argument('query')
+    query_parser.add_argument('--limit', type=int, default=20, help="How many apps to print")
+    parser.add_argument('--output-dir', default=CONFIG['OUTPUT_DIR'], help="Index directory")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        print("="*60)
+        print("Search Index")
+        print("="*60)
+        build_index(output_dir=args.output_dir)
+    else:
+        for score, doc in SearchIndex(args.output_dir).search(args.query, args.limit):
+            print(f"{score:7.2f}  [{doc['store']}] {doc['name']} ({doc['niche']}) {doc['link']}")
+
+
+if __name__ == '__main__':
+    main()
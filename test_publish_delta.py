@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+"""Round trip of publish_delta.py through the LocalDirUploader stand-in"""
+
+import csv
+import json
+import os
+
+from app_record import CSV_COLUMNS
+from publish_delta import DeltaPublisher, LocalDirUploader
+
+LINK = 'https://play.google.com/store/apps/details?id={}'
+
+
+def _write_csv(path, rows):
+    with open(path, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        for niche, package, installs in rows:
+            writer.writerow({'Niche': niche, 'App Name': package, 'App Link': LINK.format(package),
+                             'Install Count': installs})
+
+
+def _read_json(remote, name):
+    with open(os.path.join(remote, 'patches', 'google_play_apps', name), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _patch(remote):
+    """(published index, its latest patch)"""
+    index = _read_json(remote, 'index.json')
+    return index, _read_json(remote, index['patches'][-1]['file'])
+
+
+def test_round_trip_multi_niche_app(tmp_path):
+    csv_file = str(tmp_path / 'google_play_apps.csv')
+    remote = str(tmp_path / 'remote')
+    publisher = DeltaPublisher(LocalDirUploader(remote), snapshot_dir=str(tmp_path / '.publish'),
+                               patch_dir=str(tmp_path / 'patches'))
+
+    # First publish: the full CSV is the base
+    _write_csv(csv_file, [('Tools', 'com.a', '1K+'), ('Productivity', 'com.a', '1K+'), ('Tools', 'com.b', '5K+')])
+    publisher.publish(csv_file)
+    assert os.path.exists(os.path.join(remote, 'google_play_apps.csv'))
+    assert _read_json(remote, 'index.json')['patches'] == []
+
+    # Only the Tools row of the multi-niche app changes
+    _write_csv(csv_file, [('Tools', 'com.a', '10K+'), ('Productivity', 'com.a', '1K+'), ('Tools', 'com.b', '5K+')])
+    publisher.publish(csv_file)
+    index, patch = _patch(remote)
+    assert len(index['patches']) == 1
+    niche = patch['columns'].index('Niche')
+    assert [row[niche] for row in patch['updated']] == ['Tools']
+    assert patch['added'] == [] and patch['deleted'] == []
+
+    # Add a niche to an app and drop another of its rows
+    _write_csv(csv_file, [('Tools', 'com.a', '10K+'), ('Tools', 'com.b', '5K+'), ('Games', 'com.b', '5K+')])
+    publisher.publish(csv_file)
+    index, patch = _patch(remote)
+    assert len(index['patches']) == 2
+    assert [(row[niche], row[patch['columns'].index('App Link')]) for row in patch['added']] == [('Games', LINK.format('com.b'))]
+    assert patch['updated'] == []
+    assert patch['deleted'] == [['Productivity', 'play:com.a']]
+    assert patch['base'] == index['patches'][0]['version']
+
+    # Nothing changed: no new patch
+    publisher.publish(csv_file)
+    assert len(_patch(remote)[0]['patches']) == 2
+
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+Lease-Based Work Queue
+======================
+Lets several runners (machines or processes) cooperate on one scraping job.
+Work units of a kind (App Store feeds and lookups, Play categories and
+detail pages, similar-app frontier nodes) are added by every runner, each
+unit once, and handed out in leased batches:
+
+- lease() marks a batch as owned by this worker until the lease expires;
+- complete() retires it; fail() puts it back (until MAX_ATTEMPTS);
+- release() hands unfinished units back (e.g. at the run's deadline);
+- a lease that expires because its worker died is re-queued by the next
+  lease() call of any worker.
+
+Acknowledgements (complete/fail/release) only apply to units this worker
+still holds: once a slow worker's lease expired and another worker took the
+unit, its late acknowledgement is reported as stale and changes nothing.
+
+WorkQueue is the interface; SQLiteWorkQueue keeps the queue in one SQLite
+file, which may live on a filesystem shared by the runners (rollback
+journal, not WAL, so no shared memory is needed; writers take the database
+lock with BEGIN IMMEDIATE). Lease expiry uses the wall clock, so the
+runners' clocks must roughly agree.
+
+    python appstore_search_by_category.py --queue /shared/nightly.sqlite   # on every runner
+    python work_queue.py status /shared/nightly.sqlite
+"""
+
+import argparse
+import csv
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+# ===========================
+# CONFIGURATION - EDIT HERE
+# ===========================
+CONFIG = {
+    # Seconds a leased batch stays with its worker before it is handed to another one
+    'LEASE_SECONDS': 600,
+
+    # A unit that failed this many times is not handed out again
+    'MAX_ATTEMPTS': 3,
+
+    # Seconds to wait for another runner's database lock
+    'BUSY_TIMEOUT': 60,
+
+    # Seconds between polls while the remaining units are leased by other workers
+    'POLL_INTERVAL': 15,
+}
+
+# Unit states
+PENDING, LEASED, DONE, FAILED = 0, 1, 2, 3
+STATE_NAMES = ('pending', 'leased', 'done', 'failed')
+
+
+def worker_id():
+    """Name of this worker: host and process id"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def worker_file(filename, worker):
+    """Per-worker output file name: app_store_apps.csv -> app_store_apps.worker-<worker>.csv"""
+    root, ext = os.path.splitext(filename)
+    return f"{root}.worker-{worker}{ext}"
+
+
+class WorkQueue(ABC):
+    """Interface of the work queues; all units are identified by (kind, key)"""
+
+    @abstractmethod
+    def add(self, kind, units):
+        """
+        Add work units; a unit already in the queue is kept as it is, except that a
+        still pending unit takes the payload of a lower-priority (earlier) sighting
+
+        :param kind: Unit kind, e.g. 'feed'
+        :param units: (key, JSON-serialisable payload, priority) tuples; lower priority is handed out first
+        """
+
+    @abstractmethod
+    def lease(self, kind, limit):
+        """Lease up to `limit` pending units: [(key, payload)], lowest priority first"""
+
+    @abstractmethod
+    def complete(self, kind, keys):
+        """Retire processed units still leased by this worker; returns the number retired"""
+
+    @abstractmethod
+    def fail(self, kind, keys):
+        """
+        Hand failed units still leased by this worker back for another attempt (they are
+        dropped after MAX_ATTEMPTS); returns the number handed back
+        """
+
+    @abstractmethod
+    def release(self, kind, keys):
+        """Hand units still leased by this worker back unprocessed, without counting an attempt"""
+
+    @abstractmethod
+    def counts(self, kind=None):
+        """{kind: {state name: units}}, or the counts of one kind"""
+
+    def remaining(self, kind):
+        """Units of a kind still pending or leased"""
+        counts = self.counts(kind)
+        return counts['pending'] + counts['leased']
+
+    def drain(self, kind, limit, should_stop=None):
+        """
+        Lease batches until no unit of the kind is pending or leased. When the rest is
+        leased by other workers, wait: a dead worker's units come back when their lease expires.
+        When the generator ends, every unit of the kind is done or failed (a barrier between phases).
+
+        :param should_stop: Optional callable; no new batch is leased once it returns True
+        :return: Generator of [(key, payload)] batches
+        """
+        while not (should_stop and should_stop()):
+            batch = self.lease(kind, limit)
+            if batch:
+                yield batch
+            elif self.remaining(kind):
+                time.sleep(CONFIG['POLL_INTERVAL'])
+            else:
+                return
+
+
+class SQLiteWorkQueue(WorkQueue):
+    def __init__(self, path, worker=None, lease_seconds=None):
+        """
+        Open (or create) a queue file
+
+        :param path: SQLite file, shared by all runners of the job
+        :param worker: Name of this worker (host and process id if None)
+        :param lease_seconds: Lease duration (uses CONFIG if None)
+        """
+        self.path = path
+        self.worker = worker or worker_id()
+        self.lease_seconds = lease_seconds or CONFIG['LEASE_SECONDS']
+        self.lock = threading.Lock()  # One connection, shared by the crawl worker threads
+        self.db = sqlite3.connect(path, timeout=CONFIG['BUSY_TIMEOUT'], isolation_level=None,
+                                  check_same_thread=False)
+        # WAL needs shared memory between the processes, which network filesystems lack
+        self.db.execute('PRAGMA journal_mode=DELETE')
+        self.db.execute('PRAGMA synchronous=FULL')
+        with self._transaction():
+            self.db.execute("""CREATE TABLE IF NOT EXISTS units (
+                kind TEXT NOT NULL, key TEXT NOT NULL, payload TEXT, priority REAL NOT NULL DEFAULT 0,
+                state INTEGER NOT NULL DEFAULT 0, owner TEXT, expires REAL, attempts INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (kind, key))""")
+            self.db.execute('CREATE INDEX IF NOT EXISTS units_by_state ON units (kind, state, priority)')
+
+    def _transaction(self):
+        return _Transaction(self)
+
+    def _acknowledge(self, sql, kind, keys, *params):
+        """
+        Run `sql ... WHERE <unit leased by this worker> AND key IN (...)` over keys, in chunks
+        under SQLite's variable limit; units whose lease passed to another worker are left alone
+
+        :return: Number of units updated
+        """
+        keys = sorted({str(key) for key in keys})
+        changed = 0
+        with self._transaction():
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                cursor = self.db.execute(f"{sql} WHERE kind = ? AND state = ? AND owner = ? "
+                                         f"AND key IN ({','.join('?' * len(chunk))})",
+                                         (*params, kind, LEASED, self.worker, *chunk))
+                changed += cursor.rowcount
+        if changed < len(keys):
+            print(f"⚠ [Queue] Ignored {len(keys) - changed} stale {kind} acknowledgements "
+                  f"(no longer leased by this worker)")
+        return changed
+
+    def add(self, kind, units):
+        rows = [(kind, str(key), json.dumps(payload, ensure_ascii=False), priority) for key, payload, priority in units]
+        with self._transaction():
+            self.db.executemany("""INSERT INTO units (kind, key, payload, priority) VALUES (?, ?, ?, ?)
+                ON CONFLICT (kind, key) DO UPDATE SET payload = excluded.payload, priority = excluded.priority
+                WHERE units.state = 0 AND excluded.priority < units.priority""", rows)
+
+    def lease(self, kind, limit):
+        now = time.time()
+        with self._transaction():
+            expired = self.db.execute("UPDATE units SET state = ?, owner = NULL WHERE kind = ? AND state = ? AND expires < ?",
+                                      (PENDING, kind, LEASED, now)).rowcount
+            rows = self.db.execute("SELECT key, payload FROM units WHERE kind = ? AND state = ? ORDER BY priority, rowid LIMIT ?",
+                                   (kind, PENDING, limit)).fetchall()
+            if rows:
+                self.db.executemany("UPDATE units SET state = ?, owner = ?, expires = ? WHERE kind = ? AND key = ?",
+                                    [(LEASED, self.worker, now + self.lease_seconds, kind, key) for key, _ in rows])
+        if expired:
+            print(f"[Queue] Re-queued {expired} {kind} units whose lease expired")
+        return [(key, json.loads(payload)) for key, payload in rows]
+
+    def complete(self, kind, keys):
+        return self._acknowledge("UPDATE units SET state = ?, owner = NULL", kind, keys, DONE)
+
+    def fail(self, kind, keys):
+        return self._acknowledge("""UPDATE units SET attempts = attempts + 1, owner = NULL,
+                                    state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END""",
+                                 kind, keys, CONFIG['MAX_ATTEMPTS'], FAILED, PENDING)
+
+    def release(self, kind, keys):
+        return self._acknowledge("UPDATE units SET state = ?, owner = NULL", kind, keys, PENDING)
+
+    def counts(self, kind=None):
+        with self.lock:
+            rows = self.db.execute("SELECT kind, state, COUNT(*) FROM units GROUP BY kind, state").fetchall()
+        counts = {}
+        for unit_kind, state, count in rows:
+            counts.setdefault(unit_kind, dict.fromkeys(STATE_NAMES, 0))[STATE_NAMES[state]] = count
+        if kind is not None:
+            return counts.get(kind, dict.fromkeys(STATE_NAMES, 0))
+        return counts
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT (ROLLBACK on error), holding the connection lock"""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __enter__(self):
+        self.queue.lock.acquire()
+        try:
+            self.queue.db.execute('BEGIN IMMEDIATE')
+        except Exception:
+            self.queue.lock.release()
+            raise
+        return self.queue.db
+
+    def __exit__(self, exc_type, *exc_info):
+        try:
+            self.queue.db.execute('ROLLBACK' if exc_type else 'COMMIT')
+        finally:
+            self.queue.lock.release()
+        return False
+
+
+def merge_worker_csvs(output_file, partial_files, append=False, key=('App Link',)):
+    """
+    Combine the per-worker CSVs of a queued run (the first row per key wins)
+
+    :param output_file: Combined CSV
+    :param partial_files: Worker CSVs, all with the same columns
+    :param append: Append the rows to an existing output_file (as a single-runner run would) instead of replacing it
+    :param key: Columns identifying a row, e.g. ('Niche', 'App Link') for a row per app and category
+    :return: Number of rows written
+    """
+    append = append and os.path.exists(output_file)
+    seen = set()
+    written = 0
+    # A new file starts with a BOM like the scrapers' CSVs; appended rows must not repeat it
+    with open(output_file, 'a' if append else 'w', newline='', encoding='utf-8' if append else 'utf-8-sig') as out:
+        writer = None
+        for partial_file in partial_files:
+            with open(partial_file, newline='', encoding='utf-8-sig') as f:
+                reader = csv.DictReader(f)
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=reader.fieldnames)
+                    if not append:
+                        writer.writeheader()
+                for row in reader:
+                    row_key = tuple(row[column] for column in key)
+                    if row_key not in seen:
+                        seen.add(row_key)
+                        writer.writerow(row)
+                        written += 1
+    print(f"✓ Merged {written} rows from {len(partial_files)} worker files into {output_file}")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect the work queue of a multi-runner scraping job")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    status_parser = subparsers.add_parser('status', help="Units per kind and state")
+    status_parser.add_argument('queue', help="Queue file")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        queue = SQLiteWorkQueue(args.queue)
+        counts = queue.counts()
+        print(f"{'Kind':<10}" + ''.join(f"{name:>10}" for name in STATE_NAMES))
+        for kind, states in sorted(counts.items()):
+            print(f"{kind:<10}" + ''.join(f"{states[name]:>10}" for name in STATE_NAMES))
+        queue.close()
+
+
+if __name__ == '__main__':
+    main()